@@ -4,6 +4,7 @@ import dash_bootstrap_components as dbc
 from datetime import datetime
 import os
 from config import SERVER_CONFIG, APP_CONFIG
+from utils.db_manager import db_manager
 
 from components.sidebar import create_sidebar, create_mobile_navbar
 from components.navbar import create_navbar
@@ -62,6 +63,9 @@ app = dash.Dash(
 
 server = app.server
 
+# Checkpoint do WAL e PRAGMA optimize periódicos (também sob gunicorn)
+db_manager.start_maintenance()
+
 app.layout = dbc.Container([
     dcc.Store(id='session-store'),
     dcc.Store(id='theme-store', data='light'),
@@ -0,0 +1,92 @@
+"""
+Campo de busca com debounce e descarte de respostas fora de ordem
+
+Fluxo de uma busca:
+1. O dbc.Input só envia o valor depois de uma pausa na digitação.
+2. Um callback no navegador normaliza o termo (ignora termos curtos e
+   repetidos) e grava {'termo', 'seq'} no store da busca; só então o
+   callback do servidor é disparado.
+3. O servidor devolve a resposta com o seq que a originou em um store
+   de "caixa de entrada"; outro callback no navegador só repassa a resposta
+   aos stores da página se ela for da busca mais recente.
+"""
+
+from dash import Input, Output, State, clientside_callback, dcc
+import dash_bootstrap_components as dbc
+
+from config import UI_CONFIG
+
+DEBOUNCE_MS = UI_CONFIG.get('search_debounce_ms', 300)
+TAMANHO_MINIMO = UI_CONFIG.get('search_min_length', 2)
+
+BUSCA_INICIAL = {'termo': '', 'seq': 0}
+
+
+def termo_busca(valor, minimo=TAMANHO_MINIMO):
+    """Termo efetivo da busca: vazio quando curto demais para filtrar"""
+    termo = (valor or '').strip()
+    return termo if len(termo) >= minimo else ''
+
+
+def campo_busca(input_id, placeholder):
+    """dbc.Input que só envia o valor após uma pausa na digitação"""
+    return dbc.Input(id=input_id, placeholder=placeholder, debounce=DEBOUNCE_MS)
+
+
+def stores_busca(busca_id, resposta_id):
+    """Stores da busca atual e da caixa de entrada de respostas"""
+    return [
+        dcc.Store(id=busca_id, data=BUSCA_INICIAL),
+        dcc.Store(id=resposta_id, data=None),
+    ]
+
+
+def resposta_busca(busca, valores):
+    """Empacota os valores das saídas com o seq da busca que os originou"""
+    return {'seq': (busca or BUSCA_INICIAL)['seq'], 'valores': list(valores)}
+
+
+def registrar_busca(input_id, busca_id, resposta_id, saidas):
+    """
+    Registra os callbacks de navegador da busca
+
+    Args:
+        input_id (str): Campo de texto da busca
+        busca_id (str): Store com {'termo', 'seq'} (Input do callback do servidor)
+        resposta_id (str): Store onde o servidor grava resposta_busca(...)
+        saidas (list): (id, propriedade) atualizados com resposta['valores']
+    """
+    clientside_callback(
+        f"""
+        function(valor, busca) {{
+            var termo = (valor || '').trim();
+            if (termo.length < {TAMANHO_MINIMO}) {{
+                termo = '';
+            }}
+            busca = busca || {{termo: '', seq: 0}};
+            if (termo === busca.termo) {{
+                return window.dash_clientside.no_update;
+            }}
+            return {{termo: termo, seq: busca.seq + 1}};
+        }}
+        """,
+        Output(busca_id, 'data'),
+        Input(input_id, 'value'),
+        State(busca_id, 'data'),
+        prevent_initial_call=True
+    )
+
+    clientside_callback(
+        """
+        function(resposta, busca) {
+            if (!resposta || (busca && resposta.seq < busca.seq)) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return resposta.valores;
+        }
+        """,
+        [Output(componente, propriedade) for componente, propriedade in saidas],
+        Input(resposta_id, 'data'),
+        State(busca_id, 'data'),
+        prevent_initial_call=True
+    )
@@ -0,0 +1,55 @@
+"""
+Identificação do componente que disparou um callback
+
+Os botões das linhas das tabelas usam IDs padrão ({'type': ..., 'index': id});
+``ctx.triggered_id`` já entrega esse ID como dicionário, sem precisar
+interpretar a string de prop_id.
+"""
+
+from typing import Any, NamedTuple, Optional
+
+import dash
+
+
+class Disparo(NamedTuple):
+    """Componente que disparou o callback atual"""
+    tipo: str  # 'type' de um ID padrão ou o próprio ID
+    index: Optional[Any] = None  # 'index' de um ID padrão
+    valor: Any = None  # valor da propriedade que disparou (ex: n_clicks)
+
+
+def disparo():
+    """Retorna o Disparo do callback em execução (None se nada disparou)"""
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered_id
+    if triggered_id is None:
+        return None
+
+    valor = ctx.triggered[0]['value'] if ctx.triggered else None
+    if isinstance(triggered_id, dict):
+        return Disparo(triggered_id.get('type'), triggered_id.get('index'), valor)
+    return Disparo(triggered_id, None, valor)
+
+
+def despachar(handlers, padrao=dash.no_update, exigir_valor=True):
+    """
+    Chama o handler correspondente ao componente que disparou o callback
+
+    Args:
+        handlers (dict): tipo (ou ID) -> função que recebe o index do ID padrão
+            (None para IDs simples)
+        padrao: Retorno quando nenhum handler se aplica
+        exigir_valor (bool): Ignora disparos sem valor, como os botões
+            recém-renderizados de uma tabela (n_clicks None)
+
+    Returns:
+        O retorno do handler, ou ``padrao``
+    """
+    atual = disparo()
+    if atual is None or atual.tipo not in handlers:
+        return padrao
+
+    if exigir_valor and not atual.valor:
+        return padrao
+
+    return handlers[atual.tipo](atual.index)
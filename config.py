@@ -15,7 +15,29 @@ SERVER_CONFIG = {
 DATABASE_CONFIG = {
     'path': 'data/clinic_system.db',
     'backup_enabled': True,
-    'backup_interval_hours': 24
+    'backup_interval_hours': 24,
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),  # conexões simultâneas
+    'pool_max_uses': 1000,  # recicla a conexão após N empréstimos
+    'pool_timeout': 30,  # segundos aguardando uma conexão livre
+    'storage_profile': os.getenv('DB_STORAGE_PROFILE', 'concorrente'),
+    'maintenance_interval_seconds': 300,  # checkpoint do WAL e PRAGMA optimize
+    'cache_ttl_seconds': 30,  # validade dos resultados em cache (intervalo do dashboard)
+    'cache_max_entries': 256  # entradas mantidas antes da remoção LRU
+}
+
+# Perfis de armazenamento do SQLite (PRAGMAs aplicados a cada nova conexão)
+STORAGE_PROFILES = {
+    # Padrões do SQLite: rollback journal e synchronous=FULL
+    'padrao': {},
+    # Leitores não bloqueiam escritores: WAL + cache e mmap maiores
+    'concorrente': {
+        'busy_timeout': 5000,  # ms aguardando locks antes de "database is locked"
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -20000,  # ~20 MB por conexão
+        'mmap_size': 268435456,  # 256 MB
+        'temp_store': 'MEMORY'
+    }
 }
 
 # Configurações da aplicação
@@ -32,7 +54,17 @@ UI_CONFIG = {
     'sidebar_width': 2,
     'content_width': 10,
     'enable_mobile_navbar': True,
-    'auto_refresh_interval': 30  # segundos
+    'auto_refresh_interval': 30,  # segundos
+    'search_debounce_ms': 300,  # pausa na digitação antes de buscar
+    'search_min_length': 2  # termos mais curtos não filtram
+}
+
+# Configurações da agenda
+SCHEDULE_CONFIG = {
+    'default_working_hours': 'Segunda a Sexta: 08:00 às 18:00',  # médicos sem horário cadastrado
+    'default_duration_minutes': 30,
+    'free_statuses': ['cancelado'],  # consultas que não ocupam o horário
+    'max_series_occurrences': 52  # consultas por paciente em uma série
 }
 
 # Configurações de segurança
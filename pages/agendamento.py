@@ -3,9 +3,29 @@ from dash import html, dcc, callback, Input, Output, State, ALL
 import dash_bootstrap_components as dbc
 from datetime import datetime, timedelta, date
 import pandas as pd
-from utils.db_manager import db_manager
+from utils.db_manager import db_manager, normalizar_data
+from utils.repositories import medicos_repo, pacientes_repo
+from utils.agenda import (
+    MAX_OCORRENCIAS, ConflitoDeHorario, agenda_medicos, consultas_da_janela, deslocar_janela,
+    janela_calendario, prefetch_janelas
+)
 from components.navbar import create_page_header, create_alert
 
+# Cores dos status no calendário
+STATUS_COLORS = {
+    'agendado': 'success',
+    'confirmado': 'primary',
+    'em_andamento': 'warning',
+    'concluido': 'info',
+    'cancelado': 'danger',
+    'faltou': 'secondary'
+}
+
+DIAS_SEMANA = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+
+# Pacientes oferecidos por vez no seletor da série (uma página da busca)
+PACIENTES_POR_BUSCA = 20
+
 def create_layout():
     """Cria o layout da página de agendamento"""
     
@@ -18,6 +38,10 @@ def create_layout():
                     html.I(className="fas fa-plus me-1"),
                     "Nova Consulta"
                 ], color="primary", id="btn-nova-consulta"),
+                dbc.Button([
+                    html.I(className="fas fa-redo me-1"),
+                    "Agendar Série"
+                ], color="outline-primary", id="btn-agendar-serie"),
                 dbc.Button([
                     html.I(className="fas fa-calendar-week me-1"),
                     "Visualizar Agenda"
@@ -112,15 +136,32 @@ def create_layout():
                 dbc.ModalTitle("📅 Visualizar Agenda")
             ]),
             dbc.ModalBody([
-                html.Div(id="modal-agenda-content")
+                create_controles_calendario(),
+                html.Div(id="agenda-calendario")
             ]),
             dbc.ModalFooter([
                 dbc.Button("Fechar", color="secondary", id="btn-fechar-agenda")
             ])
         ], id="modal-visualizar-agenda", size="xl"),
 
+        # Modal para agendamento em série
+        dbc.Modal([
+            dbc.ModalHeader([
+                dbc.ModalTitle("🔁 Agendar Série de Consultas")
+            ]),
+            dbc.ModalBody([
+                create_form_serie(),
+                html.Div(id="serie-resultado", className="mt-3")
+            ]),
+            dbc.ModalFooter([
+                dbc.Button("Fechar", color="secondary", id="btn-fechar-serie"),
+                dbc.Button("Agendar Série", color="primary", id="btn-confirmar-serie")
+            ])
+        ], id="modal-agendar-serie", size="lg"),
+
         # Store para dados
-        dcc.Store(id='store-consulta-editando')
+        dcc.Store(id='store-consulta-editando'),
+        dcc.Store(id='store-agenda-referencia')
     ])
 
 @callback(
@@ -157,15 +198,11 @@ def update_lista_consultas(n_clicks, selected_date, medico_id, status):
         else:
             data_consulta = selected_date
 
-        # Buscar consultas do dia
-        consultas = db_manager.get_consultas_periodo(data_consulta, data_consulta)
-
-        # Aplicar filtros
-        if medico_id:
-            consultas = consultas[consultas['medico_id'] == medico_id]
-
-        if status and status != 'todos':
-            consultas = consultas[consultas['status'] == status]
+        # Buscar consultas do dia, com os filtros aplicados no SQL
+        consultas = db_manager.get_consultas(
+            (data_consulta, data_consulta), medico_id,
+            status if status and status != 'todos' else None
+        )
 
         if consultas.empty:
             return create_empty_state_consultas()
@@ -328,10 +365,9 @@ def create_form_nova_consulta():
                 ], md=4),
                 dbc.Col([
                     dbc.Label("Horário:"),
-                    dbc.Input(
+                    dcc.Dropdown(
                         id='input-horario-nova',
-                        type='time',
-                        value='09:00'
+                        placeholder="Selecione o médico"
                     )
                 ], md=4),
                 dbc.Col([
@@ -360,6 +396,30 @@ def create_form_nova_consulta():
     except Exception as e:
         return dbc.Alert(f"Erro ao carregar formulário: {str(e)}", color="danger")
 
+@callback(
+    [Output('input-horario-nova', 'options'),
+     Output('input-horario-nova', 'value'),
+     Output('input-horario-nova', 'placeholder')],
+    [Input('dropdown-medico-nova', 'value'),
+     Input('date-picker-nova-consulta', 'date')],
+    prevent_initial_call=True
+)
+def update_horarios_livres(medico_id, data):
+    """Lista os horários livres do médico no dia escolhido"""
+
+    if not medico_id or not data:
+        return [], None, "Selecione o médico"
+
+    try:
+        horarios = agenda_medicos.horarios_livres(medico_id, data, a_partir_de=datetime.now())
+    except Exception as e:
+        return [], None, f"Erro ao carregar horários: {str(e)}"
+
+    if not horarios:
+        return [], None, "Nenhum horário livre neste dia"
+
+    return [{'label': h, 'value': h} for h in horarios], None, "Selecione o horário"
+
 @callback(
     Output('agendamento-alerts', 'children'),
     Input('btn-confirmar-consulta', 'n_clicks'),
@@ -382,212 +442,355 @@ def agendar_consulta(n_clicks, paciente_id, medico_id, data, horario, valor, obs
             return create_alert("Preencha todos os campos obrigatórios.", "warning")
         
         # Combinar data e horário
-        data_consulta = f"{data} {horario}:00"
-        
-        # Inserir no banco
-        query = '''
-            INSERT INTO consultas (paciente_id, medico_id, data_consulta, valor, observacoes, status)
-            VALUES (?, ?, ?, ?, ?, 'agendado')
-        '''
+        inicio = datetime.strptime(f"{data[:10]} {horario}", '%Y-%m-%d %H:%M')
         
-        db_manager.execute_insert(query, (
-            paciente_id, medico_id, data_consulta, 
-            valor or 0, observacoes or ""
-        ))
+        # Reserva atômica: recusa horários já ocupados na agenda do médico
+        agenda_medicos.reservar(paciente_id, medico_id, inicio, valor, observacoes)
         
         return create_alert("Consulta agendada com sucesso!", "success")
         
+    except ConflitoDeHorario as e:
+        return create_alert(f"{str(e)} Escolha outro horário.", "warning")
+        
     except Exception as e:
         return create_alert(f"Erro ao agendar consulta: {str(e)}", "danger")
 
+def create_form_serie():
+    """Cria formulário do agendamento em série"""
+
+    return dbc.Form([
+        dbc.Row([
+            dbc.Col([
+                dbc.Label("Pacientes:"),
+                dcc.Dropdown(
+                    id='dropdown-serie-pacientes',
+                    multi=True,
+                    placeholder="Digite o nome ou CPF dos pacientes"
+                ),
+                dbc.FormText("Cada paciente ocupa o horário seguinte ao do anterior.")
+            ], md=7),
+            dbc.Col([
+                dbc.Label("Médico:"),
+                dcc.Dropdown(id='dropdown-serie-medico', placeholder="Selecione o médico")
+            ], md=5)
+        ], className="mb-3"),
+        dbc.Row([
+            dbc.Col([
+                dbc.Label("Primeira data:"),
+                dcc.DatePickerSingle(
+                    id='date-picker-serie',
+                    date=datetime.now().date(),
+                    display_format='DD/MM/YYYY'
+                )
+            ], md=3),
+            dbc.Col([
+                dbc.Label("Horário inicial:"),
+                dbc.Input(id='input-serie-horario', type='time', value='08:00')
+            ], md=3),
+            dbc.Col([
+                dbc.Label("Repetição:"),
+                dcc.Dropdown(
+                    id='dropdown-serie-frequencia',
+                    options=[
+                        {'label': 'Diária', 'value': 'diaria'},
+                        {'label': 'Semanal', 'value': 'semanal'},
+                        {'label': 'Quinzenal', 'value': 'quinzenal'},
+                        {'label': 'Mensal', 'value': 'mensal'}
+                    ],
+                    value='semanal',
+                    clearable=False
+                )
+            ], md=3),
+            dbc.Col([
+                dbc.Label("Consultas:"),
+                dbc.Input(id='input-serie-ocorrencias', type='number', min=1,
+                          max=MAX_OCORRENCIAS, value=4)
+            ], md=3)
+        ], className="mb-3"),
+        dbc.Row([
+            dbc.Col([
+                dbc.Label("Valor (R$):"),
+                dbc.Input(id='input-serie-valor', type='number', step=0.01, min=0, placeholder="0.00")
+            ], md=4),
+            dbc.Col([
+                dbc.Label("Conflitos:"),
+                dbc.Checklist(
+                    id='check-serie-tudo-ou-nada',
+                    options=[{'label': 'Não agendar nada se houver conflito', 'value': 'tudo'}],
+                    value=[]
+                )
+            ], md=8)
+        ])
+    ])
+
+@callback(
+    [Output('modal-agendar-serie', 'is_open'),
+     Output('dropdown-serie-medico', 'options'),
+     Output('serie-resultado', 'children', allow_duplicate=True)],
+    [Input('btn-agendar-serie', 'n_clicks'),
+     Input('btn-fechar-serie', 'n_clicks')],
+    prevent_initial_call=True
+)
+def toggle_modal_serie(n_abrir, n_fechar):
+    """Controla modal de agendamento em série"""
+
+    if dash.callback_context.triggered_id != 'btn-agendar-serie':
+        return False, dash.no_update, ""
+
+    medicos = db_manager.get_medicos()
+    return (
+        True,
+        [{'label': f"{m['nome']} - {m['especialidade']}", 'value': m['id']} for _, m in medicos.iterrows()],
+        ""
+    )
+
+@callback(
+    Output('dropdown-serie-pacientes', 'options'),
+    Input('dropdown-serie-pacientes', 'search_value'),
+    State('dropdown-serie-pacientes', 'value')
+)
+def buscar_pacientes_serie(busca, selecionados):
+    """Opções do seletor da série: uma página da busca de pacientes ativos"""
+
+    pagina = db_manager.get_pacientes_pagina(
+        busca=(busca or '').strip() or None, ativo=True, limite=PACIENTES_POR_BUSCA
+    )
+    opcoes = {
+        int(p['id']): p['nome'] for p in pagina.registros[['id', 'nome']].to_dict('records')
+    }
+
+    # Os já escolhidos continuam entre as opções, para o seletor exibir seus nomes
+    for paciente_id in selecionados or []:
+        if paciente_id not in opcoes:
+            paciente = pacientes_repo.por_id(paciente_id)
+            if paciente:
+                opcoes[paciente.id] = paciente.nome
+
+    return [{'label': nome, 'value': paciente_id} for paciente_id, nome in opcoes.items()]
+
+@callback(
+    Output('serie-resultado', 'children'),
+    Input('btn-confirmar-serie', 'n_clicks'),
+    [State('dropdown-serie-pacientes', 'value'),
+     State('dropdown-serie-medico', 'value'),
+     State('date-picker-serie', 'date'),
+     State('input-serie-horario', 'value'),
+     State('dropdown-serie-frequencia', 'value'),
+     State('input-serie-ocorrencias', 'value'),
+     State('input-serie-valor', 'value'),
+     State('check-serie-tudo-ou-nada', 'value')],
+    prevent_initial_call=True
+)
+def agendar_serie(n_clicks, paciente_ids, medico_id, data, horario, frequencia,
+                  ocorrencias, valor, tudo_ou_nada):
+    """Agenda a série inteira em uma transação e relata os conflitos"""
+
+    if not n_clicks:
+        return dash.no_update
+
+    if not all([paciente_ids, medico_id, data, horario, frequencia, ocorrencias]):
+        return create_alert("Preencha todos os campos obrigatórios.", "warning")
+
+    try:
+        inicio = datetime.strptime(f"{data[:10]} {horario}", '%Y-%m-%d %H:%M')
+        pedidos = agenda_medicos.serie(paciente_ids, medico_id, inicio, frequencia, ocorrencias)
+        resultado = agenda_medicos.reservar_lote(pedidos, valor, tudo_ou_nada=bool(tudo_ou_nada))
+    except Exception as e:
+        return create_alert(f"Erro ao agendar série: {str(e)}", "danger")
+
+    return create_resultado_serie(resultado)
+
+def create_resultado_serie(resultado):
+    """Resumo da série: quantas foram agendadas e a lista dos conflitos"""
+
+    agendadas = sum(1 for ocorrencia in resultado if ocorrencia.consulta_id)
+    conflitos = [ocorrencia for ocorrencia in resultado if ocorrencia.conflito]
+
+    if not conflitos:
+        return create_alert(f"{agendadas} consulta(s) agendada(s) com sucesso!", "success")
+
+    # Só os pacientes com conflito, lidos por id (do cache quando possível)
+    pacientes = {o.paciente_id: pacientes_repo.por_id(o.paciente_id) for o in conflitos}
+    nomes = {paciente_id: p.nome for paciente_id, p in pacientes.items() if p}
+
+    linhas = [
+        html.Tr([
+            html.Td(ocorrencia.inicio.strftime('%d/%m/%Y %H:%M')),
+            html.Td(nomes.get(ocorrencia.paciente_id, ocorrencia.paciente_id)),
+            html.Td(ocorrencia.conflito)
+        ])
+        for ocorrencia in conflitos
+    ]
+
+    return html.Div([
+        create_alert(
+            f"{agendadas} consulta(s) agendada(s); {len(conflitos)} não agendada(s).",
+            "warning" if agendadas else "danger"
+        ),
+        dbc.Table([
+            html.Thead(html.Tr([html.Th("Data"), html.Th("Paciente"), html.Th("Motivo")])),
+            html.Tbody(linhas)
+        ], bordered=True, size="sm", className="mb-0")
+    ])
+
 # Callback para modal de visualizar agenda
 @callback(
     [Output('modal-visualizar-agenda', 'is_open'),
-     Output('modal-agenda-content', 'children')],
+     Output('dropdown-agenda-medico', 'options')],
     [Input('btn-visualizar-agenda', 'n_clicks'),
      Input('btn-fechar-agenda', 'n_clicks')],
-    State('modal-visualizar-agenda', 'is_open')
+    prevent_initial_call=True
 )
-def toggle_modal_agenda(btn_visualizar, btn_fechar, is_open):
+def toggle_modal_agenda(btn_visualizar, btn_fechar):
     """Controla modal de visualizar agenda"""
 
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        return False, ""
-
-    trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    if dash.callback_context.triggered_id == 'btn-visualizar-agenda' and btn_visualizar:
+        medicos = db_manager.get_medicos()
+        options = [{'label': m['nome'], 'value': m['id']} for _, m in medicos.iterrows()]
+        return True, options
+
+    return False, dash.no_update
+
+def create_controles_calendario():
+    """Navegação e filtros do calendário"""
+
+    return dbc.Row([
+        dbc.Col([
+            dbc.ButtonGroup([
+                dbc.Button(html.I(className="fas fa-chevron-left"), id="btn-agenda-anterior",
+                           color="outline-primary", size="sm"),
+                dbc.Button("Hoje", id="btn-agenda-hoje", color="outline-primary", size="sm"),
+                dbc.Button(html.I(className="fas fa-chevron-right"), id="btn-agenda-proxima",
+                           color="outline-primary", size="sm")
+            ]),
+            html.Span(id="agenda-periodo", className="ms-3 fw-bold")
+        ], md=4),
+        dbc.Col([
+            dbc.RadioItems(
+                id='radio-agenda-visao',
+                options=[
+                    {'label': 'Dia', 'value': 'dia'},
+                    {'label': 'Semana', 'value': 'semana'},
+                    {'label': 'Mês', 'value': 'mes'}
+                ],
+                value='semana',
+                inline=True
+            )
+        ], md=3),
+        dbc.Col([
+            dcc.Dropdown(id='dropdown-agenda-medico', placeholder="Todos os médicos", clearable=True)
+        ], md=3),
+        dbc.Col([
+            dcc.Dropdown(
+                id='dropdown-agenda-status',
+                options=[{'label': status.replace('_', ' ').title(), 'value': status}
+                         for status in STATUS_COLORS],
+                placeholder="Todos os status",
+                clearable=True
+            )
+        ], md=2)
+    ], className="mb-3 align-items-center")
 
-    if trigger_id == 'btn-visualizar-agenda' and btn_visualizar:
-        # Abrir modal e carregar conteúdo da agenda
-        agenda_content = criar_conteudo_agenda()
-        return True, agenda_content
-    elif trigger_id == 'btn-fechar-agenda':
-        return False, ""
+@callback(
+    [Output('agenda-calendario', 'children'),
+     Output('agenda-periodo', 'children'),
+     Output('store-agenda-referencia', 'data')],
+    [Input('modal-visualizar-agenda', 'is_open'),
+     Input('btn-agenda-anterior', 'n_clicks'),
+     Input('btn-agenda-proxima', 'n_clicks'),
+     Input('btn-agenda-hoje', 'n_clicks'),
+     Input('radio-agenda-visao', 'value'),
+     Input('dropdown-agenda-medico', 'value'),
+     Input('dropdown-agenda-status', 'value')],
+    State('store-agenda-referencia', 'data'),
+    prevent_initial_call=True
+)
+def update_calendario(is_open, n_anterior, n_proxima, n_hoje, visao, medico_id, status, referencia):
+    """Mostra o período do calendário e pré-carrega os períodos vizinhos"""
 
-    return is_open, ""
+    if not is_open:
+        return dash.no_update, dash.no_update, dash.no_update
 
-def criar_conteudo_agenda():
-    """Cria o conteúdo da visualização da agenda"""
+    gatilho = dash.callback_context.triggered_id
+    if gatilho in ('modal-visualizar-agenda', 'btn-agenda-hoje') or not referencia:
+        referencia = date.today()
+    elif gatilho == 'btn-agenda-anterior':
+        referencia = deslocar_janela(referencia, visao, -1)
+    elif gatilho == 'btn-agenda-proxima':
+        referencia = deslocar_janela(referencia, visao, 1)
 
     try:
-        # Buscar consultas dos próximos 7 dias
-        data_inicio = datetime.now().date()
-        data_fim = data_inicio + timedelta(days=7)
-
-        query = '''
-            SELECT
-                c.id,
-                c.data_consulta,
-                c.status,
-                c.valor,
-                c.observacoes,
-                p.nome as paciente_nome,
-                p.telefone as paciente_telefone,
-                m.nome as medico_nome,
-                m.especialidade as medico_especialidade
-            FROM consultas c
-            JOIN pacientes p ON c.paciente_id = p.id
-            JOIN medicos m ON c.medico_id = m.id
-            WHERE DATE(c.data_consulta) BETWEEN ? AND ?
-            ORDER BY c.data_consulta ASC
-        '''
-
-        consultas_df = db_manager.execute_query(query, (data_inicio, data_fim))
-
-        if consultas_df is None or consultas_df.empty:
-            return dbc.Alert([
-                html.I(className="fas fa-calendar-times me-2"),
-                "Nenhuma consulta agendada para os próximos 7 dias."
-            ], color="info")
-
-        # Agrupar consultas por data
-        consultas_por_data = {}
-
-        for _, consulta in consultas_df.iterrows():
-            data_consulta = pd.to_datetime(consulta['data_consulta'])
-            data_str = data_consulta.strftime('%Y-%m-%d')
-            data_display = data_consulta.strftime('%d/%m/%Y')
-
-            if data_str not in consultas_por_data:
-                consultas_por_data[data_str] = {
-                    'data_display': data_display,
-                    'consultas': []
-                }
-
-            consultas_por_data[data_str]['consultas'].append({
-                'id': consulta['id'],
-                'horario': data_consulta.strftime('%H:%M'),
-                'paciente': consulta['paciente_nome'],
-                'telefone': consulta['paciente_telefone'],
-                'medico': consulta['medico_nome'],
-                'especialidade': consulta['medico_especialidade'],
-                'status': consulta['status'],
-                'valor': consulta['valor'],
-                'observacoes': consulta['observacoes']
-            })
-
-        # Criar cards para cada dia
-        cards_dias = []
-
-        for data_str in sorted(consultas_por_data.keys()):
-            dia_info = consultas_por_data[data_str]
-
-            # Determinar cor do header baseado no dia
-            data_obj = datetime.strptime(data_str, '%Y-%m-%d').date()
-            hoje = datetime.now().date()
-
-            if data_obj == hoje:
-                header_class = "bg-primary text-white"
-                header_text = f"🗓️ Hoje - {dia_info['data_display']}"
-            elif data_obj == hoje + timedelta(days=1):
-                header_class = "bg-info text-white"
-                header_text = f"📅 Amanhã - {dia_info['data_display']}"
-            else:
-                header_class = "bg-light text-dark"
-                header_text = f"📆 {dia_info['data_display']}"
-
-            # Criar lista de consultas do dia
-            consultas_cards = []
-
-            for consulta in dia_info['consultas']:
-                # Cor do status
-                status_colors = {
-                    'agendado': 'success',
-                    'confirmado': 'primary',
-                    'em_andamento': 'warning',
-                    'concluido': 'info',
-                    'cancelado': 'danger',
-                    'faltou': 'secondary'
-                }
-
-                status_color = status_colors.get(consulta['status'], 'secondary')
-
-                consulta_card = dbc.Card([
-                    dbc.CardBody([
-                        dbc.Row([
-                            dbc.Col([
-                                html.H6([
-                                    html.I(className="fas fa-clock me-2"),
-                                    consulta['horario']
-                                ], className="mb-2"),
-                                html.P([
-                                    html.Strong("Paciente: "),
-                                    consulta['paciente']
-                                ], className="mb-1"),
-                                html.P([
-                                    html.Strong("Telefone: "),
-                                    consulta['telefone']
-                                ], className="mb-1"),
-                                html.P([
-                                    html.Strong("Médico: "),
-                                    f"Dr(a). {consulta['medico']}"
-                                ], className="mb-1"),
-                                html.P([
-                                    html.Strong("Especialidade: "),
-                                    consulta['especialidade']
-                                ], className="mb-1"),
-                                html.P([
-                                    html.Strong("Valor: "),
-                                    f"R$ {consulta['valor']:.2f}"
-                                ], className="mb-1"),
-                                html.P([
-                                    html.Strong("Observações: "),
-                                    consulta['observacoes'] or "Nenhuma"
-                                ], className="mb-0")
-                            ], md=10),
-                            dbc.Col([
-                                dbc.Badge(
-                                    consulta['status'].replace('_', ' ').title(),
-                                    color=status_color,
-                                    className="mb-2"
-                                )
-                            ], md=2, className="text-end")
-                        ])
-                    ])
-                ], className="mb-2", outline=True)
-
-                consultas_cards.append(consulta_card)
-
-            # Card do dia
-            dia_card = dbc.Card([
-                dbc.CardHeader([
-                    html.H5(header_text, className="mb-0")
-                ], className=header_class),
-                dbc.CardBody(consultas_cards)
-            ], className="mb-3")
-
-            cards_dias.append(dia_card)
-
-        return html.Div([
-            dbc.Alert([
-                html.I(className="fas fa-info-circle me-2"),
-                f"Mostrando agenda dos próximos 7 dias ({len(consultas_df)} consulta(s) encontrada(s))"
-            ], color="info", className="mb-3"),
-            html.Div(cards_dias)
-        ])
+        inicio, fim = janela_calendario(referencia, visao)
+        consultas = consultas_da_janela(referencia, visao, medico_id, status)
+        prefetch_janelas(referencia, visao, medico_id, status)
 
+        if medico_id:
+            medico = medicos_repo.por_id(medico_id)
+            medicos = [(medico.id, medico.nome)] if medico else []
+        else:
+            medicos = db_manager.get_medicos()
+            medicos = list(zip(medicos['id'], medicos['nome']))
+
+        calendario = create_calendario(consultas, medicos, inicio, fim)
     except Exception as e:
-        return dbc.Alert([
+        calendario = dbc.Alert([
             html.I(className="fas fa-exclamation-triangle me-2"),
             f"Erro ao carregar agenda: {str(e)}"
         ], color="danger")
+        inicio, fim = janela_calendario(referencia, visao)
+
+    if inicio == fim:
+        periodo = inicio.strftime('%d/%m/%Y')
+    else:
+        periodo = f"{inicio.strftime('%d/%m')} – {fim.strftime('%d/%m/%Y')}"
+
+    return calendario, periodo, normalizar_data(referencia).isoformat()
+
+def create_calendario(consultas, medicos, inicio, fim):
+    """
+    Grade do calendário: uma linha por dia e uma coluna por médico
+
+    Args:
+        consultas (DataFrame): Consultas do período (get_consultas)
+        medicos (list): (id, nome) dos médicos exibidos como colunas
+        inicio (date): Primeiro dia
+        fim (date): Último dia
+    """
+    # Médicos sem cadastro ativo mas com consultas no período também aparecem
+    colunas = list(medicos)
+    conhecidos = {medico_id for medico_id, _ in colunas}
+    for medico_id, nome in consultas[['medico_id', 'medico_nome']].drop_duplicates().itertuples(index=False):
+        if medico_id not in conhecidos:
+            colunas.append((medico_id, nome))
+            conhecidos.add(medico_id)
+
+    celulas = {}
+    for consulta in consultas.itertuples(index=False):
+        chave = (consulta.data_consulta[:10], consulta.medico_id)
+        celulas.setdefault(chave, []).append(
+            dbc.Badge(
+                f"{consulta.data_consulta[11:16]} {consulta.paciente_nome}",
+                color=STATUS_COLORS.get(consulta.status, 'secondary'),
+                title=f"{consulta.paciente_telefone or ''} · {consulta.status}",
+                className="d-block text-start mb-1 text-truncate"
+            )
+        )
+
+    hoje = date.today()
+    linhas = []
+    dia = inicio
+    while dia <= fim:
+        data_str = dia.isoformat()
+        linhas.append(html.Tr(
+            [html.Th(f"{DIAS_SEMANA[dia.weekday()]} {dia.strftime('%d/%m')}", className="table-primary" if dia == hoje else None)] +
+            [html.Td(celulas.get((data_str, medico_id), "")) for medico_id, _ in colunas]
+        ))
+        dia += timedelta(days=1)
+
+    return html.Div([
+        html.Small(f"{len(consultas)} consulta(s) no período", className="text-muted"),
+        dbc.Table([
+            html.Thead(html.Tr([html.Th("Dia")] + [html.Th(nome) for _, nome in colunas])),
+            html.Tbody(linhas)
+        ], bordered=True, size="sm", responsive=True, className="mt-2")
+    ])
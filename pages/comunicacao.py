@@ -3,7 +3,7 @@ from dash import html, dcc, callback, Input, Output, State, ALL
 import dash_bootstrap_components as dbc
 from datetime import datetime, timedelta
 import pandas as pd
-from utils.db_manager import db_manager
+from utils.db_manager import db_manager, filtro_periodo
 from components.navbar import create_page_header, create_alert
 
 def create_layout():
@@ -133,10 +133,11 @@ def update_stats_comunicacao(n):
         taxa_entrega = (entregues / max(total_msg, 1)) * 100 if total_msg > 0 else 0
 
         # Lembretes de hoje
-        lembretes_hoje = db_manager.execute_query('''
+        periodo, params = filtro_periodo('data_envio', hoje, hoje)
+        lembretes_hoje = db_manager.execute_query(f'''
             SELECT COUNT(*) as total FROM comunicacao
-            WHERE tipo = 'lembrete' AND DATE(data_envio) = ?
-        ''', (hoje,)).iloc[0]['total'] or 0
+            WHERE tipo = 'lembrete' AND {periodo}
+        ''', params).iloc[0]['total'] or 0
         
         return (
             f"{total_msg:,}",
@@ -5,7 +5,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, date
 import pandas as pd
-from utils.db_manager import db_manager
+from utils.db_manager import db_manager, filtro_periodo
 from components.navbar import create_page_header, create_alert, create_stats_cards
 
 def create_layout():
@@ -192,34 +192,18 @@ def update_kpis_financeiros(n_clicks, start_date, end_date):
     """Atualiza KPIs financeiros"""
     
     try:
-        # Receitas do período
-        receitas = db_manager.execute_query('''
-            SELECT COALESCE(SUM(valor), 0) as total FROM financeiro 
-            WHERE tipo = 'receita' AND DATE(data_vencimento) BETWEEN ? AND ?
-        ''', (start_date, end_date))
-        
-        # Despesas do período
-        despesas = db_manager.execute_query('''
-            SELECT COALESCE(SUM(valor), 0) as total FROM financeiro 
-            WHERE tipo = 'despesa' AND DATE(data_vencimento) BETWEEN ? AND ?
-        ''', (start_date, end_date))
-        
-        # Receitas pagas
-        receitas_pagas = db_manager.execute_query('''
-            SELECT COALESCE(SUM(valor), 0) as total FROM financeiro 
-            WHERE tipo = 'receita' AND status = 'pago' 
-            AND DATE(data_vencimento) BETWEEN ? AND ?
-        ''', (start_date, end_date))
+        # Totais diários do período
+        financeiro = db_manager.get_financeiro_diario(start_date, end_date)
+        total_receitas = financeiro.loc[financeiro['tipo'] == 'receita', 'valor'].sum()
+        total_despesas = financeiro.loc[financeiro['tipo'] == 'despesa', 'valor'].sum()
         
         # Contas em atraso
         hoje = datetime.now().date()
         contas_vencidas = db_manager.execute_query('''
             SELECT COUNT(*) as total FROM financeiro 
-            WHERE status = 'pendente' AND DATE(data_vencimento) < ?
-        ''', (hoje,))
+            WHERE status = 'pendente' AND data_vencimento < ?
+        ''', (hoje.isoformat(),))
         
-        total_receitas = receitas.iloc[0]['total'] or 0
-        total_despesas = despesas.iloc[0]['total'] or 0
         saldo = total_receitas - total_despesas
         
         stats = [
@@ -250,6 +234,34 @@ def update_kpis_financeiros(n_clicks, start_date, end_date):
     except Exception as e:
         return dbc.Alert(f"Erro ao carregar KPIs: {str(e)}", color="danger")
 
+def calcular_fluxo_caixa(movimentacoes, start_date, end_date):
+    """
+    Receitas, despesas e saldo acumulado de cada dia do período
+    
+    Os totais são distribuídos em uma coluna por tipo (pivot), completados
+    com zero nos dias sem movimentação (reindex) e acumulados com cumsum,
+    em tempo linear no número de dias e de movimentações.
+    
+    Args:
+        movimentacoes (DataFrame): Colunas data ('YYYY-MM-DD'), tipo e valor
+        start_date: Primeiro dia do período
+        end_date: Último dia do período
+        
+    Returns:
+        DataFrame: Indexado por dia, com as colunas receita, despesa e saldo
+    """
+    dias = pd.date_range(start=start_date, end=end_date, freq='D', normalize=True)
+    
+    fluxo = (
+        movimentacoes.pivot_table(index='data', columns='tipo', values='valor', aggfunc='sum')
+        .reindex(columns=['receita', 'despesa'])
+    )
+    fluxo.index = pd.to_datetime(fluxo.index)
+    fluxo = fluxo.reindex(dias).fillna(0.0)
+    fluxo['saldo'] = (fluxo['receita'] - fluxo['despesa']).cumsum()
+    
+    return fluxo
+
 @callback(
     Output('grafico-fluxo-caixa', 'figure'),
     [Input('btn-filtrar-financeiro', 'n_clicks'),
@@ -261,16 +273,7 @@ def update_grafico_fluxo_caixa(n_clicks, start_date, end_date):
     
     try:
         # Buscar movimentações do período
-        movimentacoes = db_manager.execute_query('''
-            SELECT 
-                DATE(data_vencimento) as data,
-                tipo,
-                SUM(valor) as valor
-            FROM financeiro 
-            WHERE DATE(data_vencimento) BETWEEN ? AND ?
-            GROUP BY DATE(data_vencimento), tipo
-            ORDER BY data
-        ''', (start_date, end_date))
+        movimentacoes = db_manager.get_financeiro_diario(start_date, end_date)
         
         if movimentacoes.empty:
             fig = go.Figure()
@@ -282,32 +285,8 @@ def update_grafico_fluxo_caixa(n_clicks, start_date, end_date):
             return fig
         
         # Preparar dados para o gráfico
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        receitas_diarias = []
-        despesas_diarias = []
-        saldo_acumulado = []
-        saldo_atual = 0
-        
-        for data in dates:
-            data_str = data.strftime('%Y-%m-%d')
-            
-            # Receitas do dia
-            receita_dia = movimentacoes[
-                (movimentacoes['data'] == data_str) & 
-                (movimentacoes['tipo'] == 'receita')
-            ]['valor'].sum()
-            
-            # Despesas do dia
-            despesa_dia = movimentacoes[
-                (movimentacoes['data'] == data_str) & 
-                (movimentacoes['tipo'] == 'despesa')
-            ]['valor'].sum()
-            
-            receitas_diarias.append(receita_dia)
-            despesas_diarias.append(-despesa_dia)  # Negativo para visualização
-            
-            saldo_atual += receita_dia - despesa_dia
-            saldo_acumulado.append(saldo_atual)
+        fluxo = calcular_fluxo_caixa(movimentacoes, start_date, end_date)
+        dates = fluxo.index
         
         # Criar gráfico
         fig = go.Figure()
@@ -315,7 +294,7 @@ def update_grafico_fluxo_caixa(n_clicks, start_date, end_date):
         # Receitas
         fig.add_trace(go.Bar(
             x=dates,
-            y=receitas_diarias,
+            y=fluxo['receita'],
             name='Receitas',
             marker_color='green',
             opacity=0.7
@@ -324,7 +303,7 @@ def update_grafico_fluxo_caixa(n_clicks, start_date, end_date):
         # Despesas
         fig.add_trace(go.Bar(
             x=dates,
-            y=despesas_diarias,
+            y=-fluxo['despesa'],  # Negativo para visualização
             name='Despesas',
             marker_color='red',
             opacity=0.7
@@ -333,7 +312,7 @@ def update_grafico_fluxo_caixa(n_clicks, start_date, end_date):
         # Saldo acumulado
         fig.add_trace(go.Scatter(
             x=dates,
-            y=saldo_acumulado,
+            y=fluxo['saldo'],
             mode='lines+markers',
             name='Saldo Acumulado',
             line=dict(color='blue', width=3),
@@ -376,14 +355,11 @@ def update_grafico_receitas_despesas(n_clicks, start_date, end_date):
     
     try:
         # Buscar totais por tipo
-        totais = db_manager.execute_query('''
-            SELECT 
-                tipo,
-                SUM(valor) as total
-            FROM financeiro 
-            WHERE DATE(data_vencimento) BETWEEN ? AND ?
-            GROUP BY tipo
-        ''', (start_date, end_date))
+        totais = (
+            db_manager.get_financeiro_diario(start_date, end_date)
+            .groupby('tipo', as_index=False)['valor'].sum()
+            .rename(columns={'valor': 'total'})
+        )
         
         if totais.empty:
             fig = go.Figure()
@@ -429,11 +405,12 @@ def update_tabela_receitas(n_clicks, start_date, end_date):
     """Atualiza tabela de receitas"""
     
     try:
-        receitas = db_manager.execute_query('''
+        periodo, params = filtro_periodo('data_vencimento', start_date, end_date)
+        receitas = db_manager.execute_query(f'''
             SELECT * FROM financeiro 
-            WHERE tipo = 'receita' AND DATE(data_vencimento) BETWEEN ? AND ?
+            WHERE tipo = 'receita' AND {periodo}
             ORDER BY data_vencimento DESC
-        ''', (start_date, end_date))
+        ''', params)
         
         if receitas.empty:
             return html.P("Nenhuma receita encontrada", className="text-muted text-center p-3")
@@ -499,11 +476,12 @@ def update_tabela_despesas(n_clicks, start_date, end_date):
     """Atualiza tabela de despesas"""
     
     try:
-        despesas = db_manager.execute_query('''
+        periodo, params = filtro_periodo('data_vencimento', start_date, end_date)
+        despesas = db_manager.execute_query(f'''
             SELECT * FROM financeiro 
-            WHERE tipo = 'despesa' AND DATE(data_vencimento) BETWEEN ? AND ?
+            WHERE tipo = 'despesa' AND {periodo}
             ORDER BY data_vencimento DESC
-        ''', (start_date, end_date))
+        ''', params)
         
         if despesas.empty:
             return html.P("Nenhuma despesa encontrada", className="text-muted text-center p-3")
@@ -127,6 +127,9 @@ def create_layout():
             ])
         ]),
         
+        # Resumo das consultas compartilhado pelos gráficos
+        dcc.Store(id='store-dashboard-snapshot'),
+        
         # Interval para atualização automática
         dcc.Interval(
             id='interval-dashboard',
@@ -147,22 +150,22 @@ def update_kpi_cards(n):
         
         stats = [
             {
-                'value': f"{kpis['consultas_mes']:,}",
+                'value': f"{kpis.consultas_mes:,}",
                 'label': 'Consultas este mês',
                 'icon': 'fa-calendar-check'
             },
             {
-                'value': f"{kpis['taxa_comparecimento']:.1f}%",
+                'value': f"{kpis.taxa_comparecimento:.1f}%",
                 'label': 'Taxa de comparecimento',
                 'icon': 'fa-user-check'
             },
             {
-                'value': f"R$ {kpis['receita_mes']:,.2f}",
+                'value': f"R$ {kpis.receita_mes:,.2f}",
                 'label': 'Receita do mês',
                 'icon': 'fa-dollar-sign'
             },
             {
-                'value': f"{kpis['pacientes_ativos']:,}",
+                'value': f"{kpis.pacientes_ativos:,}",
                 'label': 'Pacientes ativos',
                 'icon': 'fa-users'
             }
@@ -174,18 +177,32 @@ def update_kpi_cards(n):
         return dbc.Alert(f"Erro ao carregar KPIs: {str(e)}", color="danger")
 
 @callback(
-    Output('grafico-consultas-periodo', 'figure'),
+    Output('store-dashboard-snapshot', 'data'),
     Input('interval-dashboard', 'n_intervals')
 )
-def update_grafico_consultas_periodo(n):
-    """Atualiza gráfico de consultas por período"""
+def update_dashboard_snapshot(n):
+    """Carrega uma vez por atualização o resumo dos últimos 30 dias"""
     
     try:
-        # Últimos 30 dias
         data_fim = datetime.now().date()
         data_inicio = data_fim - timedelta(days=30)
         
-        consultas = db_manager.get_consultas_periodo(data_inicio, data_fim)
+        resumo = db_manager.get_resumo_consultas(data_inicio, data_fim)
+        return resumo.to_dict('records')
+        
+    except Exception as e:
+        print(f"Erro ao carregar resumo do dashboard: {str(e)}")
+        return []
+
+@callback(
+    Output('grafico-consultas-periodo', 'figure'),
+    Input('store-dashboard-snapshot', 'data')
+)
+def update_grafico_consultas_periodo(snapshot):
+    """Atualiza gráfico de consultas por período"""
+    
+    try:
+        consultas = pd.DataFrame(snapshot or [])
         
         if consultas.empty:
             fig = go.Figure()
@@ -197,8 +214,7 @@ def update_grafico_consultas_periodo(n):
             return fig
         
         # Agrupar por data
-        consultas['data'] = pd.to_datetime(consultas['data_consulta']).dt.date
-        consultas_por_dia = consultas.groupby('data').size().reset_index(name='total')
+        consultas_por_dia = consultas.groupby('data')['total'].sum().reset_index()
         
         fig = px.line(
             consultas_por_dia,
@@ -228,16 +244,13 @@ def update_grafico_consultas_periodo(n):
 
 @callback(
     Output('grafico-especialidades', 'figure'),
-    Input('interval-dashboard', 'n_intervals')
+    Input('store-dashboard-snapshot', 'data')
 )
-def update_grafico_especialidades(n):
+def update_grafico_especialidades(snapshot):
     """Atualiza gráfico de distribuição por especialidade"""
     
     try:
-        data_fim = datetime.now().date()
-        data_inicio = data_fim - timedelta(days=30)
-        
-        consultas = db_manager.get_consultas_periodo(data_inicio, data_fim)
+        consultas = pd.DataFrame(snapshot or [])
         
         if consultas.empty:
             fig = go.Figure()
@@ -248,7 +261,7 @@ def update_grafico_especialidades(n):
             )
             return fig
         
-        especialidades = consultas['especialidade'].value_counts()
+        especialidades = consultas.groupby('especialidade')['total'].sum().sort_values(ascending=False)
         
         fig = px.pie(
             values=especialidades.values,
@@ -271,16 +284,13 @@ def update_grafico_especialidades(n):
 
 @callback(
     Output('grafico-status-consultas', 'figure'),
-    Input('interval-dashboard', 'n_intervals')
+    Input('store-dashboard-snapshot', 'data')
 )
-def update_grafico_status(n):
+def update_grafico_status(snapshot):
     """Atualiza gráfico de status das consultas"""
     
     try:
-        data_fim = datetime.now().date()
-        data_inicio = data_fim - timedelta(days=30)
-        
-        consultas = db_manager.get_consultas_periodo(data_inicio, data_fim)
+        consultas = pd.DataFrame(snapshot or [])
         
         if consultas.empty:
             fig = go.Figure()
@@ -291,7 +301,7 @@ def update_grafico_status(n):
             )
             return fig
         
-        status_counts = consultas['status'].value_counts()
+        status_counts = consultas.groupby('status')['total'].sum().sort_values(ascending=False)
         
         colors = {
             'agendado': '#17a2b8',
@@ -334,28 +344,10 @@ def update_grafico_receita(n):
     """Atualiza gráfico de receita mensal"""
     
     try:
-        # Últimos 6 meses
-        hoje = datetime.now().date()
-        meses = []
-        receitas = []
-        
-        for i in range(6):
-            mes_atual = hoje.replace(day=1) - timedelta(days=30*i)
-            mes_seguinte = (mes_atual.replace(day=28) + timedelta(days=4)).replace(day=1)
-            
-            consultas_mes = db_manager.execute_query('''
-                SELECT COALESCE(SUM(valor), 0) as receita 
-                FROM consultas 
-                WHERE DATE(data_consulta) >= ? AND DATE(data_consulta) < ?
-                AND status = 'concluido'
-            ''', (mes_atual, mes_seguinte))
-            
-            meses.append(mes_atual.strftime('%m/%Y'))
-            receitas.append(consultas_mes.iloc[0]['receita'] or 0)
-        
-        # Inverter para ordem cronológica
-        meses.reverse()
-        receitas.reverse()
+        # Últimos 6 meses, do mais antigo para o atual
+        receita_mensal = db_manager.revenue_by_month(6)
+        meses = [mes.strftime('%m/%Y') for mes in receita_mensal['mes']]
+        receitas = receita_mensal['receita'].tolist()
         
         fig = px.bar(
             x=meses,
@@ -381,6 +373,9 @@ def update_grafico_receita(n):
         )
         return fig
 
+# Linhas da tabela de próximas consultas
+PROXIMAS_CONSULTAS_LIMITE = 20
+
 @callback(
     Output('proximas-consultas', 'children'),
     Input('interval-dashboard', 'n_intervals')
@@ -392,7 +387,11 @@ def update_proximas_consultas(n):
         hoje = datetime.now().date()
         amanha = hoje + timedelta(days=7)  # Próximos 7 dias
         
-        consultas = db_manager.get_consultas_periodo(hoje, amanha)
+        consultas = db_manager.get_consultas((hoje, amanha), limit=PROXIMAS_CONSULTAS_LIMITE)
+        # A contagem só é necessária quando a tabela chega ao limite
+        restantes = 0
+        if len(consultas) == PROXIMAS_CONSULTAS_LIMITE:
+            restantes = db_manager.contar_consultas((hoje, amanha)) - len(consultas)
         
         if consultas.empty:
             return html.P("Nenhuma consulta agendada para os próximos dias.", 
@@ -434,11 +433,44 @@ def update_proximas_consultas(n):
             html.Tbody(table_rows)
         ], striped=True, hover=True, responsive=True, size="sm")
         
+        if restantes > 0:
+            return html.Div([
+                table,
+                html.Div(
+                    dcc.Link(f"+{restantes} consulta(s) nos próximos dias", href="/agendamento"),
+                    className="text-end small"
+                )
+            ])
+        
         return table
         
     except Exception as e:
         return dbc.Alert(f"Erro ao carregar consultas: {str(e)}", color="danger")
 
+# Janela usada nos gráficos de distribuição por dia da semana e hora
+JANELA_AGENDAMENTOS_DIAS = 90
+
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+def _agendamentos_dia_hora():
+    """Matriz dia da semana x hora das consultas da janela (segunda primeiro)"""
+    
+    data_fim = datetime.now().date()
+    data_inicio = data_fim - timedelta(days=JANELA_AGENDAMENTOS_DIAS)
+    agregados = db_manager.get_agendamentos_dia_hora(data_inicio, data_fim)
+    
+    # Expediente padrão sempre visível, mais qualquer horário com consultas
+    horas = sorted(set(range(8, 18)) | set(agregados['hora']))
+    
+    matriz = agregados.pivot_table(
+        index='dia_semana', columns='hora', values='total', aggfunc='sum', fill_value=0
+    )
+    # strftime('%w') começa no domingo (0)
+    matriz = matriz.reindex(index=[1, 2, 3, 4, 5, 6, 0], columns=horas, fill_value=0)
+    matriz.index = DIAS_SEMANA
+    matriz.columns = [f"{h:02d}:00" for h in horas]
+    return matriz
+
 @callback(
     Output('heatmap-agendamentos', 'figure'),
     Input('interval-dashboard', 'n_intervals')
@@ -447,39 +479,19 @@ def update_heatmap_agendamentos(n):
     """Atualiza heatmap de agendamentos por dia da semana e hora"""
 
     try:
-        import pandas as pd
-        import numpy as np
-
-        # Simular dados de agendamentos por dia da semana e hora
-        dias_semana = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado']
-        horas = [f"{h:02d}:00" for h in range(8, 18)]  # 8h às 17h
-
-        # Criar matriz de dados simulados
-        np.random.seed(42)  # Para resultados consistentes
-        data = np.random.poisson(3, (len(dias_semana), len(horas)))
-
-        # Adicionar padrões realistas
-        for i, dia in enumerate(dias_semana):
-            for j, hora in enumerate(horas):
-                h = j + 8
-                # Mais agendamentos no meio da manhã e tarde
-                if 9 <= h <= 11 or 14 <= h <= 16:
-                    data[i][j] += np.random.poisson(2)
-                # Menos agendamentos no sábado
-                if i == 5:
-                    data[i][j] = max(0, data[i][j] - 2)
+        matriz = _agendamentos_dia_hora()
 
         fig = go.Figure(data=go.Heatmap(
-            z=data,
-            x=horas,
-            y=dias_semana,
+            z=matriz.values,
+            x=list(matriz.columns),
+            y=list(matriz.index),
             colorscale='Blues',
             hoverongaps=False,
             hovertemplate='<b>%{y}</b><br>%{x}<br>Agendamentos: %{z}<extra></extra>'
         ))
 
         fig.update_layout(
-            title="Densidade de Agendamentos por Dia e Hora",
+            title=f"Densidade de Agendamentos por Dia e Hora (Últimos {JANELA_AGENDAMENTOS_DIAS} dias)",
             xaxis_title="Horário",
             yaxis_title="Dia da Semana",
             height=300,
@@ -505,36 +517,16 @@ def update_grafico_horarios_pico(n):
     """Atualiza gráfico de horários de pico"""
 
     try:
-        import pandas as pd
-        import numpy as np
-
-        # Simular dados de horários de pico
-        horas = [f"{h:02d}:00" for h in range(8, 18)]
-        np.random.seed(42)
-
-        # Criar padrão realista de agendamentos por hora
-        agendamentos = []
-        for i, hora in enumerate(horas):
-            h = i + 8
-            base = 5
-            if 9 <= h <= 11:  # Pico manhã
-                base += np.random.poisson(8)
-            elif 14 <= h <= 16:  # Pico tarde
-                base += np.random.poisson(6)
-            elif h == 8 or h >= 17:  # Início e fim do dia
-                base += np.random.poisson(2)
-            else:
-                base += np.random.poisson(4)
-
-            agendamentos.append(base)
+        # Mesma agregação do heatmap (servida pelo cache)
+        agendamentos = _agendamentos_dia_hora().sum(axis=0)
 
         # Identificar horários de pico (acima da média)
-        media = np.mean(agendamentos)
+        media = agendamentos.mean()
         cores = ['#ef4444' if x > media else '#3b82f6' for x in agendamentos]
 
         fig = go.Figure(data=go.Bar(
-            x=horas,
-            y=agendamentos,
+            x=list(agendamentos.index),
+            y=agendamentos.values,
             marker_color=cores,
             hovertemplate='<b>%{x}</b><br>Agendamentos: %{y}<extra></extra>'
         ))
@@ -569,64 +561,50 @@ def update_grafico_horarios_pico(n):
 
 @callback(
     Output('timeline-atendimentos', 'figure'),
-    Input('interval-dashboard', 'n_intervals')
+    Input('store-dashboard-snapshot', 'data')
 )
-def update_timeline_atendimentos(n):
+def update_timeline_atendimentos(snapshot):
     """Atualiza timeline de atendimentos dos últimos 30 dias"""
 
     try:
-        import pandas as pd
-        import numpy as np
-        from datetime import datetime, timedelta
-
-        # Gerar dados dos últimos 30 dias
         hoje = datetime.now().date()
-        datas = [hoje - timedelta(days=i) for i in range(29, -1, -1)]
-
-        np.random.seed(42)
+        datas = [(hoje - timedelta(days=i)).isoformat() for i in range(29, -1, -1)]
 
-        # Simular diferentes tipos de atendimento
-        consultas = []
-        emergencias = []
-        retornos = []
+        consultas = pd.DataFrame(snapshot or [], columns=['data', 'especialidade', 'status', 'total'])
 
-        for data in datas:
-            # Menos atendimentos nos fins de semana
-            multiplicador = 0.3 if data.weekday() >= 5 else 1.0
+        # Atendimentos por dia e status, com zero nos dias sem consultas
+        por_status = consultas.pivot_table(
+            index='data', columns='status', values='total', aggfunc='sum', fill_value=0
+        ).reindex(datas, fill_value=0)
 
-            consultas.append(max(0, int(np.random.poisson(8) * multiplicador)))
-            emergencias.append(max(0, int(np.random.poisson(2) * multiplicador)))
-            retornos.append(max(0, int(np.random.poisson(4) * multiplicador)))
+        cores = {
+            'agendado': '#17a2b8',
+            'confirmado': '#10b981',
+            'concluido': '#3b82f6',
+            'cancelado': '#ef4444'
+        }
 
         fig = go.Figure()
 
-        # Adicionar linhas para cada tipo
-        fig.add_trace(go.Scatter(
-            x=datas,
-            y=consultas,
-            mode='lines+markers',
-            name='Consultas',
-            line=dict(color='#3b82f6', width=3),
-            marker=dict(size=6)
-        ))
-
+        # Total do dia e uma linha para cada status
         fig.add_trace(go.Scatter(
             x=datas,
-            y=emergencias,
+            y=por_status.sum(axis=1).values if not por_status.empty else [0] * len(datas),
             mode='lines+markers',
-            name='Emergências',
-            line=dict(color='#ef4444', width=3),
+            name='Total',
+            line=dict(color='#6b7280', width=3, dash='dot'),
             marker=dict(size=6)
         ))
 
-        fig.add_trace(go.Scatter(
-            x=datas,
-            y=retornos,
-            mode='lines+markers',
-            name='Retornos',
-            line=dict(color='#10b981', width=3),
-            marker=dict(size=6)
-        ))
+        for status in por_status.columns:
+            fig.add_trace(go.Scatter(
+                x=datas,
+                y=por_status[status].values,
+                mode='lines+markers',
+                name=str(status).title(),
+                line=dict(color=cores.get(status, '#8b5cf6'), width=3),
+                marker=dict(size=6)
+            ))
 
         fig.update_layout(
             title="Evolução dos Atendimentos (Últimos 30 dias)",
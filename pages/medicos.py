@@ -10,8 +10,12 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 from datetime import datetime, date
 import json
+import sqlite3
 
+from components.callbacks import despachar
+from components.busca import campo_busca, registrar_busca, resposta_busca, stores_busca, termo_busca
 from utils.db_manager import db_manager
+from utils.repositories import medicos_repo
 from utils.relational_checks import integrity_checker, validate_doctor, can_delete_doctor
 
 def create_layout():
@@ -37,11 +41,7 @@ def create_layout():
                         dbc.Row([
                             dbc.Col([
                                 dbc.Label("🔍 Buscar Médico:"),
-                                dbc.Input(
-                                    id="search-medico",
-                                    placeholder="Nome, CRM ou especialidade...",
-                                    debounce=True
-                                )
+                                campo_busca("search-medico", "Nome, CRM ou especialidade...")
                             ], md=6),
                             
                             dbc.Col([
@@ -280,6 +280,7 @@ def create_layout():
         dcc.Store(id='medico-edit-id', data=None),
         dcc.Store(id='medico-delete-id', data=None),
         dcc.Store(id='medicos-data', data=[]),
+        *stores_busca('medicos-busca', 'medicos-resposta'),
         
         # Toast para notificações
         html.Div(id="toast-container-medicos")
@@ -313,16 +314,20 @@ def load_especialidades_filter(trigger):
     except Exception:
         return [{'label': 'Todas', 'value': 'todas'}]
 
+# Busca com debounce: respostas de buscas já substituídas são descartadas
+registrar_busca('search-medico', 'medicos-busca', 'medicos-resposta', [('medicos-data', 'data')])
+
 # Callback para carregar dados dos médicos
 @callback(
-    Output('medicos-data', 'data'),
+    Output('medicos-resposta', 'data'),
     [Input('btn-refresh-medicos', 'n_clicks'),
-     Input('search-medico', 'value'),
+     Input('medicos-busca', 'data'),
      Input('filter-especialidade-medico', 'value')],
     prevent_initial_call=False
 )
-def load_medicos_data(refresh_clicks, search_term, especialidade_filter):
+def load_medicos_data(refresh_clicks, busca, especialidade_filter):
     """Carrega dados dos médicos com filtros"""
+    search_term = termo_busca((busca or {}).get('termo'))
     try:
         # Query base
         query = '''
@@ -351,33 +356,16 @@ def load_medicos_data(refresh_clicks, search_term, especialidade_filter):
         df = db_manager.execute_query(query, params)
         
         if df.empty:
-            return []
+            return resposta_busca(busca, [[]])
         
         # Formatar dados para exibição
-        medicos = []
-        for _, row in df.iterrows():
-            medico = {
-                'id': row['id'],
-                'nome': row['nome'],
-                'crm': row['crm'],
-                'especialidade': row['especialidade'],
-                'telefone': row['telefone'],
-                'email': row['email'] or '',
-                'valor_consulta': row['valor_consulta'] or 0,
-                'duracao_consulta': row['duracao_consulta'] or 30,
-                'horario_atendimento': row['horario_atendimento'] or '',
-                'convenios_aceitos': row['convenios_aceitos'] or '',
-                'observacoes': row['observacoes'] or '',
-                'ativo': row['ativo'],
-                'data_cadastro': row['data_cadastro']
-            }
-            medicos.append(medico)
+        medicos = [_formatar_medico(row) for _, row in df.iterrows()]
         
-        return medicos
+        return resposta_busca(busca, [medicos])
         
     except Exception as e:
         print(f"Erro ao carregar médicos: {e}")
-        return []
+        return resposta_busca(busca, [[]])
 
 # Callback para renderizar tabela
 @callback(
@@ -452,6 +440,29 @@ def render_medicos_table(medicos_data):
 
     return table
 
+def _formatar_medico(row):
+    """Converte um registro de médico no formato exibido na tabela"""
+    return {
+        'id': row['id'],
+        'nome': row['nome'],
+        'crm': row['crm'],
+        'especialidade': row['especialidade'],
+        'telefone': row['telefone'],
+        'email': row['email'] or '',
+        'valor_consulta': row['valor_consulta'] or 0,
+        'duracao_consulta': row['duracao_consulta'] or 30,
+        'horario_atendimento': row['horario_atendimento'] or '',
+        'convenios_aceitos': row['convenios_aceitos'] or '',
+        'observacoes': row['observacoes'] or '',
+        'ativo': row['ativo'],
+        'data_cadastro': row['data_cadastro']
+    }
+
+def _carregar_medico(medico_id):
+    """Lê um médico do banco no mesmo formato das linhas da tabela"""
+    medico = medicos_repo.por_id(medico_id)
+    return None if medico is None else _formatar_medico(medico._asdict())
+
 # Callback para abrir modal de novo médico
 @callback(
     [Output('modal-medico', 'is_open'),
@@ -464,17 +475,10 @@ def render_medicos_table(medicos_data):
 )
 def toggle_modal_novo_medico(novo_clicks, cancelar_clicks, is_open):
     """Controla abertura/fechamento do modal para novo médico"""
-    ctx = dash.callback_context
-
-    if ctx.triggered:
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-
-        if button_id == 'btn-novo-medico':
-            return True, "➕ Novo Médico", None
-        elif button_id == 'btn-cancelar-medico':
-            return False, "", None
-
-    return is_open, "", None
+    return despachar({
+        'btn-novo-medico': lambda _: (True, "➕ Novo Médico", None),
+        'btn-cancelar-medico': lambda _: (False, "", None)
+    }, padrao=(is_open, "", None))
 
 # Callback para editar médico
 @callback(
@@ -494,22 +498,15 @@ def toggle_modal_novo_medico(novo_clicks, cancelar_clicks, is_open):
      Output('input-status-medico', 'value'),
      Output('input-observacoes-medico', 'value')],
     Input({'type': 'btn-edit-medico', 'index': ALL}, 'n_clicks'),
-    [State('medicos-data', 'data')],
     prevent_initial_call=True
 )
-def edit_medico(edit_clicks, medicos_data):
+def edit_medico(edit_clicks):
     """Abre modal para edição de médico"""
-    ctx = dash.callback_context
+    return despachar({'btn-edit-medico': _abrir_edicao_medico})
 
-    if not ctx.triggered or not any(edit_clicks):
-        return dash.no_update
-
-    # Identificar qual botão foi clicado
-    button_id = ctx.triggered[0]['prop_id']
-    medico_id = eval(button_id.split('.')[0])['index']
-
-    # Encontrar dados do médico
-    medico = next((m for m in medicos_data if m['id'] == medico_id), None)
+def _abrir_edicao_medico(medico_id):
+    """Preenche o modal de edição com o médico lido do banco"""
+    medico = _carregar_medico(medico_id)
 
     if not medico:
         return dash.no_update
@@ -621,31 +618,24 @@ def salvar_medico(salvar_clicks, edit_id, nome, crm, especialidade, especialidad
     try:
         if edit_id:
             # Atualizar médico existente
-            db_manager.execute_insert('''
-                UPDATE medicos SET
-                    nome = ?, crm = ?, especialidade = ?, telefone = ?,
-                    email = ?, valor_consulta = ?, duracao_consulta = ?,
-                    horario_atendimento = ?, convenios_aceitos = ?,
-                    observacoes = ?, ativo = ?
-                WHERE id = ?
-            ''', (nome, crm.upper(), especialidade_final, telefone, email,
-                  valor_consulta, duracao_consulta, horario_atendimento,
-                  convenios_aceitos, observacoes, status, edit_id))
+            medicos_repo.atualizar(
+                edit_id, nome=nome, crm=crm.upper(), especialidade=especialidade_final,
+                telefone=telefone, email=email, valor_consulta=valor_consulta,
+                duracao_consulta=duracao_consulta, horario_atendimento=horario_atendimento,
+                convenios_aceitos=convenios_aceitos, observacoes=observacoes, ativo=status
+            )
 
             success_msg = f"Médico {nome} atualizado com sucesso!"
             action_type = "atualizado"
         else:
             # Criar novo médico
-            db_manager.execute_insert('''
-                INSERT INTO medicos
-                (nome, crm, especialidade, telefone, email, valor_consulta,
-                 duracao_consulta, horario_atendimento, convenios_aceitos,
-                 observacoes, ativo, data_cadastro)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (nome, crm.upper(), especialidade_final, telefone, email,
-                  valor_consulta, duracao_consulta, horario_atendimento,
-                  convenios_aceitos, observacoes, status,
-                  datetime.now().isoformat()))
+            medicos_repo.inserir(
+                nome=nome, crm=crm.upper(), especialidade=especialidade_final,
+                telefone=telefone, email=email, valor_consulta=valor_consulta,
+                duracao_consulta=duracao_consulta, horario_atendimento=horario_atendimento,
+                convenios_aceitos=convenios_aceitos, observacoes=observacoes, ativo=status,
+                data_cadastro=datetime.now().isoformat()
+            )
 
             success_msg = f"Médico {nome} cadastrado com sucesso!"
             action_type = "cadastrado"
@@ -670,6 +660,15 @@ def salvar_medico(salvar_clicks, edit_id, nome, crm, especialidade, especialidad
         # Fechar modal e atualizar lista
         return "", False, 1, toast
 
+    except sqlite3.IntegrityError as e:
+        # CRM repetido é recusado pela restrição única na própria gravação
+        message = integrity_checker.integrity_error_message(e) or str(e)
+        alert = dbc.Alert([
+            html.H6("❌ Erros de Validação:", className="mb-2"),
+            html.Ul([html.Li(message)])
+        ], color="danger")
+        return alert, dash.no_update, dash.no_update, dash.no_update
+
     except Exception as e:
         alert = dbc.Alert(f"❌ Erro ao salvar médico: {str(e)}", color="danger")
         return alert, dash.no_update, dash.no_update, dash.no_update
@@ -681,53 +680,44 @@ def salvar_medico(salvar_clicks, edit_id, nome, crm, especialidade, especialidad
      Output('medico-delete-id', 'data')],
     [Input({'type': 'btn-delete-medico', 'index': ALL}, 'n_clicks'),
      Input('btn-cancel-delete-medico', 'n_clicks')],
-    [State('medicos-data', 'data'),
-     State('modal-confirm-delete-medico', 'is_open')],
+    State('modal-confirm-delete-medico', 'is_open'),
     prevent_initial_call=True
 )
-def confirm_delete_medico(delete_clicks, cancel_clicks, medicos_data, is_open):
+def confirm_delete_medico(delete_clicks, cancel_clicks, is_open):
     """Abre modal de confirmação de exclusão"""
-    ctx = dash.callback_context
-
-    if not ctx.triggered:
-        return dash.no_update
+    return despachar({
+        'btn-cancel-delete-medico': lambda _: (False, "", None),
+        'btn-delete-medico': _confirmar_exclusao_medico
+    })
 
-    button_id = ctx.triggered[0]['prop_id']
+def _confirmar_exclusao_medico(medico_id):
+    """Monta a mensagem de confirmação (ou o impedimento) da exclusão"""
+    medico = _carregar_medico(medico_id)
 
-    if 'btn-cancel-delete-medico' in button_id:
-        return False, "", None
-
-    if 'btn-delete-medico' in button_id and any(delete_clicks):
-        # Identificar médico
-        medico_id = eval(button_id.split('.')[0])['index']
-        medico = next((m for m in medicos_data if m['id'] == medico_id), None)
-
-        if not medico:
-            return dash.no_update
-
-        # Verificar dependências
-        check_result = can_delete_doctor(medico_id)
+    if not medico:
+        return dash.no_update
 
-        if check_result['can_delete']:
-            message = html.Div([
-                html.P(f"Tem certeza que deseja excluir o médico:"),
-                html.H5(f"👨‍⚕️ {medico['nome']}", className="text-primary"),
-                html.P(f"🏥 {medico['crm']} - {medico['especialidade']}"),
-                html.Hr(),
-                html.P("⚠️ Esta ação não pode ser desfeita!", className="text-warning")
-            ])
-        else:
-            message = html.Div([
-                html.P(f"❌ Não é possível excluir o médico:"),
-                html.H5(f"👨‍⚕️ {medico['nome']}", className="text-danger"),
-                html.P(f"🏥 {medico['crm']} - {medico['especialidade']}"),
-                html.Hr(),
-                html.P(check_result['message'], className="text-warning")
-            ])
+    # Verificar dependências
+    check_result = can_delete_doctor(medico_id)
 
-        return True, message, medico_id if check_result['can_delete'] else None
+    if check_result['can_delete']:
+        message = html.Div([
+            html.P(f"Tem certeza que deseja excluir o médico:"),
+            html.H5(f"👨‍⚕️ {medico['nome']}", className="text-primary"),
+            html.P(f"🏥 {medico['crm']} - {medico['especialidade']}"),
+            html.Hr(),
+            html.P("⚠️ Esta ação não pode ser desfeita!", className="text-warning")
+        ])
+    else:
+        message = html.Div([
+            html.P(f"❌ Não é possível excluir o médico:"),
+            html.H5(f"👨‍⚕️ {medico['nome']}", className="text-danger"),
+            html.P(f"🏥 {medico['crm']} - {medico['especialidade']}"),
+            html.Hr(),
+            html.P(check_result['message'], className="text-warning")
+        ])
 
-    return dash.no_update
+    return True, message, medico_id if check_result['can_delete'] else None
 
 # Callback para executar exclusão
 @callback(
@@ -735,22 +725,21 @@ def confirm_delete_medico(delete_clicks, cancel_clicks, medicos_data, is_open):
      Output('btn-refresh-medicos', 'n_clicks', allow_duplicate=True),
      Output('toast-container-medicos', 'children')],
     Input('btn-confirm-delete-medico', 'n_clicks'),
-    [State('medico-delete-id', 'data'),
-     State('medicos-data', 'data')],
+    State('medico-delete-id', 'data'),
     prevent_initial_call=True
 )
-def execute_delete_medico(confirm_clicks, delete_id, medicos_data):
+def execute_delete_medico(confirm_clicks, delete_id):
     """Executa exclusão do médico"""
     if not confirm_clicks or not delete_id:
         return dash.no_update
 
     try:
         # Encontrar nome do médico
-        medico = next((m for m in medicos_data if m['id'] == delete_id), None)
-        nome_medico = medico['nome'] if medico else 'Médico'
+        medico = medicos_repo.por_id(delete_id)
+        nome_medico = medico.nome if medico else 'Médico'
 
         # Executar exclusão
-        db_manager.execute_insert('DELETE FROM medicos WHERE id = ?', (delete_id,))
+        medicos_repo.excluir(delete_id)
 
         # Toast de sucesso
         toast = dbc.Toast(
@@ -10,8 +10,12 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 from datetime import datetime, date
 import json
+import sqlite3
 
+from components.callbacks import despachar
+from components.busca import campo_busca, registrar_busca, resposta_busca, stores_busca, termo_busca
 from utils.db_manager import db_manager
+from utils.repositories import pacientes_repo
 from utils.relational_checks import integrity_checker, validate_patient, can_delete_patient
 
 def create_layout():
@@ -39,11 +43,7 @@ def create_layout():
                         dbc.Row([
                             dbc.Col([
                                 dbc.Label("🔍 Buscar Paciente:"),
-                                dbc.Input(
-                                    id="search-paciente",
-                                    placeholder="Nome, CPF ou telefone...",
-                                    debounce=True
-                                )
+                                campo_busca("search-paciente", "Nome, CPF ou telefone...")
                             ], md=6),
                             
                             dbc.Col([
@@ -80,10 +80,55 @@ def create_layout():
             dbc.Col([
                 dbc.Card([
                     dbc.CardHeader([
-                        html.H5("📋 Lista de Pacientes", className="mb-0")
+                        dbc.Row([
+                            dbc.Col([
+                                html.H5("📋 Lista de Pacientes", className="mb-0")
+                            ], width=True),
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id="ordem-pacientes",
+                                    options=[
+                                        {'label': 'Nome (A-Z)', 'value': 'nome'},
+                                        {'label': 'Nome (Z-A)', 'value': 'nome_desc'},
+                                        {'label': 'Mais recentes', 'value': 'recentes'},
+                                        {'label': 'Mais antigos', 'value': 'antigos'}
+                                    ],
+                                    value='nome',
+                                    clearable=False,
+                                    style={'min-width': '170px'}
+                                )
+                            ], width="auto"),
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id="tamanho-pagina-pacientes",
+                                    options=[
+                                        {'label': f'{n} por página', 'value': n}
+                                        for n in (25, 50, 100)
+                                    ],
+                                    value=50,
+                                    clearable=False,
+                                    style={'min-width': '150px'}
+                                )
+                            ], width="auto")
+                        ], align="center")
                     ]),
                     dbc.CardBody([
-                        html.Div(id="tabela-pacientes")
+                        html.Div(id="tabela-pacientes"),
+                        
+                        # Paginação
+                        dbc.Row([
+                            dbc.Col([
+                                html.Small(id="info-paginacao-pacientes", className="text-muted")
+                            ], width=True),
+                            dbc.Col([
+                                dbc.ButtonGroup([
+                                    dbc.Button("◀ Anterior", id="btn-pagina-anterior-pacientes",
+                                               color="primary", outline=True, size="sm", disabled=True),
+                                    dbc.Button("Próxima ▶", id="btn-pagina-proxima-pacientes",
+                                               color="primary", outline=True, size="sm", disabled=True)
+                                ])
+                            ], width="auto")
+                        ], align="center", className="mt-2")
                     ])
                 ])
             ])
@@ -261,91 +306,114 @@ def create_layout():
         dcc.Store(id='paciente-edit-id', data=None),
         dcc.Store(id='paciente-delete-id', data=None),
         dcc.Store(id='pacientes-data', data=[]),
+        dcc.Store(id='pacientes-paginacao', data={'cursores': [None], 'proxima': None}),
+        *stores_busca('pacientes-busca', 'pacientes-resposta'),
         
         # Toast para notificações
         html.Div(id="toast-container-pacientes")
         
     ], fluid=True)
 
+# Busca com debounce: respostas de buscas já substituídas são descartadas
+registrar_busca('search-paciente', 'pacientes-busca', 'pacientes-resposta', [
+    ('pacientes-data', 'data'),
+    ('pacientes-paginacao', 'data'),
+    ('info-paginacao-pacientes', 'children'),
+    ('btn-pagina-anterior-pacientes', 'disabled'),
+    ('btn-pagina-proxima-pacientes', 'disabled'),
+])
+
 # Callback para carregar dados dos pacientes
 @callback(
-    Output('pacientes-data', 'data'),
+    Output('pacientes-resposta', 'data'),
     [Input('btn-refresh-pacientes', 'n_clicks'),
-     Input('search-paciente', 'value'),
-     Input('filter-status-paciente', 'value')],
+     Input('pacientes-busca', 'data'),
+     Input('filter-status-paciente', 'value'),
+     Input('ordem-pacientes', 'value'),
+     Input('tamanho-pagina-pacientes', 'value'),
+     Input('btn-pagina-anterior-pacientes', 'n_clicks'),
+     Input('btn-pagina-proxima-pacientes', 'n_clicks')],
+    State('pacientes-paginacao', 'data'),
     prevent_initial_call=False
 )
-def load_pacientes_data(refresh_clicks, search_term, status_filter):
-    """Carrega dados dos pacientes com filtros"""
+def load_pacientes_data(refresh_clicks, busca, status_filter, ordem, tamanho_pagina,
+                        anterior_clicks, proxima_clicks, paginacao):
+    """Carrega uma página de pacientes com filtros e ordenação no banco"""
+    search_term = termo_busca((busca or {}).get('termo'))
     try:
-        # Query base
-        query = '''
-            SELECT 
-                id, nome, cpf, data_nascimento, genero, telefone, 
-                email, endereco, estado_civil, observacoes, ativo,
-                data_cadastro
-            FROM pacientes
-            WHERE 1=1
-        '''
-        params = []
+        trigger = dash.callback_context.triggered_id
         
-        # Filtro por status
-        if status_filter != 'todos':
-            query += ' AND ativo = ?'
-            params.append(1 if status_filter == 'ativo' else 0)
+        # cursores[i] é a chave a partir da qual a página i começa
+        paginacao = paginacao or {'cursores': [None], 'proxima': None}
+        cursores = paginacao['cursores']
         
-        # Filtro por busca
-        if search_term:
-            query += ' AND (nome LIKE ? OR cpf LIKE ? OR telefone LIKE ?)'
-            search_param = f'%{search_term}%'
-            params.extend([search_param, search_param, search_param])
+        if trigger == 'btn-pagina-proxima-pacientes' and paginacao.get('proxima'):
+            cursores = cursores + [paginacao['proxima']]
+        elif trigger == 'btn-pagina-anterior-pacientes' and len(cursores) > 1:
+            cursores = cursores[:-1]
+        elif trigger != 'btn-refresh-pacientes':
+            # Novo filtro, ordenação ou tamanho de página: volta ao início
+            cursores = [None]
         
-        query += ' ORDER BY nome'
+        ativo = None if status_filter in (None, 'todos') else status_filter == 'ativo'
+        tamanho_pagina = tamanho_pagina or 50
         
-        df = db_manager.execute_query(query, params)
+        pagina = db_manager.get_pacientes_pagina(
+            busca=search_term,
+            ativo=ativo,
+            ordem=ordem or 'nome',
+            apos=cursores[-1],
+            limite=tamanho_pagina
+        )
         
-        if df.empty:
-            return []
+        # Recarga após exclusão pode esvaziar a última página
+        if pagina.registros.empty and len(cursores) > 1:
+            cursores = cursores[:-1]
+            pagina = db_manager.get_pacientes_pagina(
+                busca=search_term, ativo=ativo, ordem=ordem or 'nome',
+                apos=cursores[-1], limite=tamanho_pagina
+            )
         
-        # Formatar dados para exibição
-        pacientes = []
-        for _, row in df.iterrows():
-            paciente = {
-                'id': row['id'],
-                'nome': row['nome'],
-                'cpf': integrity_checker.format_cpf(row['cpf']),
-                'cpf_raw': row['cpf'],
-                'data_nascimento': row['data_nascimento'],
-                'genero': row['genero'],
-                'telefone': row['telefone'],
-                'email': row['email'] or '',
-                'endereco': row['endereco'] or '',
-                'estado_civil': row['estado_civil'] or '',
-                'observacoes': row['observacoes'] or '',
-                'ativo': row['ativo'],
-                'data_cadastro': row['data_cadastro']
-            }
-            pacientes.append(paciente)
+        df = pagina.registros.copy()
+        df['cpf_raw'] = df['cpf']
+        df['cpf'] = df['cpf'].map(integrity_checker.format_cpf)
+        for coluna in ['email', 'endereco', 'estado_civil', 'observacoes']:
+            df[coluna] = df[coluna].fillna('')
+        pacientes = df.to_dict('records')
         
-        return pacientes
+        inicio = (len(cursores) - 1) * tamanho_pagina
+        if pagina.total:
+            total = f"{pagina.total:,}" if pagina.total_exato else f"mais de {pagina.total - 1:,}"
+            info = f"Mostrando {inicio + 1:,}–{inicio + len(pacientes):,} de {total} pacientes"
+        else:
+            info = ""
+        
+        paginacao = {'cursores': cursores, 'proxima': pagina.proxima_chave, 'inicio': inicio}
+        return resposta_busca(busca, [
+            pacientes, paginacao, info, len(cursores) == 1, pagina.proxima_chave is None
+        ])
         
     except Exception as e:
         print(f"Erro ao carregar pacientes: {e}")
-        return []
+        return resposta_busca(busca, [[], {'cursores': [None], 'proxima': None}, "", True, True])
 
 # Callback para renderizar tabela
 @callback(
     Output('tabela-pacientes', 'children'),
-    Input('pacientes-data', 'data')
+    Input('pacientes-data', 'data'),
+    State('pacientes-paginacao', 'data')
 )
-def render_pacientes_table(pacientes_data):
-    """Renderiza tabela de pacientes"""
+def render_pacientes_table(pacientes_data, paginacao):
+    """Renderiza a página atual da tabela de pacientes"""
     if not pacientes_data:
         return dbc.Alert("Nenhum paciente encontrado.", color="info", className="text-center")
     
+    # Numeração continua entre as páginas
+    inicio = (paginacao or {}).get('inicio', 0)
+    
     # Criar linhas da tabela
     table_rows = []
-    for index, paciente in enumerate(pacientes_data, 1):  # Começar numeração em 1
+    for index, paciente in enumerate(pacientes_data, inicio + 1):
         # Status badge
         status_badge = html.Span(
             "✅ Ativo" if paciente['ativo'] else "❌ Inativo",
@@ -419,17 +487,23 @@ def render_pacientes_table(pacientes_data):
 )
 def toggle_modal_novo_paciente(novo_clicks, cancelar_clicks, is_open):
     """Controla abertura/fechamento do modal para novo paciente"""
-    ctx = dash.callback_context
-
-    if ctx.triggered:
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-
-        if button_id == 'btn-novo-paciente':
-            return True, "➕ Novo Paciente", None
-        elif button_id == 'btn-cancelar-paciente':
-            return False, "", None
-
-    return is_open, "", None
+    return despachar({
+        'btn-novo-paciente': lambda _: (True, "➕ Novo Paciente", None),
+        'btn-cancelar-paciente': lambda _: (False, "", None)
+    }, padrao=(is_open, "", None))
+
+def _carregar_paciente(paciente_id):
+    """Lê um paciente do banco no mesmo formato das linhas da tabela"""
+    paciente = pacientes_repo.por_id(paciente_id)
+    if paciente is None:
+        return None
+
+    paciente = paciente._asdict()
+    paciente['cpf_raw'] = paciente['cpf']
+    paciente['cpf'] = integrity_checker.format_cpf(paciente['cpf'])
+    for coluna in ['email', 'endereco', 'estado_civil', 'observacoes']:
+        paciente[coluna] = paciente[coluna] or ''
+    return paciente
 
 # Callback para editar paciente
 @callback(
@@ -447,22 +521,15 @@ def toggle_modal_novo_paciente(novo_clicks, cancelar_clicks, is_open):
      Output('input-status-paciente', 'value'),
      Output('input-observacoes-paciente', 'value')],
     Input({'type': 'btn-edit-paciente', 'index': ALL}, 'n_clicks'),
-    [State('pacientes-data', 'data')],
     prevent_initial_call=True
 )
-def edit_paciente(edit_clicks, pacientes_data):
+def edit_paciente(edit_clicks):
     """Abre modal para edição de paciente"""
-    ctx = dash.callback_context
-
-    if not ctx.triggered or not any(edit_clicks):
-        return dash.no_update
+    return despachar({'btn-edit-paciente': _abrir_edicao_paciente})
 
-    # Identificar qual botão foi clicado
-    button_id = ctx.triggered[0]['prop_id']
-    paciente_id = eval(button_id.split('.')[0])['index']
-
-    # Encontrar dados do paciente
-    paciente = next((p for p in pacientes_data if p['id'] == paciente_id), None)
+def _abrir_edicao_paciente(paciente_id):
+    """Preenche o modal de edição com o paciente lido do banco"""
+    paciente = _carregar_paciente(paciente_id)
 
     if not paciente:
         return dash.no_update
@@ -578,15 +645,7 @@ def salvar_paciente(salvar_clicks, edit_id, nome, cpf, nascimento, genero,
         if edit_id:
             # Atualizar paciente existente
             print(f"DEBUG - Atualizando paciente ID: {edit_id}")
-            result = db_manager.execute_insert('''
-                UPDATE pacientes SET
-                    nome = ?, cpf = ?, data_nascimento = ?, genero = ?,
-                    telefone = ?, email = ?, endereco = ?, estado_civil = ?,
-                    observacoes = ?, ativo = ?
-                WHERE id = ?
-            ''', (data['nome'], cpf_clean, data['data_nascimento'], data['genero'],
-                  data['telefone'], data['email'], data['endereco'], data['estado_civil'],
-                  data['observacoes'], status, edit_id))
+            result = pacientes_repo.atualizar(edit_id, **dict(data, cpf=cpf_clean, ativo=status))
 
             print(f"DEBUG - Resultado do UPDATE: {result}")
             success_msg = f"Paciente {data['nome']} atualizado com sucesso!"
@@ -594,14 +653,8 @@ def salvar_paciente(salvar_clicks, edit_id, nome, cpf, nascimento, genero,
         else:
             # Criar novo paciente
             print(f"DEBUG - Criando novo paciente")
-            result = db_manager.execute_insert('''
-                INSERT INTO pacientes
-                (nome, cpf, data_nascimento, genero, telefone, email,
-                 endereco, estado_civil, observacoes, ativo, data_cadastro)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (data['nome'], cpf_clean, data['data_nascimento'], data['genero'],
-                  data['telefone'], data['email'], data['endereco'], data['estado_civil'],
-                  data['observacoes'], status, datetime.now().isoformat()))
+            result = pacientes_repo.inserir(**dict(data, cpf=cpf_clean, ativo=status,
+                                                   data_cadastro=datetime.now().isoformat()))
 
             print(f"DEBUG - Resultado do INSERT: {result}")
             success_msg = f"Paciente {data['nome']} cadastrado com sucesso!"
@@ -627,6 +680,15 @@ def salvar_paciente(salvar_clicks, edit_id, nome, cpf, nascimento, genero,
         # Fechar modal e atualizar lista
         return "", False, 1, toast
 
+    except sqlite3.IntegrityError as e:
+        # CPF repetido é recusado pelo índice único na própria gravação
+        message = integrity_checker.integrity_error_message(e) or str(e)
+        alert = dbc.Alert([
+            html.H6("❌ Erros de Validação:", className="mb-2"),
+            html.Ul([html.Li(message)])
+        ], color="danger")
+        return alert, dash.no_update, dash.no_update, dash.no_update
+
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -649,52 +711,43 @@ def salvar_paciente(salvar_clicks, edit_id, nome, cpf, nascimento, genero,
      Output('paciente-delete-id', 'data')],
     [Input({'type': 'btn-delete-paciente', 'index': ALL}, 'n_clicks'),
      Input('btn-cancel-delete-paciente', 'n_clicks')],
-    [State('pacientes-data', 'data'),
-     State('modal-confirm-delete-paciente', 'is_open')],
+    State('modal-confirm-delete-paciente', 'is_open'),
     prevent_initial_call=True
 )
-def confirm_delete_paciente(delete_clicks, cancel_clicks, pacientes_data, is_open):
+def confirm_delete_paciente(delete_clicks, cancel_clicks, is_open):
     """Abre modal de confirmação de exclusão"""
-    ctx = dash.callback_context
-
-    if not ctx.triggered:
-        return dash.no_update
-
-    button_id = ctx.triggered[0]['prop_id']
-
-    if 'btn-cancel-delete-paciente' in button_id:
-        return False, "", None
+    return despachar({
+        'btn-cancel-delete-paciente': lambda _: (False, "", None),
+        'btn-delete-paciente': _confirmar_exclusao_paciente
+    })
 
-    if 'btn-delete-paciente' in button_id and any(delete_clicks):
-        # Identificar paciente
-        paciente_id = eval(button_id.split('.')[0])['index']
-        paciente = next((p for p in pacientes_data if p['id'] == paciente_id), None)
+def _confirmar_exclusao_paciente(paciente_id):
+    """Monta a mensagem de confirmação (ou o impedimento) da exclusão"""
+    paciente = _carregar_paciente(paciente_id)
 
-        if not paciente:
-            return dash.no_update
-
-        # Verificar dependências
-        check_result = can_delete_patient(paciente_id)
+    if not paciente:
+        return dash.no_update
 
-        if check_result['can_delete']:
-            message = html.Div([
-                html.P(f"Tem certeza que deseja excluir o paciente:"),
-                html.H5(f"👤 {paciente['nome']}", className="text-primary"),
-                html.P(f"📄 CPF: {paciente['cpf']}"),
-                html.Hr(),
-                html.P("⚠️ Esta ação não pode ser desfeita!", className="text-warning")
-            ])
-        else:
-            message = html.Div([
-                html.P(f"❌ Não é possível excluir o paciente:"),
-                html.H5(f"👤 {paciente['nome']}", className="text-danger"),
-                html.Hr(),
-                html.P(check_result['message'], className="text-warning")
-            ])
+    # Verificar dependências
+    check_result = can_delete_patient(paciente_id)
 
-        return True, message, paciente_id if check_result['can_delete'] else None
+    if check_result['can_delete']:
+        message = html.Div([
+            html.P(f"Tem certeza que deseja excluir o paciente:"),
+            html.H5(f"👤 {paciente['nome']}", className="text-primary"),
+            html.P(f"📄 CPF: {paciente['cpf']}"),
+            html.Hr(),
+            html.P("⚠️ Esta ação não pode ser desfeita!", className="text-warning")
+        ])
+    else:
+        message = html.Div([
+            html.P(f"❌ Não é possível excluir o paciente:"),
+            html.H5(f"👤 {paciente['nome']}", className="text-danger"),
+            html.Hr(),
+            html.P(check_result['message'], className="text-warning")
+        ])
 
-    return dash.no_update
+    return True, message, paciente_id if check_result['can_delete'] else None
 
 # Callback para executar exclusão
 @callback(
@@ -702,22 +755,21 @@ def confirm_delete_paciente(delete_clicks, cancel_clicks, pacientes_data, is_ope
      Output('btn-refresh-pacientes', 'n_clicks', allow_duplicate=True),
      Output('toast-container-pacientes', 'children')],
     Input('btn-confirm-delete-paciente', 'n_clicks'),
-    [State('paciente-delete-id', 'data'),
-     State('pacientes-data', 'data')],
+    State('paciente-delete-id', 'data'),
     prevent_initial_call=True
 )
-def execute_delete_paciente(confirm_clicks, delete_id, pacientes_data):
+def execute_delete_paciente(confirm_clicks, delete_id):
     """Executa exclusão do paciente"""
     if not confirm_clicks or not delete_id:
         return dash.no_update
 
     try:
         # Encontrar nome do paciente
-        paciente = next((p for p in pacientes_data if p['id'] == delete_id), None)
-        nome_paciente = paciente['nome'] if paciente else 'Paciente'
+        paciente = pacientes_repo.por_id(delete_id)
+        nome_paciente = paciente.nome if paciente else 'Paciente'
 
         # Executar exclusão
-        db_manager.execute_insert('DELETE FROM pacientes WHERE id = ?', (delete_id,))
+        pacientes_repo.excluir(delete_id)
 
         # Toast de sucesso
         toast = dbc.Toast(
@@ -12,6 +12,7 @@ from datetime import datetime, date
 import os
 
 from utils.db_manager import db_manager
+from utils.repositories import pacientes_repo
 from utils.prescription_generator import create_prescription_pdf
 
 # Layout da página
@@ -262,20 +263,15 @@ def show_patient_info(paciente_id):
         return ""
     
     try:
-        paciente = db_manager.execute_query('''
-            SELECT nome, cpf, data_nascimento, telefone, endereco 
-            FROM pacientes WHERE id = ?
-        ''', (paciente_id,))
+        p = pacientes_repo.por_id(paciente_id)
         
-        if not paciente.empty:
-            p = paciente.iloc[0]
-            
+        if p is not None:
             return dbc.Alert([
-                html.Strong(f"👤 {p['nome']}"), html.Br(),
-                f"📄 CPF: {p['cpf']}", html.Br(),
-                f"🎂 Nascimento: {p['data_nascimento']}", html.Br(),
-                f"📞 Telefone: {p['telefone']}", html.Br(),
-                f"🏠 Endereço: {p['endereco']}"
+                html.Strong(f"👤 {p.nome}"), html.Br(),
+                f"📄 CPF: {p.cpf}", html.Br(),
+                f"🎂 Nascimento: {p.data_nascimento}", html.Br(),
+                f"📞 Telefone: {p.telefone}", html.Br(),
+                f"🏠 Endereço: {p.endereco}"
             ], color="info", className="mb-0")
         
         return ""
@@ -381,10 +377,7 @@ def generate_prescription(n_clicks, paciente_id, data_consulta, nome_medico, crm
     
     try:
         # Buscar dados do paciente
-        paciente = db_manager.execute_query('''
-            SELECT nome, cpf, data_nascimento, endereco 
-            FROM pacientes WHERE id = ?
-        ''', (paciente_id,)).iloc[0]
+        paciente = pacientes_repo.por_id(paciente_id)
         
         # Preparar dados para o PDF
         prescription_data = {
@@ -395,10 +388,10 @@ def generate_prescription(n_clicks, paciente_id, data_consulta, nome_medico, crm
                 'email': 'contato@cliniccare.com.br'
             },
             'patient': {
-                'name': paciente['nome'],
-                'cpf': paciente['cpf'],
-                'birth_date': paciente['data_nascimento'],
-                'address': paciente['endereco']
+                'name': paciente.nome,
+                'cpf': paciente.cpf,
+                'birth_date': paciente.data_nascimento,
+                'address': paciente.endereco
             },
             'doctor': {
                 'name': nome_medico,
@@ -1,10 +1,19 @@
 import dash
-from dash import html, dcc, callback, Input, Output, State, ALL
+from dash import html, dcc, callback, Input, Output, State, ALL, MATCH, Patch
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 from datetime import datetime
 import pandas as pd
 from utils.db_manager import db_manager
+from utils.repositories import consultas_repo, pacientes_repo
 from components.navbar import create_page_header, create_alert
+from components.callbacks import despachar
+
+# Pacientes carregados por vez na lista lateral
+PACIENTES_POR_PAGINA = 50
+
+# Consultas do histórico carregadas por vez
+HISTORICO_POR_PAGINA = 10
 
 def create_layout():
     """Cria o layout da página de prontuários eletrônicos"""
@@ -65,7 +74,15 @@ def create_layout():
                         html.H5("👥 Pacientes", className="mb-0")
                     ]),
                     dbc.CardBody([
-                        html.Div(id="lista-pacientes")
+                        html.Div(id="lista-pacientes"),
+                        dbc.Button(
+                            "Carregar mais",
+                            id="btn-carregar-mais-pacientes",
+                            color="link",
+                            size="sm",
+                            className="w-100 mt-2",
+                            style={'display': 'none'}
+                        )
                     ])
                 ])
             ], md=4),
@@ -92,6 +109,7 @@ def create_layout():
         
         # Store para dados
         dcc.Store(id='store-paciente-selecionado'),
+        dcc.Store(id='store-lista-pacientes'),
         dcc.Store(id='store-consulta-selecionada')
     ])
 
@@ -111,74 +129,90 @@ def update_medicos_options(n_clicks):
         return []
 
 @callback(
-    Output('lista-pacientes', 'children'),
+    [Output('lista-pacientes', 'children'),
+     Output('store-lista-pacientes', 'data'),
+     Output('btn-carregar-mais-pacientes', 'style')],
     [Input('btn-executar-busca', 'n_clicks'),
-     Input('input-busca-paciente', 'n_submit')],
+     Input('input-busca-paciente', 'n_submit'),
+     Input('dropdown-filtro-medico', 'value'),
+     Input('btn-carregar-mais-pacientes', 'n_clicks')],
     [State('input-busca-paciente', 'value'),
-     State('dropdown-filtro-medico', 'value')]
+     State('store-lista-pacientes', 'data')]
 )
-def update_lista_pacientes(n_clicks, n_submit, busca, medico_id):
-    """Atualiza lista de pacientes"""
+def update_lista_pacientes(n_clicks, n_submit, medico_id, n_mais, busca, lista):
+    """Atualiza lista de pacientes, uma página por vez"""
+    
+    oculto = {'display': 'none'}
     
     try:
-        # Buscar pacientes
-        if busca:
-            query = '''
-                SELECT DISTINCT p.* FROM pacientes p
-                WHERE p.ativo = 1 AND (
-                    p.nome LIKE ? OR p.cpf LIKE ?
-                )
-                ORDER BY p.nome
-            '''
-            pacientes = db_manager.execute_query(query, (f'%{busca}%', f'%{busca}%'))
+        trigger = dash.callback_context.triggered_id
+        
+        if trigger == 'btn-carregar-mais-pacientes' and lista and lista.get('proxima'):
+            # Próxima página com os mesmos filtros da primeira
+            busca, medico_id, apos = lista['busca'], lista['medico_id'], lista['proxima']
         else:
-            pacientes = db_manager.get_pacientes()
+            apos = None
         
-        if pacientes.empty:
-            return create_empty_state_pacientes()
+        pagina = db_manager.get_pacientes_pagina(
+            busca=busca,
+            ativo=True,
+            medico_id=medico_id,
+            apos=apos,
+            limite=PACIENTES_POR_PAGINA
+        )
         
-        # Criar lista de pacientes
-        items = []
-        for _, paciente in pacientes.iterrows():
-            # Contar consultas do paciente
-            consultas_count = db_manager.execute_query('''
-                SELECT COUNT(*) as total FROM consultas WHERE paciente_id = ?
-            ''', (paciente['id'],))
-            
-            total_consultas = consultas_count.iloc[0]['total']
-            
-            item = dbc.ListGroupItem([
-                dbc.Row([
-                    dbc.Col([
-                        html.H6(paciente['nome'], className="mb-1"),
-                        html.P([
-                            html.Small([
-                                html.I(className="fas fa-id-card me-1"),
-                                paciente['cpf']
-                            ], className="text-muted")
-                        ], className="mb-1"),
-                        html.P([
-                            html.Small([
-                                html.I(className="fas fa-calendar me-1"),
-                                f"{total_consultas} consulta(s)"
-                            ], className="text-muted")
-                        ], className="mb-0")
-                    ], width=True),
-                    dbc.Col([
-                        dbc.Button([
-                            html.I(className="fas fa-eye")
-                        ], color="outline-primary", size="sm",
-                        id={'type': 'btn-ver-prontuario', 'index': paciente['id']})
-                    ], width="auto")
-                ])
-            ], action=True, id={'type': 'item-paciente', 'index': paciente['id']})
-            
-            items.append(item)
+        # Contagem de consultas de toda a página em uma única query agrupada
+        total_consultas = db_manager.get_total_consultas(pagina.registros['id'])
+        items = [
+            create_item_paciente(paciente, total_consultas[int(paciente['id'])])
+            for _, paciente in pagina.registros.iterrows()
+        ]
+        
+        lista = {'busca': busca, 'medico_id': medico_id, 'proxima': pagina.proxima_chave}
+        botao = oculto if pagina.proxima_chave is None else {}
+        
+        if apos is not None:
+            # Acrescenta a página à lista já exibida
+            lista_exibida = Patch()
+            lista_exibida['props']['children'].extend(items)
+            return lista_exibida, lista, botao
         
-        return dbc.ListGroup(items)
+        if not items:
+            return create_empty_state_pacientes(), lista, oculto
+        
+        return dbc.ListGroup(items), lista, botao
         
     except Exception as e:
-        return dbc.Alert(f"Erro ao carregar pacientes: {str(e)}", color="danger")
+        return dbc.Alert(f"Erro ao carregar pacientes: {str(e)}", color="danger"), None, oculto
+
+def create_item_paciente(paciente, total_consultas):
+    """Cria o item de um paciente na lista"""
+    
+    return dbc.ListGroupItem([
+        dbc.Row([
+            dbc.Col([
+                html.H6(paciente['nome'], className="mb-1"),
+                html.P([
+                    html.Small([
+                        html.I(className="fas fa-id-card me-1"),
+                        paciente['cpf']
+                    ], className="text-muted")
+                ], className="mb-1"),
+                html.P([
+                    html.Small([
+                        html.I(className="fas fa-calendar me-1"),
+                        f"{total_consultas} consulta(s)"
+                    ], className="text-muted")
+                ], className="mb-0")
+            ], width=True),
+            dbc.Col([
+                dbc.Button([
+                    html.I(className="fas fa-eye")
+                ], color="outline-primary", size="sm",
+                id={'type': 'btn-ver-prontuario', 'index': paciente['id']})
+            ], width="auto")
+        ])
+    ], action=True, id={'type': 'item-paciente', 'index': paciente['id']})
 
 def create_empty_state_pacientes():
     """Cria estado vazio para lista de pacientes"""
@@ -197,31 +231,19 @@ def create_empty_state_pacientes():
 )
 def show_detalhes_prontuario(n_clicks_list):
     """Mostra detalhes do prontuário do paciente"""
-    
-    ctx = dash.callback_context
-    if not ctx.triggered or not any(n_clicks_list):
-        return "", None
-    
-    # Identificar qual botão foi clicado
-    button_id = ctx.triggered[0]['prop_id']
-    paciente_id = eval(button_id.split('.')[0])['index']
+    return despachar({'btn-ver-prontuario': create_detalhes_prontuario})
+
+def create_detalhes_prontuario(paciente_id):
+    """Cria o painel com os dados e o histórico do paciente"""
     
     try:
         # Buscar dados do paciente
-        paciente = db_manager.execute_query(
-            'SELECT * FROM pacientes WHERE id = ?', (paciente_id,)
-        ).iloc[0]
+        paciente = pacientes_repo.por_id(paciente_id)
+        if paciente is None:
+            return create_alert("Paciente não encontrado.", "warning"), None
         
-        # Buscar consultas do paciente
-        consultas = db_manager.execute_query('''
-            SELECT c.*, m.nome as medico_nome, m.especialidade,
-                   pr.anamnese, pr.exame_fisico, pr.diagnostico, pr.prescricao
-            FROM consultas c
-            JOIN medicos m ON c.medico_id = m.id
-            LEFT JOIN prontuarios pr ON c.id = pr.consulta_id
-            WHERE c.paciente_id = ?
-            ORDER BY c.data_consulta DESC
-        ''', (paciente_id,))
+        # Apenas as consultas mais recentes, resumidas; as anteriores sob demanda
+        historico = db_manager.get_historico_paciente(paciente_id, limite=HISTORICO_POR_PAGINA)
         
         # Criar layout dos detalhes
         content = [
@@ -236,18 +258,18 @@ def show_detalhes_prontuario(n_clicks_list):
                 dbc.CardBody([
                     dbc.Row([
                         dbc.Col([
-                            html.P([html.Strong("Nome: "), paciente['nome']]),
-                            html.P([html.Strong("CPF: "), paciente['cpf']]),
+                            html.P([html.Strong("Nome: "), paciente.nome]),
+                            html.P([html.Strong("CPF: "), paciente.cpf]),
                             html.P([html.Strong("Data de Nascimento: "), 
-                                   paciente['data_nascimento'] or "Não informado"])
+                                   paciente.data_nascimento or "Não informado"])
                         ], md=6),
                         dbc.Col([
                             html.P([html.Strong("Telefone: "), 
-                                   paciente['telefone'] or "Não informado"]),
+                                   paciente.telefone or "Não informado"]),
                             html.P([html.Strong("Email: "), 
-                                   paciente['email'] or "Não informado"]),
+                                   paciente.email or "Não informado"]),
                             html.P([html.Strong("Convênio: "), 
-                                   paciente['convenio'] or "Particular"])
+                                   paciente.convenio or "Particular"])
                         ], md=6)
                     ])
                 ])
@@ -273,7 +295,7 @@ def show_detalhes_prontuario(n_clicks_list):
                     ])
                 ]),
                 dbc.CardBody([
-                    create_historico_consultas(consultas)
+                    create_historico_consultas(paciente_id, historico)
                 ])
             ])
         ]
@@ -283,111 +305,175 @@ def show_detalhes_prontuario(n_clicks_list):
     except Exception as e:
         return dbc.Alert(f"Erro ao carregar prontuário: {str(e)}", color="danger"), None
 
-def create_historico_consultas(consultas):
-    """Cria histórico de consultas do paciente"""
+def create_historico_consultas(paciente_id, historico):
+    """Cria histórico de consultas do paciente (primeira página)"""
     
-    if consultas.empty:
+    if historico.registros.empty:
         return html.Div([
             html.I(className="fas fa-calendar-times fa-2x text-muted mb-2"),
             html.P("Nenhuma consulta registrada", className="text-muted"),
             html.P("Clique em 'Novo Registro' para adicionar", className="text-muted small")
         ], className="text-center p-4")
     
-    # Criar timeline de consultas
-    timeline_items = []
+    return html.Div([
+        html.Div(
+            [create_item_historico(consulta) for _, consulta in historico.registros.iterrows()],
+            id="historico-consultas"
+        ),
+        dbc.Button(
+            [html.I(className="fas fa-history me-1"), "Carregar consultas anteriores"],
+            id="btn-historico-anteriores",
+            color="link",
+            size="sm",
+            className="w-100",
+            style={'display': 'none'} if historico.proxima_chave is None else {}
+        ),
+        dcc.Store(id='store-historico', data={
+            'paciente_id': paciente_id,
+            'proxima': historico.proxima_chave
+        })
+    ])
+
+def create_item_historico(consulta):
+    """Cria o resumo de uma consulta na timeline; o prontuário abre sob demanda"""
     
-    for _, consulta in consultas.iterrows():
-        data_consulta = pd.to_datetime(consulta['data_consulta'])
-        
-        # Status da consulta
-        status_colors = {
-            'agendado': 'info',
-            'confirmado': 'warning',
-            'concluido': 'success',
-            'cancelado': 'danger'
-        }
-        
-        status_color = status_colors.get(consulta['status'], 'secondary')
-        
-        # Conteúdo do prontuário
-        prontuario_content = []
-        if consulta['anamnese']:
-            prontuario_content.append(
-                html.Div([
-                    html.Strong("Anamnese: "),
-                    html.P(consulta['anamnese'], className="mt-1")
-                ])
-            )
-        
-        if consulta['exame_fisico']:
-            prontuario_content.append(
-                html.Div([
-                    html.Strong("Exame Físico: "),
-                    html.P(consulta['exame_fisico'], className="mt-1")
-                ])
-            )
-        
-        if consulta['diagnostico']:
-            prontuario_content.append(
-                html.Div([
-                    html.Strong("Diagnóstico: "),
-                    html.P(consulta['diagnostico'], className="mt-1")
-                ])
-            )
-        
-        if consulta['prescricao']:
-            prontuario_content.append(
-                html.Div([
-                    html.Strong("Prescrição: "),
-                    html.P(consulta['prescricao'], className="mt-1")
-                ])
+    data_consulta = pd.to_datetime(consulta['data_consulta'])
+    
+    # Status da consulta
+    status_colors = {
+        'agendado': 'info',
+        'confirmado': 'warning',
+        'concluido': 'success',
+        'cancelado': 'danger'
+    }
+    
+    status = consulta['status'] or 'agendado'
+    status_color = status_colors.get(status, 'secondary')
+    
+    if consulta['diagnostico_resumo']:
+        resumo = html.P([html.Strong("Diagnóstico: "), consulta['diagnostico_resumo']],
+                        className="mb-1 text-truncate")
+    elif not consulta['tem_prontuario']:
+        resumo = html.P("Prontuário não preenchido", className="text-muted fst-italic mb-1")
+    else:
+        resumo = None
+    
+    return dbc.Card([
+        dbc.CardBody([
+            dbc.Row([
+                dbc.Col([
+                    html.H6([
+                        data_consulta.strftime('%d/%m/%Y %H:%M'),
+                        dbc.Badge(status.title(), 
+                                color=status_color, pill=True, className="ms-2")
+                    ]),
+                    html.P([
+                        html.I(className="fas fa-user-md me-1"),
+                        f"{consulta['medico_nome']} - {consulta['especialidade']}"
+                    ], className="text-muted mb-2"),
+                    resumo
+                ], width=True),
+                dbc.Col([
+                    dbc.ButtonGroup([
+                        dbc.Button([
+                            html.I(className="fas fa-chevron-down")
+                        ], color="outline-secondary", size="sm", title="Ver detalhes",
+                        id={'type': 'btn-expandir-historico', 'index': consulta['id']}),
+                        dbc.Button([
+                            html.I(className="fas fa-edit")
+                        ], color="outline-primary", size="sm",
+                        id={'type': 'btn-editar-prontuario', 'index': consulta['id']}),
+                        dbc.Button([
+                            html.I(className="fas fa-print")
+                        ], color="outline-secondary", size="sm",
+                        id={'type': 'btn-imprimir-prontuario', 'index': consulta['id']})
+                    ], size="sm")
+                ], width="auto")
+            ]),
+            
+            # Observações e textos do prontuário, carregados ao expandir
+            dbc.Collapse(
+                html.Div(id={'type': 'detalhes-historico', 'index': consulta['id']}, className="mt-2"),
+                id={'type': 'collapse-historico', 'index': consulta['id']},
+                is_open=False
             )
-        
-        # Item da timeline
-        timeline_item = dbc.Card([
-            dbc.CardBody([
-                dbc.Row([
-                    dbc.Col([
-                        html.H6([
-                            data_consulta.strftime('%d/%m/%Y %H:%M'),
-                            dbc.Badge(consulta['status'].title(), 
-                                    color=status_color, pill=True, className="ms-2")
-                        ]),
-                        html.P([
-                            html.I(className="fas fa-user-md me-1"),
-                            f"{consulta['medico_nome']} - {consulta['especialidade']}"
-                        ], className="text-muted mb-2"),
-                        
-                        # Observações da consulta
-                        html.Div([
-                            html.Strong("Observações: "),
-                            html.P(consulta['observacoes'] or "Nenhuma observação registrada")
-                        ]) if consulta['observacoes'] else None,
-                        
-                        # Conteúdo do prontuário
-                        html.Div(prontuario_content) if prontuario_content else html.Div([
-                            html.P("Prontuário não preenchido", className="text-muted fst-italic")
-                        ])
-                    ], width=True),
-                    dbc.Col([
-                        dbc.ButtonGroup([
-                            dbc.Button([
-                                html.I(className="fas fa-edit")
-                            ], color="outline-primary", size="sm",
-                            id={'type': 'btn-editar-prontuario', 'index': consulta['id']}),
-                            dbc.Button([
-                                html.I(className="fas fa-print")
-                            ], color="outline-secondary", size="sm",
-                            id={'type': 'btn-imprimir-prontuario', 'index': consulta['id']})
-                        ], size="sm")
-                    ], width="auto")
-                ])
-            ])
-        ], className="mb-3 border-start border-primary border-3")
-        
-        timeline_items.append(timeline_item)
+        ])
+    ], className="mb-3 border-start border-primary border-3")
+
+def create_detalhes_consulta(prontuario):
+    """Cria o conteúdo completo do prontuário de uma consulta"""
+    
+    content = []
+    campos = [
+        ('observacoes', "Observações: "),
+        ('anamnese', "Anamnese: "),
+        ('exame_fisico', "Exame Físico: "),
+        ('diagnostico', "Diagnóstico: "),
+        ('prescricao', "Prescrição: ")
+    ]
+    for campo, titulo in campos:
+        if prontuario and prontuario[campo]:
+            content.append(html.Div([
+                html.Strong(titulo),
+                html.P(prontuario[campo], className="mt-1")
+            ]))
     
-    return html.Div(timeline_items)
+    if not content:
+        return html.P("Prontuário não preenchido", className="text-muted fst-italic mb-0")
+    
+    return html.Div(content)
+
+@callback(
+    [Output({'type': 'collapse-historico', 'index': MATCH}, 'is_open'),
+     Output({'type': 'detalhes-historico', 'index': MATCH}, 'children')],
+    Input({'type': 'btn-expandir-historico', 'index': MATCH}, 'n_clicks'),
+    [State({'type': 'collapse-historico', 'index': MATCH}, 'is_open'),
+     State({'type': 'detalhes-historico', 'index': MATCH}, 'children')],
+    prevent_initial_call=True
+)
+def toggle_detalhes_historico(n_clicks, is_open, detalhes):
+    """Expande uma consulta do histórico, lendo o prontuário na primeira abertura"""
+    
+    if not n_clicks:
+        raise PreventUpdate
+    
+    if detalhes or is_open:
+        return not is_open, dash.no_update
+    
+    consulta_id = dash.callback_context.triggered_id['index']
+    try:
+        detalhes = create_detalhes_consulta(db_manager.get_prontuario_consulta(consulta_id))
+    except Exception as e:
+        detalhes = dbc.Alert(f"Erro ao carregar prontuário: {str(e)}", color="danger")
+    
+    return True, detalhes
+
+@callback(
+    [Output('historico-consultas', 'children'),
+     Output('store-historico', 'data'),
+     Output('btn-historico-anteriores', 'style')],
+    Input('btn-historico-anteriores', 'n_clicks'),
+    State('store-historico', 'data'),
+    prevent_initial_call=True
+)
+def load_historico_anterior(n_clicks, historico_estado):
+    """Acrescenta a página seguinte (mais antiga) do histórico"""
+    
+    if not n_clicks or not historico_estado or not historico_estado.get('proxima'):
+        raise PreventUpdate
+    
+    historico = db_manager.get_historico_paciente(
+        historico_estado['paciente_id'],
+        antes=historico_estado['proxima'],
+        limite=HISTORICO_POR_PAGINA
+    )
+    
+    timeline = Patch()
+    timeline.extend([create_item_historico(consulta) for _, consulta in historico.registros.iterrows()])
+    
+    historico_estado = {'paciente_id': historico_estado['paciente_id'], 'proxima': historico.proxima_chave}
+    botao = {'display': 'none'} if historico.proxima_chave is None else {}
+    return timeline, historico_estado, botao
 
 @callback(
     [Output('modal-novo-prontuario', 'is_open'),
@@ -400,12 +486,10 @@ def create_historico_consultas(consultas):
 def toggle_modal_novo_prontuario(n1, n2, is_open, paciente_id):
     """Controla modal de novo prontuário"""
     
-    ctx = dash.callback_context
-    if not ctx.triggered:
+    button_id = dash.callback_context.triggered_id
+    if button_id is None:
         return False, ""
     
-    button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-    
     if button_id == 'btn-novo-registro-prontuario' and paciente_id:
         return True, create_form_novo_prontuario(paciente_id)
     elif button_id == 'btn-cancelar-prontuario':
@@ -516,6 +600,11 @@ def salvar_prontuario(n_clicks, consulta_id, anamnese, exame_fisico, diagnostico
         return ""
     
     try:
+        # A consulta escolhida precisa existir e ser do paciente selecionado
+        consulta = consultas_repo.por_id(consulta_id)
+        if consulta is None or consulta.paciente_id != paciente_id:
+            return create_alert("Consulta não encontrada para este paciente.", "warning")
+        
         # Inserir prontuário
         query = '''
             INSERT INTO prontuarios (paciente_id, consulta_id, anamnese, exame_fisico, diagnostico, prescricao)
@@ -523,7 +612,7 @@ def salvar_prontuario(n_clicks, consulta_id, anamnese, exame_fisico, diagnostico
         '''
         
         db_manager.execute_insert(query, (
-            paciente_id, consulta_id, anamnese or "", 
+            consulta.paciente_id, consulta.id, anamnese or "", 
             exame_fisico or "", diagnostico or "", prescricao or ""
         ))
         
@@ -5,7 +5,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import pandas as pd
-from utils.db_manager import db_manager
+from utils.db_manager import db_manager, filtro_periodo
 from components.navbar import create_page_header
 
 def create_layout():
@@ -104,18 +104,17 @@ def create_relatorio_geral(start_date, end_date):
     
     try:
         # KPIs principais
-        consultas = db_manager.get_consultas_periodo(start_date, end_date)
-        total_consultas = len(consultas)
+        consultas = db_manager.get_resumo_consultas(start_date, end_date)
+        total_consultas = int(consultas['total'].sum())
         
-        receitas = db_manager.execute_query('''
-            SELECT COALESCE(SUM(valor), 0) as total FROM financeiro 
-            WHERE tipo = 'receita' AND DATE(data_vencimento) BETWEEN ? AND ?
-        ''', (start_date, end_date))
+        financeiro = db_manager.get_financeiro_diario(start_date, end_date)
+        total_receitas = financeiro.loc[financeiro['tipo'] == 'receita', 'valor'].sum()
         
-        pacientes_ativos = db_manager.execute_query('''
+        periodo_consultas, params_consultas = filtro_periodo('data_consulta', start_date, end_date)
+        pacientes_ativos = db_manager.execute_query(f'''
             SELECT COUNT(DISTINCT paciente_id) as total FROM consultas 
-            WHERE DATE(data_consulta) BETWEEN ? AND ?
-        ''', (start_date, end_date))
+            WHERE {periodo_consultas}
+        ''', params_consultas)
         
         return html.Div([
             # KPIs
@@ -131,7 +130,7 @@ def create_relatorio_geral(start_date, end_date):
                 dbc.Col([
                     dbc.Card([
                         dbc.CardBody([
-                            html.H3(f"R$ {(receitas.iloc[0]['total'] or 0):,.2f}", className="text-success"),
+                            html.H3(f"R$ {total_receitas:,.2f}", className="text-success"),
                             html.P("Receita Total", className="mb-0")
                         ])
                     ], className="text-center")
@@ -226,6 +225,20 @@ def create_relatorio_financeiro(start_date, end_date):
                         ])
                     ])
                 ], md=4)
+            ], className="mb-4"),
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardHeader([
+                            html.H5("📈 Receita Mensal", className="mb-0")
+                        ]),
+                        dbc.CardBody([
+                            dcc.Graph(
+                                figure=create_grafico_receita_mensal(start_date, end_date)
+                            )
+                        ])
+                    ])
+                ])
             ])
         ])
         
@@ -296,7 +309,7 @@ def create_grafico_evolucao_consultas(start_date, end_date):
     """Cria gráfico de evolução de consultas"""
     
     try:
-        consultas = db_manager.get_consultas_periodo(start_date, end_date)
+        consultas = db_manager.get_resumo_consultas(start_date, end_date)
         
         if consultas.empty:
             fig = go.Figure()
@@ -304,8 +317,7 @@ def create_grafico_evolucao_consultas(start_date, end_date):
                              xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
             return fig
         
-        consultas['data'] = pd.to_datetime(consultas['data_consulta']).dt.date
-        consultas_por_dia = consultas.groupby('data').size().reset_index(name='total')
+        consultas_por_dia = consultas.groupby('data')['total'].sum().reset_index()
         
         fig = px.line(consultas_por_dia, x='data', y='total', 
                      title='Consultas por Dia', markers=True)
@@ -323,7 +335,7 @@ def create_grafico_especialidades(start_date, end_date):
     """Cria gráfico por especialidades"""
     
     try:
-        consultas = db_manager.get_consultas_periodo(start_date, end_date)
+        consultas = db_manager.get_resumo_consultas(start_date, end_date)
         
         if consultas.empty:
             fig = go.Figure()
@@ -331,7 +343,7 @@ def create_grafico_especialidades(start_date, end_date):
                              xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
             return fig
         
-        especialidades = consultas['especialidade'].value_counts()
+        especialidades = consultas.groupby('especialidade')['total'].sum().sort_values(ascending=False)
         
         fig = px.pie(values=especialidades.values, names=especialidades.index)
         fig.update_layout(height=300, showlegend=True)
@@ -348,16 +360,10 @@ def create_grafico_financeiro_detalhado(start_date, end_date):
     """Cria gráfico financeiro detalhado"""
     
     try:
-        financeiro = db_manager.execute_query('''
-            SELECT 
-                DATE(data_vencimento) as data,
-                tipo,
-                SUM(valor) as valor
-            FROM financeiro 
-            WHERE DATE(data_vencimento) BETWEEN ? AND ?
-            GROUP BY DATE(data_vencimento), tipo
-            ORDER BY data
-        ''', (start_date, end_date))
+        financeiro = (
+            db_manager.get_financeiro_diario(start_date, end_date)
+            .groupby(['data', 'tipo'], as_index=False)['valor'].sum()
+        )
         
         if financeiro.empty:
             fig = go.Figure()
@@ -378,16 +384,39 @@ def create_grafico_financeiro_detalhado(start_date, end_date):
                          xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
         return fig
 
+def create_grafico_receita_mensal(start_date, end_date):
+    """Cria gráfico de receita de consultas por mês do período"""
+    
+    try:
+        inicio = pd.to_datetime(start_date)
+        fim = pd.to_datetime(end_date)
+        n_meses = max(1, (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1)
+        
+        receita_mensal = db_manager.revenue_by_month(n_meses, ate=fim.date())
+        
+        fig = px.bar(x=[mes.strftime('%m/%Y') for mes in receita_mensal['mes']],
+                    y=receita_mensal['receita'],
+                    title='Receita de Consultas por Mês',
+                    labels={'x': 'Mês', 'y': 'Receita (R$)'})
+        fig.update_layout(height=300)
+        
+        return fig
+        
+    except Exception as e:
+        fig = go.Figure()
+        fig.add_annotation(text=f"Erro: {str(e)}", 
+                         xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
+        return fig
+
 def create_grafico_categorias_financeiro(start_date, end_date):
     """Cria gráfico de categorias financeiras"""
     
     try:
-        categorias = db_manager.execute_query('''
-            SELECT categoria, SUM(valor) as total
-            FROM financeiro 
-            WHERE DATE(data_vencimento) BETWEEN ? AND ?
-            GROUP BY categoria
-        ''', (start_date, end_date))
+        categorias = (
+            db_manager.get_financeiro_diario(start_date, end_date)
+            .groupby('categoria', as_index=False)['valor'].sum()
+            .rename(columns={'valor': 'total'})
+        )
         
         if categorias.empty:
             fig = go.Figure()
@@ -410,7 +439,8 @@ def create_grafico_horarios_pico(start_date, end_date):
     """Cria gráfico de horários de pico"""
     
     try:
-        consultas = db_manager.get_consultas_periodo(start_date, end_date)
+        # Procura por horário: conta todas as consultas marcadas, inclusive canceladas
+        consultas = db_manager.get_agendamentos_dia_hora(start_date, end_date, incluir_cancelados=True)
         
         if consultas.empty:
             fig = go.Figure()
@@ -418,8 +448,7 @@ def create_grafico_horarios_pico(start_date, end_date):
                              xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
             return fig
         
-        consultas['hora'] = pd.to_datetime(consultas['data_consulta']).dt.hour
-        horarios = consultas['hora'].value_counts().sort_index()
+        horarios = consultas.groupby('hora')['total'].sum().sort_index()
         
         fig = px.bar(x=horarios.index, y=horarios.values,
                     title='Consultas por Horário',
@@ -438,7 +467,7 @@ def create_grafico_dias_semana(start_date, end_date):
     """Cria gráfico de dias da semana"""
     
     try:
-        consultas = db_manager.get_consultas_periodo(start_date, end_date)
+        consultas = db_manager.get_resumo_consultas(start_date, end_date)
         
         if consultas.empty:
             fig = go.Figure()
@@ -446,8 +475,8 @@ def create_grafico_dias_semana(start_date, end_date):
                              xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
             return fig
         
-        consultas['dia_semana'] = pd.to_datetime(consultas['data_consulta']).dt.day_name()
-        dias = consultas['dia_semana'].value_counts()
+        consultas['dia_semana'] = pd.to_datetime(consultas['data']).dt.day_name()
+        dias = consultas.groupby('dia_semana')['total'].sum()
         
         # Ordenar dias da semana
         ordem_dias = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
@@ -470,12 +499,13 @@ def create_grafico_perfil_pacientes(start_date, end_date):
     
     try:
         # Simulação de dados de perfil (idade, gênero, etc.)
-        pacientes = db_manager.execute_query('''
+        periodo, params = filtro_periodo('c.data_consulta', start_date, end_date)
+        pacientes = db_manager.execute_query(f'''
             SELECT DISTINCT p.convenio
             FROM pacientes p
             JOIN consultas c ON p.id = c.paciente_id
-            WHERE DATE(c.data_consulta) BETWEEN ? AND ?
-        ''', (start_date, end_date))
+            WHERE {periodo}
+        ''', params)
         
         if pacientes.empty:
             fig = go.Figure()
@@ -501,19 +531,7 @@ def create_tabela_resumo_medicos(start_date, end_date):
     """Cria tabela resumo por médicos"""
     
     try:
-        resumo = db_manager.execute_query('''
-            SELECT 
-                m.nome as medico,
-                m.especialidade,
-                COUNT(c.id) as total_consultas,
-                COALESCE(SUM(c.valor), 0) as receita_total,
-                COALESCE(AVG(c.valor), 0) as valor_medio
-            FROM medicos m
-            LEFT JOIN consultas c ON m.id = c.medico_id 
-                AND DATE(c.data_consulta) BETWEEN ? AND ?
-            GROUP BY m.id, m.nome, m.especialidade
-            ORDER BY total_consultas DESC
-        ''', (start_date, end_date))
+        resumo = db_manager.get_resumo_medicos(start_date, end_date)
         
         if resumo.empty:
             return html.P("Nenhum dado encontrado", className="text-muted text-center")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark da agenda: horários livres de um dia já carregado e reserva em série
+
+Uso:
+    python tests/bench_agenda.py
+    python tests/bench_agenda.py --repeat 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+# Adicionar o diretório pai ao path para importações
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test_agenda import _agenda_de_teste
+
+
+def medir(func, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da agenda de horários")
+    parser.add_argument('--repeat', type=int, default=1000, help="Repetições por medição")
+    args = parser.parse_args(argv)
+
+    segunda = date(2030, 1, 7)
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, agenda = _agenda_de_teste(tmp)
+        for hora in [8, 9, 10, 11]:
+            agenda.reservar(1, 50, datetime(2030, 1, 7, hora, 30))
+        assert agenda.horarios_livres(50, segunda) == ['08:00', '09:00', '10:00', '11:00']
+
+        us_livres = medir(lambda: agenda.horarios_livres(50, segunda), args.repeat)
+
+        # 4 pacientes por 12 semanas, a partir da segunda seguinte
+        pedidos = agenda.serie([1, 2, 3, 4], 50, datetime(2030, 1, 14, 8, 0), 'semanal', 12)
+        inicio = time.perf_counter()
+        resultado = agenda.reservar_lote(pedidos)
+        ms_lote = (time.perf_counter() - inicio) * 1000
+        assert all(o.consulta_id for o in resultado)
+        manager.close()
+
+    print(f"\n Horários livres (dia em cache): {us_livres:.0f} µs")
+    print(f" Série de {len(pedidos)} consultas:       {ms_lote:.1f} ms")
+    print("\n✅ Benchmark da agenda concluído")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca de pacientes: LIKE '%termo%' vs. índice FTS5
+
+Uso:
+    python tests/bench_busca_pacientes.py              # 1.000.000 de pacientes
+    python tests/bench_busca_pacientes.py --rows 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório pai ao path para importações
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import DatabaseManager
+
+NOMES = ['José', 'Maria', 'Ana', 'João', 'Antônio', 'Francisca', 'Carlos', 'Paulo',
+         'Lúcia', 'Pedro', 'Luíza', 'Marcos', 'Fernanda', 'Rafael', 'Débora', 'Tiago']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves',
+              'Pereira', 'Lima', 'Gomes', 'Conceição', 'Ribeiro', 'Araújo', 'Simões']
+
+BUSCAS = ['maria', 'jose silva', 'conceicao', 'araujo lu', '123456', '(11) 9876', 'ze']
+
+
+def popular(manager, rows):
+    """Insere pacientes sintéticos (as triggers alimentam o índice FTS)"""
+    random.seed(42)
+
+    def linhas():
+        for i in range(rows):
+            nome = f"{random.choice(NOMES)} {random.choice(SOBRENOMES)} {random.choice(SOBRENOMES)}"
+            cpf = f"{random.randrange(10**11):011d}"
+            telefone = f"(11) 9{random.randrange(10**8):08d}"
+            yield nome, cpf + f"{i}", telefone, f"paciente{i}@email.com"
+
+    with manager.connection() as conn:
+        conn.executemany(
+            "INSERT INTO pacientes (nome, cpf, telefone, email) VALUES (?, ?, ?, ?)", linhas()
+        )
+        conn.commit()
+
+
+def medir(func, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000, resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da busca de pacientes")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Quantidade de pacientes")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetições por busca")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'busca.db'))
+        if not manager.fts:
+            print("❌ SQLite sem FTS5")
+            return 1
+
+        print(f"Gerando {args.rows:,} pacientes...")
+        popular(manager, args.rows)
+
+        def buscar(termo, fts):
+            manager.fts = fts
+            manager.cache.clear()
+            return manager.get_pacientes_pagina(busca=termo, ativo=True)
+
+        print(f"\n {'Busca':<14} {'LIKE':>10} {'FTS5':>10} {'Resultados':>12}")
+        for termo in BUSCAS:
+            ms_like, _ = medir(lambda: buscar(termo, False), 1)
+            ms_fts, pagina = medir(lambda: buscar(termo, True), args.repeat)
+            marca = ' ' if pagina.total_exato else '+'
+            print(f" {termo!r:<14} {ms_like:>8.1f}ms {ms_fts:>8.1f}ms {pagina.total:>11,}{marca}")
+
+        manager.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark do fluxo de caixa: filtro dia a dia vs. pivot + reindex + cumsum
+
+Uso:
+    python tests/bench_fluxo_caixa.py                  # 1 a 8 anos, 20 movimentações/dia
+    python tests/bench_fluxo_caixa.py --anos 1 2 4 8 16 --por-dia 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Adicionar o diretório pai ao path para importações
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from pages.financeiro import calcular_fluxo_caixa
+from test_fluxo_caixa import fluxo_dia_a_dia, movimentacoes_aleatorias
+
+
+def medir(func, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do fluxo de caixa")
+    parser.add_argument('--anos', type=int, nargs='+', default=[1, 2, 4, 8], help="Períodos medidos")
+    parser.add_argument('--por-dia', type=int, default=20, help="Movimentações por dia")
+    parser.add_argument('--max-anos-referencia', type=int, default=2,
+                        help="Maior período medido também com o cálculo dia a dia (quadrático)")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetições por medição")
+    args = parser.parse_args(argv)
+
+    inicio = '2020-01-01'
+    print(f"\n {'Anos':>4} {'Dias':>6} {'Linhas':>9} {'Dia a dia':>11} {'Vetorizado':>11} {'µs/dia':>8}")
+    for anos in args.anos:
+        fim = (pd.Timestamp(inicio) + pd.DateOffset(years=anos) - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        dias = len(pd.date_range(inicio, fim))
+        movimentacoes = movimentacoes_aleatorias(inicio, dias, dias * args.por_dia)
+
+        ms_vetorizado = medir(lambda: calcular_fluxo_caixa(movimentacoes, inicio, fim), args.repeat)
+        if anos <= args.max_anos_referencia:
+            ms_referencia = f"{medir(lambda: fluxo_dia_a_dia(movimentacoes, inicio, fim), 1):>9.0f}ms"
+        else:
+            ms_referencia = f"{'-':>11}"
+
+        print(f" {anos:>4} {dias:>6} {len(movimentacoes):>9,} {ms_referencia} "
+              f"{ms_vetorizado:>9.1f}ms {ms_vetorizado * 1000 / dias:>8.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos KPIs do dashboard: quatro queries vs. query agregada nos totais diários
+
+Uso:
+    python tests/bench_kpis.py                # 500.000 consultas
+    python tests/bench_kpis.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório pai ao path para importações
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import DatabaseManager
+from test_kpis import inserir_consultas, kpis_legado
+
+
+def medir(func, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos KPIs do dashboard")
+    parser.add_argument('--rows', type=int, default=500_000, help="Quantidade de consultas")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições por medição")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'kpis.db'))
+        print(f"Gerando {args.rows:,} consultas...")
+        inserir_consultas(manager, args.rows)
+
+        legado = kpis_legado(manager)
+        atual = manager.get_kpis_dashboard()
+        assert atual.consultas_mes == legado['consultas_mes']
+        assert abs(atual.receita_mes - legado['receita_mes']) < 0.01
+        assert abs(atual.taxa_comparecimento - legado['taxa_comparecimento']) < 1e-9
+
+        ms_legado = medir(lambda: kpis_legado(manager), args.repeat)
+        # Sem o cache de resultados, para medir apenas a query
+        ms_atual = medir(lambda: (manager.cache.clear(), manager.get_kpis_dashboard()), args.repeat)
+        manager.close()
+
+    print(f"\n Quatro queries:  {ms_legado:.1f} ms")
+    print(f" Query agregada:  {ms_atual:.1f} ms")
+    print(f"\n✅ Mesmos KPIs, {ms_legado / ms_atual:.1f}x mais rápido com a query agregada")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark da leitura por id: execute_query + iloc vs. repositório (com e sem cache)
+
+Uso:
+    python tests/bench_repositorios.py
+    python tests/bench_repositorios.py --repeat 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório pai ao path para importações
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import DatabaseManager
+from utils.repositories import PacienteRepo
+
+
+def medir(func, repeticoes):
+    """Tempo médio de uma chamada, em microssegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da leitura por id")
+    parser.add_argument('--repeat', type=int, default=500, help="Leituras por medição")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'leitura.db'))
+        pacientes = PacienteRepo(manager)
+        paciente_id = pacientes.inserir(nome='Bruno Dias', cpf='98765432100')
+
+        assert manager.execute_query(
+            "SELECT nome FROM pacientes WHERE id = ?", (paciente_id,)
+        ).iloc[0]['nome'] == pacientes.por_id(paciente_id).nome
+
+        us_pandas = medir(lambda: manager.execute_query(
+            "SELECT * FROM pacientes WHERE id = ?", (paciente_id,)
+        ).iloc[0], args.repeat)
+        # Cache limpo a cada leitura, para medir a própria query
+        us_repo = medir(lambda: (manager.cache.clear(), pacientes.por_id(paciente_id)), args.repeat)
+        us_cache = medir(lambda: pacientes.por_id(paciente_id), args.repeat)
+
+        manager.close()
+
+    print(f"\n execute_query + iloc: {us_pandas:.0f} µs")
+    print(f" repositório:          {us_repo:.0f} µs")
+    print(f" repositório (cache):  {us_cache:.0f} µs")
+    print(f"\n✅ Repositório {us_pandas / us_repo:.1f}x mais rápido que execute_query + iloc")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
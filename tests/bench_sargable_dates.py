@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos filtros de período: DATE(coluna) BETWEEN vs. intervalo semiaberto
+
+Uso:
+    python tests/bench_sargable_dates.py             # 1.000.000 de consultas
+    python tests/bench_sargable_dates.py --rows 200000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Adicionar o diretório pai ao path para importações
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import filtro_periodo
+
+
+def criar_banco(path, rows):
+    """Cria uma tabela de consultas com datas distribuídas em ~3 anos"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE consultas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            paciente_id INTEGER,
+            medico_id INTEGER,
+            data_consulta TIMESTAMP NOT NULL,
+            status TEXT DEFAULT 'agendada',
+            valor DECIMAL(10,2)
+        )
+    ''')
+
+    inicio = datetime(2022, 1, 1, 8, 0)
+    status = ['agendada', 'confirmada', 'realizada', 'cancelada']
+    random.seed(42)
+
+    def linhas():
+        for _ in range(rows):
+            quando = inicio + timedelta(minutes=30 * random.randrange(3 * 365 * 48))
+            yield (
+                random.randint(1, 5000),
+                random.randint(1, 50),
+                quando.strftime('%Y-%m-%d %H:%M:%S'),
+                random.choice(status),
+                150.0
+            )
+
+    conn.executemany(
+        'INSERT INTO consultas (paciente_id, medico_id, data_consulta, status, valor) VALUES (?, ?, ?, ?, ?)',
+        linhas()
+    )
+    conn.execute('CREATE INDEX idx_consultas_data_status_medico ON consultas (data_consulta, status, medico_id)')
+    conn.commit()
+    return conn
+
+
+def medir(conn, query, params, repeticoes):
+    """Retorna (melhor tempo em ms, resultado) de uma query"""
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = conn.execute(query, params).fetchall()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000, resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de filtros de data no SQLite")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Quantidade de consultas")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetições por query")
+    args = parser.parse_args(argv)
+
+    data_inicio, data_fim = date(2023, 6, 1), date(2023, 6, 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Gerando {args.rows:,} consultas...")
+        conn = criar_banco(os.path.join(tmp, 'bench.db'), args.rows)
+
+        legado = '''
+            SELECT COUNT(*), COALESCE(SUM(valor), 0) FROM consultas
+            WHERE DATE(data_consulta) BETWEEN ? AND ?
+        '''
+        periodo, params = filtro_periodo('data_consulta', data_inicio, data_fim)
+        intervalo = f'''
+            SELECT COUNT(*), COALESCE(SUM(valor), 0) FROM consultas
+            WHERE {periodo}
+        '''
+
+        casos = [
+            ('DATE() BETWEEN', legado, (data_inicio.isoformat(), data_fim.isoformat())),
+            ('Intervalo semiaberto', intervalo, params),
+        ]
+
+        resultados = []
+        for nome, query, query_params in casos:
+            plano = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", query_params)]
+            ms, resultado = medir(conn, query, query_params, args.repeat)
+            resultados.append((ms, resultado))
+            print(f"\n {nome}: {ms:.2f} ms -> {resultado[0]}")
+            for detalhe in plano:
+                print(f"   {detalhe}")
+
+        conn.close()
+
+    (ms_legado, res_legado), (ms_intervalo, res_intervalo) = resultados
+    assert res_legado == res_intervalo, "Os dois filtros devem retornar o mesmo resultado"
+    print(f"\n✅ Mesmo resultado, {ms_legado / ms_intervalo:.1f}x mais rápido com intervalo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
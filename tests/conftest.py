@@ -0,0 +1,89 @@
+"""
+Fixtures compartilhadas pelos testes
+
+Os testes usam bancos temporários: o banco global (DATABASE_CONFIG['path'])
+é trocado por uma cópia antes de qualquer módulo criar o db_manager, e o
+fixture ``banco_temporario`` entrega um banco novo por teste às páginas.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+
+from config import DATABASE_CONFIG
+
+_banco_original = DATABASE_CONFIG['path']
+_diretorio_sessao = None
+
+
+def pytest_configure(config):
+    """Aponta o banco global para uma cópia temporária durante a sessão"""
+    global _diretorio_sessao
+    _diretorio_sessao = tempfile.mkdtemp(prefix='clinicare-testes-')
+    copia = os.path.join(_diretorio_sessao, os.path.basename(_banco_original))
+    if os.path.exists(_banco_original):
+        shutil.copyfile(_banco_original, copia)
+    DATABASE_CONFIG['path'] = copia
+
+
+def pytest_unconfigure(config):
+    DATABASE_CONFIG['path'] = _banco_original
+    db_manager = getattr(sys.modules.get('utils.db_manager'), 'db_manager', None)
+    if db_manager is not None:
+        db_manager.close()
+    shutil.rmtree(_diretorio_sessao, ignore_errors=True)
+
+
+@pytest.fixture
+def banco_temporario(tmp_path, monkeypatch):
+    """
+    DatabaseManager em um banco novo, usado no lugar do db_manager global
+
+    Substitui o db_manager importado pelas páginas e módulos já carregados e
+    o manager das instâncias globais (repositórios, agenda); os módulos
+    testados devem ser importados no topo do arquivo de teste.
+    """
+    from utils import db_manager as modulo_banco
+
+    manager = modulo_banco.DatabaseManager(str(tmp_path / 'clinica.db'))
+    global_ = modulo_banco.db_manager
+    for nome, modulo in list(sys.modules.items()):
+        if not nome.startswith(('pages.', 'utils.', 'components.')):
+            continue
+        for atributo, valor in list(vars(modulo).items()):
+            if valor is global_:
+                monkeypatch.setattr(modulo, atributo, manager)
+            elif not isinstance(valor, type) and getattr(valor, 'manager', None) is global_:
+                # Instâncias globais (repositórios, agenda_medicos)
+                monkeypatch.setattr(valor, 'manager', manager)
+
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def disparar():
+    """
+    Simula o contexto de um callback disparado por um componente
+
+    Uso: ``disparar('btn-salvar')`` ou
+    ``disparar({'type': 'btn-edit', 'index': 1}, 'n_clicks', 1)``.
+    """
+    tokens = []
+
+    def _disparar(componente, propriedade='n_clicks', valor=None):
+        if isinstance(componente, dict):
+            componente = json.dumps(componente, sort_keys=True, separators=(',', ':'))
+        tokens.append(context_value.set(AttributeDict(
+            triggered_inputs=[{'prop_id': f"{componente}.{propriedade}", 'value': valor}]
+        )))
+
+    yield _disparar
+    for token in reversed(tokens):
+        context_value.reset(token)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Teste da disponibilidade de horários e da reserva de consultas
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import date, datetime
+
+import pytest
+
+from pages.agendamento import PACIENTES_POR_BUSCA, buscar_pacientes_serie, create_resultado_serie
+from utils.agenda import (
+    MAX_OCORRENCIAS, AgendaMedicos, ConflitoDeHorario, DiaAgenda, Ocorrencia, expandir_recorrencia,
+    interpretar_horario
+)
+from utils.db_manager import DatabaseManager
+
+SEGUNDA = date(2030, 1, 7)
+
+
+def test_interpretar_horario():
+    """Horários de atendimento digitados viram faixas por dia da semana"""
+
+    print("Testando interpretação do horário de atendimento...")
+
+    faixas = interpretar_horario("Segunda a Sexta: 08:00 às 12:00 e 14:00 às 18:00\nSábado: 8h às 12h")
+    assert faixas[0] == ((480, 720), (840, 1080))
+    assert faixas[4] == faixas[0]
+    assert faixas[5] == ((480, 720),)
+    assert faixas[6] == ()
+
+    faixas = interpretar_horario("Seg, Qua e Sex 09:00-17:00")
+    assert [bool(f) for f in faixas] == [True, False, True, False, True, False, False]
+
+    assert interpretar_horario("Sob consulta") is None
+    assert interpretar_horario(None) is None
+
+    print("✅ Interpretação do horário: OK")
+
+
+def test_indice_de_intervalos():
+    """Conflitos detectados por busca binária nos intervalos ocupados"""
+
+    print("Testando índice de intervalos...")
+
+    dia = DiaAgenda.de_intervalos([(600, 630), (540, 570), (550, 580)])
+    assert (dia.inicios, dia.fins) == ([540, 600], [580, 630])
+
+    assert dia.conflita(570, 600)
+    assert not dia.conflita(580, 600)  # encosta, não sobrepõe
+    assert not dia.conflita(630, 660)
+    assert dia.conflita(500, 700)
+
+    novo = dia.com(580, 600)
+    assert novo.inicios == [540, 580, 600] and len(dia) == 2
+
+    print("✅ Índice de intervalos: OK")
+
+
+def _agenda_de_teste(tmp):
+    manager = DatabaseManager(os.path.join(tmp, 'agenda.db'))
+    with manager.connection() as conn:
+        conn.execute('''
+            INSERT INTO medicos (id, nome, crm, duracao_consulta, horario_atendimento)
+            VALUES (50, 'Dra. Agenda', 'CRM/SP 5050', 30, 'Segunda a Sexta: 08:00 às 12:00')
+        ''')
+        conn.commit()
+    return manager, AgendaMedicos(manager)
+
+
+def test_reserva_e_horarios_livres():
+    """Reservas ocupam o horário, conflitos são recusados e cancelamentos liberam"""
+
+    print("Testando reservas...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, agenda = _agenda_de_teste(tmp)
+
+        livres = agenda.horarios_livres(50, SEGUNDA)
+        assert livres == ['08:00', '08:30', '09:00', '09:30', '10:00', '10:30', '11:00', '11:30']
+        assert agenda.horarios_livres(50, date(2030, 1, 12)) == []  # sábado
+
+        consulta_id = agenda.reservar(1, 50, datetime(2030, 1, 7, 9, 0), 150)
+        assert '09:00' not in agenda.horarios_livres(50, SEGUNDA)
+
+        for inicio in [datetime(2030, 1, 7, 9, 0), datetime(2030, 1, 7, 9, 15)]:
+            try:
+                agenda.reservar(2, 50, inicio)
+            except ConflitoDeHorario:
+                pass
+            else:
+                raise AssertionError(f"reserva em conflito aceita: {inicio}")
+
+        try:
+            agenda.reservar(2, 50, datetime(2030, 1, 7, 11, 45))
+        except ConflitoDeHorario:
+            pass
+        else:
+            raise AssertionError("reserva fora do expediente aceita")
+
+        # Escrita por outro caminho invalida a ocupação em cache
+        manager.execute_update("UPDATE consultas SET status = 'cancelado' WHERE id = ?", (consulta_id,))
+        assert '09:00' in agenda.horarios_livres(50, SEGUNDA)
+
+        # Horários que já passaram não são oferecidos
+        assert agenda.horarios_livres(50, SEGUNDA, a_partir_de=datetime(2030, 1, 7, 10, 5)) == [
+            '10:30', '11:00', '11:30'
+        ]
+
+        manager.close()
+
+    print("✅ Reservas: OK")
+
+
+def test_reservas_simultaneas():
+    """Duas reservas simultâneas do mesmo horário: só uma é gravada"""
+
+    print("Testando reservas simultâneas...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, agenda = _agenda_de_teste(tmp)
+        resultados = []
+        barreira = threading.Barrier(4)
+
+        def reservar(paciente_id):
+            barreira.wait()
+            try:
+                resultados.append(agenda.reservar(paciente_id, 50, datetime(2030, 1, 7, 10, 0)))
+            except ConflitoDeHorario:
+                resultados.append(None)
+
+        threads = [threading.Thread(target=reservar, args=(i,)) for i in range(1, 5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sum(r is not None for r in resultados) == 1, resultados
+        with manager.connection() as conn:
+            total = conn.execute(
+                "SELECT COUNT(*) FROM consultas WHERE medico_id = 50 AND data_consulta = '2030-01-07 10:00:00'"
+            ).fetchone()[0]
+        assert total == 1
+
+        manager.close()
+
+    print("✅ Reservas simultâneas: OK")
+
+
+def test_recorrencia():
+    """Séries diárias, semanais e mensais (fim de mês ajustado)"""
+
+    print("Testando expansão de recorrências...")
+
+    inicio = datetime(2030, 1, 31, 9, 0)
+    assert expandir_recorrencia(inicio, 'semanal', 3) == [
+        datetime(2030, 1, 31, 9, 0), datetime(2030, 2, 7, 9, 0), datetime(2030, 2, 14, 9, 0)
+    ]
+    assert expandir_recorrencia(inicio, 'mensal', 3) == [
+        datetime(2030, 1, 31, 9, 0), datetime(2030, 2, 28, 9, 0), datetime(2030, 3, 31, 9, 0)
+    ]
+    assert len(expandir_recorrencia(inicio, 'diaria', 10 ** 6)) == MAX_OCORRENCIAS
+
+    print("✅ Expansão de recorrências: OK")
+
+
+def test_reserva_em_lote():
+    """A série é gravada em uma transação e os conflitos são relatados um a um"""
+
+    print("Testando reserva em lote...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, agenda = _agenda_de_teste(tmp)
+        ocupada = agenda.reservar(9, 50, datetime(2030, 1, 14, 8, 30))
+
+        # 3 pacientes às 08:00, 08:30 e 09:00 de segunda, por 4 semanas
+        pedidos = agenda.serie([1, 2, 3], 50, datetime(2030, 1, 7, 8, 0), 'semanal', 4)
+        assert len(pedidos) == 12
+        assert pedidos[4].inicio == datetime(2030, 1, 7, 8, 30)
+
+        with manager.connection() as conn:
+            queries = []
+            conn.set_trace_callback(queries.append)
+            resultado = agenda.reservar_lote(pedidos, valor=80)
+            conn.set_trace_callback(None)
+
+        # Uma leitura da ocupação e uma única transação para a série
+        assert sum('FROM consultas' in q for q in queries) == 1
+        assert queries.count('BEGIN IMMEDIATE') == 1 and queries.count('COMMIT') == 1
+        # Conferência, gravação e leitura dos ids antes do único COMMIT
+        assert queries.index('SELECT last_insert_rowid()') < queries.index('COMMIT')
+
+        conflitos = [o for o in resultado if o.conflito]
+        assert [(o.paciente_id, o.inicio) for o in conflitos] == [(2, datetime(2030, 1, 14, 8, 30))]
+
+        with manager.connection() as conn:
+            gravadas = dict(conn.execute(
+                "SELECT id, paciente_id FROM consultas WHERE medico_id = 50 AND id != ?", (ocupada,)
+            ))
+        assert gravadas == {o.consulta_id: o.paciente_id for o in resultado if o.consulta_id}
+        assert '08:00' not in agenda.horarios_livres(50, date(2030, 1, 21))
+
+        # Tudo ou nada: um conflito impede a série inteira
+        pedidos = agenda.serie([4], 50, datetime(2030, 1, 7, 9, 30), 'semanal', 3)
+        pedidos.append(pedidos[0])
+        resultado = agenda.reservar_lote(pedidos, tudo_ou_nada=True)
+        assert all(o.consulta_id is None and o.conflito for o in resultado)
+        assert '09:30' in agenda.horarios_livres(50, SEGUNDA)
+
+        manager.close()
+
+    print("✅ Reserva em lote: OK")
+
+
+def test_transacao_do_chamador():
+    """A reserva não confirma nem desfaz uma transação aberta por quem chama"""
+
+    print("Testando reserva dentro de outra transação...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, agenda = _agenda_de_teste(tmp)
+
+        with manager.connection() as conn:
+            conn.execute("INSERT INTO pacientes (nome, cpf) VALUES ('Pendente', '98765432100')")
+            try:
+                agenda.reservar(1, 50, datetime(2030, 1, 7, 9, 0))
+            except sqlite3.OperationalError:
+                pass
+            else:
+                raise AssertionError("reserva aceita dentro de outra transação")
+            assert conn.in_transaction
+            conn.rollback()
+
+        with manager.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM pacientes WHERE nome = 'Pendente'").fetchone()[0] == 0
+            assert conn.execute("SELECT COUNT(*) FROM consultas WHERE medico_id = 50").fetchone()[0] == 0
+
+        assert agenda.reservar(1, 50, datetime(2030, 1, 7, 9, 0))
+        manager.close()
+
+    print("✅ Reserva dentro de outra transação: OK")
+
+
+def test_telas_da_serie(banco_temporario):
+    """O seletor da série usa a busca paginada e o resumo lê só os pacientes com conflito"""
+
+    print("Testando seletor e resumo da série...")
+
+    with banco_temporario.connection() as conn:
+        conn.execute("DELETE FROM pacientes")
+        conn.executemany(
+            "INSERT INTO pacientes (id, nome, cpf) VALUES (?, ?, ?)",
+            [(100 + i, f"Paciente {i:02d}", f"{10**10 + i}") for i in range(PACIENTES_POR_BUSCA + 5)]
+            + [(901, 'Zélia Souza', '10000000901'), (902, 'Otávio Conflito', '10000000902')]
+        )
+        conn.commit()
+
+    assert len(buscar_pacientes_serie(None, None)) == PACIENTES_POR_BUSCA
+
+    # A busca filtra; os já escolhidos continuam entre as opções
+    opcoes = buscar_pacientes_serie('zélia', [902])
+    assert opcoes == [{'label': 'Zélia Souza', 'value': 901}, {'label': 'Otávio Conflito', 'value': 902}]
+
+    with banco_temporario.connection() as conn:
+        banco_temporario.cache.clear()
+        queries = []
+        conn.set_trace_callback(queries.append)
+        resumo = create_resultado_serie([
+            Ocorrencia(901, 1, datetime(2030, 1, 7, 8, 0), 10),
+            Ocorrencia(902, 1, datetime(2030, 1, 7, 8, 30), None, "Horário já ocupado na agenda do médico."),
+        ])
+        conn.set_trace_callback(None)
+    assert len(queries) == 1 and 'FROM pacientes WHERE id = 902' in queries[0], queries
+    assert 'Otávio Conflito' in str(resumo) and 'Zélia' not in str(resumo)
+
+    print("✅ Seletor e resumo da série: OK")
+
+
+def test_ocupacao_em_cache():
+    """Horários livres vêm do cache, e uma reserva relê só o dia reservado"""
+
+    print("Testando ocupação em cache...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, agenda = _agenda_de_teste(tmp)
+        for hora in [8, 9, 10, 11]:
+            agenda.reservar(1, 50, datetime(2030, 1, 7, hora, 30))
+
+        terca = date(2030, 1, 8)
+        assert agenda.horarios_livres(50, SEGUNDA) == ['08:00', '09:00', '10:00', '11:00']
+        assert len(agenda.horarios_livres(50, terca)) == 8
+
+        with manager.connection() as conn:
+            queries = []
+            conn.set_trace_callback(queries.append)
+            assert agenda.horarios_livres(50, SEGUNDA) == ['08:00', '09:00', '10:00', '11:00']
+            agenda.reservar(2, 50, datetime(2030, 1, 7, 8, 0))
+            reserva = len(queries)
+            assert agenda.horarios_livres(50, SEGUNDA) == ['09:00', '10:00', '11:00']
+            assert len(agenda.horarios_livres(50, terca)) == 8
+            conn.set_trace_callback(None)
+
+        # Só a segunda, reservada, é lida de novo; a terça continua no cache
+        releituras = [q for q in queries[reserva:] if 'FROM consultas' in q]
+        assert len(releituras) == 1 and "'2030-01-07'" in releituras[0], releituras
+
+        manager.close()
+
+    print("✅ Ocupação em cache: OK")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
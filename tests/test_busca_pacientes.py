@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Teste da busca textual de pacientes (FTS5)
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+
+from utils.db_manager import LIMITE_RELEVANCIA, DatabaseManager, consulta_fts
+from utils.migrations import apply_migrations, pending_migrations
+
+
+class _SemFts5(sqlite3.Connection):
+    """Conexão que se comporta como um SQLite compilado sem FTS5"""
+
+    def execute(self, sql, *args):
+        if 'USING fts5' in sql:
+            raise sqlite3.OperationalError("no such module: fts5")
+        return super().execute(sql, *args)
+
+
+def _nomes(pagina):
+    return pagina.registros['nome'].tolist()
+
+
+def test_consulta_fts():
+    """O texto digitado vira prefixos entre aspas, sem operadores do FTS5"""
+
+    print("Testando conversão da busca...")
+
+    assert consulta_fts('ana sil') == '"ana"* "sil"*'
+    assert consulta_fts('123.456.789-00') == '{cpf telefone} : ("12345678900"* OR "123 456 789 00"*)'
+    assert consulta_fts('97777') == '{cpf telefone} : ("97777"*)'
+    assert consulta_fts('maria OR "jose') == '"maria"* "OR"* "jose"*'
+    assert consulta_fts('  ') == '""'
+
+    print("✅ Conversão da busca: OK")
+
+
+def test_busca_pacientes():
+    """Prefixos, acentos, CPF sem máscara e sincronização pelas triggers"""
+
+    print("Testando busca textual de pacientes...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'busca.db'))
+        if not manager.fts:
+            print("⚠️ SQLite sem FTS5: busca por LIKE")
+            manager.close()
+            return
+
+        for nome, cpf, telefone, email, ativo in [
+            ('José da Conceição', '111.222.333-44', '(11) 98888-7777', 'jose@email.com', 1),
+            ('Maria Josefina Araújo', '55566677788', '(21) 97777-6666', 'mjaraujo@email.com', 1),
+            ('Joselito Souza', '99988877766', '(31) 96666-5555', None, 0),
+        ]:
+            manager.execute_insert(
+                "INSERT INTO pacientes (nome, cpf, telefone, email, ativo) VALUES (?, ?, ?, ?, ?)",
+                (nome, cpf, telefone, email, ativo)
+            )
+
+        assert _nomes(manager.get_pacientes_pagina(busca='conceicao')) == ['José da Conceição']
+        assert _nomes(manager.get_pacientes_pagina(busca='ARAU maria')) == ['Maria Josefina Araújo']
+        assert set(_nomes(manager.get_pacientes_pagina(busca='jos', ativo=True))) == {
+            'José da Conceição', 'Maria Josefina Araújo'
+        }
+        assert len(manager.get_pacientes_pagina(busca='jos', ativo=None).registros) == 3
+
+        # CPF com ou sem máscara, telefone e email
+        assert _nomes(manager.get_pacientes_pagina(busca='11122233344')) == ['José da Conceição']
+        assert _nomes(manager.get_pacientes_pagina(busca='111.222')) == ['José da Conceição']
+        assert _nomes(manager.get_pacientes_pagina(busca='97777')) == ['Maria Josefina Araújo']
+        assert _nomes(manager.get_pacientes_pagina(busca='mjaraujo')) == ['Maria Josefina Araújo']
+        assert _nomes(manager.get_pacientes_pagina(busca='(21) 97777-6666')) == ['Maria Josefina Araújo']
+
+        # Trecho de CPF: os grupos na ordem digitada, não em qualquer ordem
+        for nome, cpf in [('Ana Primeira', '314.159.265-35'), ('Ana Segunda', '159.265.314-03')]:
+            manager.execute_insert("INSERT INTO pacientes (nome, cpf) VALUES (?, ?)", (nome, cpf))
+        assert _nomes(manager.get_pacientes_pagina(busca='314.159')) == ['Ana Primeira']
+        assert set(_nomes(manager.get_pacientes_pagina(busca='159.265'))) == {'Ana Primeira', 'Ana Segunda'}
+        assert _nomes(manager.get_pacientes_pagina(busca='159265314')) == ['Ana Segunda']
+
+        # Sintaxe do FTS5 digitada pelo usuário não gera erro
+        assert manager.get_pacientes_pagina(busca='jose AND OR "').total == 0
+        assert manager.get_pacientes_pagina(busca='"').total == 0
+
+        # Alterações e exclusões chegam ao índice (e ao cache) pelas triggers
+        manager.execute_update("UPDATE pacientes SET nome = 'José Conceição Ribeiro' WHERE cpf = '111.222.333-44'", ())
+        assert _nomes(manager.get_pacientes_pagina(busca='ribeiro')) == ['José Conceição Ribeiro']
+        manager.execute_update("DELETE FROM pacientes WHERE cpf = '55566677788'", ())
+        assert manager.get_pacientes_pagina(busca='araujo').total == 0
+
+        manager.close()
+
+    print("✅ Busca textual de pacientes: OK")
+
+
+def test_busca_ampla():
+    """Acima do limite de relevância a contagem para e a paginação continua correta"""
+
+    print("Testando busca com muitos resultados...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'ampla.db'))
+        if not manager.fts:
+            manager.close()
+            return
+
+        total = LIMITE_RELEVANCIA + 150
+        with manager.connection() as conn:
+            conn.executemany(
+                "INSERT INTO pacientes (nome, cpf) VALUES (?, ?)",
+                [(f"Ana Teste {i}", f"{10**10 + i}") for i in range(total)]
+            )
+            conn.commit()
+
+        vistos = []
+        apos = None
+        while True:
+            pagina = manager.get_pacientes_pagina(busca='ana test', apos=apos, limite=500)
+            assert not pagina.total_exato
+            assert pagina.total == LIMITE_RELEVANCIA + 1
+            vistos.extend(pagina.registros['id'])
+            apos = pagina.proxima_chave
+            if apos is None:
+                break
+
+        assert len(vistos) == len(set(vistos)) == total
+        manager.close()
+
+    print("✅ Busca com muitos resultados: OK")
+
+
+def test_fts_adiado():
+    """Sem FTS5 a migração fica pendente e é aplicada quando o módulo existir"""
+
+    print("Testando migração do FTS5 sem o módulo...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, 'sem_fts.db')
+        DatabaseManager(caminho).close()
+
+        conn = sqlite3.connect(caminho, factory=_SemFts5)
+        for trigger in ['pacientes_fts_ai', 'pacientes_fts_ad', 'pacientes_fts_au']:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE IF EXISTS pacientes_fts")
+        conn.execute("DELETE FROM schema_migrations WHERE version = 6")
+        conn.execute("INSERT INTO pacientes (nome, cpf) VALUES ('Joana Adiada', '271.828.182-84')")
+        conn.commit()
+
+        avisos = []
+        coletor = logging.Handler()
+        coletor.emit = avisos.append
+        logger = logging.getLogger('utils.migrations')
+        logger.addHandler(coletor)
+        try:
+            assert apply_migrations(conn) == []
+        finally:
+            logger.removeHandler(coletor)
+        assert [a.levelno for a in avisos] == [logging.WARNING]
+        assert [m[0] for m in pending_migrations(conn)] == [6]
+        conn.close()
+
+        # Com o FTS5 disponível a migração adiada é aplicada na próxima subida,
+        # indexando também os pacientes cadastrados nesse meio-tempo
+        manager = DatabaseManager(caminho)
+        with manager.connection() as conn:
+            assert pending_migrations(conn) == []
+        if manager.fts:
+            assert _nomes(manager.get_pacientes_pagina(busca='joana adi')) == ['Joana Adiada']
+        manager.close()
+
+    print("✅ Migração do FTS5 adiada: OK")
+
+
+if __name__ == "__main__":
+    test_consulta_fts()
+    test_busca_pacientes()
+    test_busca_ampla()
+    test_fts_adiado()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Teste do calendário da agenda (períodos, filtros no SQL e pré-carregamento)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import wait
+from datetime import date, timedelta
+
+import pytest
+
+from utils import agenda
+from utils.agenda import consultas_da_janela, deslocar_janela, janela_calendario, prefetch_janelas
+from utils.db_manager import DatabaseManager
+
+
+def test_janelas():
+    """Dia, semana (segunda a domingo) e mês que contêm a data de referência"""
+
+    print("Testando períodos do calendário...")
+
+    assert janela_calendario('2030-01-09', 'dia') == (date(2030, 1, 9), date(2030, 1, 9))
+    assert janela_calendario('2030-01-09', 'semana') == (date(2030, 1, 7), date(2030, 1, 13))
+    assert janela_calendario('2030-02-09', 'mes') == (date(2030, 2, 1), date(2030, 2, 28))
+
+    assert deslocar_janela('2030-01-09', 'semana', -1) == date(2030, 1, 2)
+    assert deslocar_janela('2030-01-31', 'mes', 1) == date(2030, 2, 1)
+    assert deslocar_janela('2030-12-15', 'mes', 1) == date(2031, 1, 1)
+
+    print("✅ Períodos do calendário: OK")
+
+
+def test_filtros_e_prefetch():
+    """Filtros aplicados no SQL e semanas vizinhas servidas pelo cache"""
+
+    print("Testando filtros e pré-carregamento...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'calendario.db'))
+        with manager.connection() as conn:
+            conn.executemany(
+                "INSERT INTO consultas (paciente_id, medico_id, data_consulta, status) VALUES (?, ?, ?, ?)",
+                [(1 + i % 3, 1 + i % 2, f"2030-01-{1 + i % 28:02d} {8 + i % 9:02d}:00:00",
+                  ['agendado', 'confirmado', 'cancelado'][i % 3]) for i in range(300)]
+            )
+            conn.commit()
+
+        todas = consultas_da_janela('2030-01-09', 'mes', manager=manager)
+        filtradas = consultas_da_janela('2030-01-09', 'mes', 2, 'confirmado', manager=manager)
+        esperadas = todas[(todas['medico_id'] == 2) & (todas['status'] == 'confirmado')]
+        assert list(filtradas['id']) == list(esperadas['id'])
+        assert len(filtradas) > 0
+
+        semana = consultas_da_janela('2030-01-09', 'semana', 1, manager=manager)
+        assert semana['data_consulta'].str[:10].between('2030-01-07', '2030-01-13').all()
+
+        # Carregador ocupado: os pedidos ficam na fila
+        liberar = threading.Event()
+        ocupado = agenda._prefetch_executor.submit(liberar.wait, 5)
+        futuros = prefetch_janelas('2030-01-09', 'semana', 1, manager=manager)
+        assert len(futuros) == 2
+        # Cliques repetidos não pedem de novo os períodos que já estão na fila
+        assert prefetch_janelas('2030-01-09', 'semana', 1, manager=manager) == []
+        liberar.set()
+        wait([ocupado] + futuros)
+        # Nem os que já estão no cache
+        assert prefetch_janelas('2030-01-09', 'semana', 1, manager=manager) == []
+        hits = manager.cache.hits
+        with manager.connection() as conn:
+            queries = []
+            conn.set_trace_callback(queries.append)
+            consultas_da_janela('2030-01-16', 'semana', 1, manager=manager)
+            consultas_da_janela('2030-01-02', 'semana', 1, manager=manager)
+            conn.set_trace_callback(None)
+        assert queries == [] and manager.cache.hits == hits + 2
+
+        manager.close()
+
+    print("✅ Filtros e pré-carregamento: OK")
+
+
+def test_callback_calendario(disparar):
+    """Abrir a agenda mostra a semana atual; avançar mostra a seguinte"""
+
+    print("Testando callback do calendário...")
+
+    from pages.agendamento import update_calendario
+
+    disparar('modal-visualizar-agenda', 'is_open', True)
+    grade, periodo, referencia = update_calendario(True, None, None, None, 'semana', None, None, None)
+    inicio, fim = janela_calendario(date.today(), 'semana')
+    assert referencia == date.today().isoformat()
+    assert periodo == f"{inicio.strftime('%d/%m')} – {fim.strftime('%d/%m/%Y')}"
+    tabela = grade.children[1]
+    assert len(tabela.children[1].children) == 7
+
+    disparar('btn-agenda-proxima', valor=1)
+    _, _, proxima = update_calendario(True, None, 1, None, 'semana', None, None, referencia)
+    assert proxima == (date.today() + timedelta(weeks=1)).isoformat()
+
+    disparar('radio-agenda-visao', 'value', 'mes')
+    grade, _, _ = update_calendario(True, None, None, None, 'mes', None, 'agendado', proxima)
+    inicio, fim = janela_calendario(proxima, 'mes')
+    assert len(grade.children[1].children[1].children) == (fim - inicio).days + 1
+
+    print("✅ Callback do calendário: OK")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
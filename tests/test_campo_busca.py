@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Teste do fluxo de busca com debounce das páginas de pacientes e médicos
+"""
+
+import sys
+
+import pytest
+
+from components.busca import BUSCA_INICIAL, TAMANHO_MINIMO, termo_busca
+from pages.medicos import load_medicos_data
+from pages.pacientes import load_pacientes_data
+
+
+def test_termo_busca():
+    """Termos curtos ou em branco não filtram"""
+
+    print("Testando normalização do termo...")
+
+    assert termo_busca(None) == ''
+    assert termo_busca('  ') == ''
+    assert termo_busca('a' * (TAMANHO_MINIMO - 1)) == ''
+    assert termo_busca('  ana  ') == 'ana'
+
+    print("✅ Normalização do termo: OK")
+
+
+def test_resposta_com_sequencia(banco_temporario, disparar):
+    """As respostas carregam o seq da busca que as originou"""
+
+    print("Testando sequência das respostas...")
+
+    nome = 'Quitéria Sequência'
+    banco_temporario.execute_insert("INSERT INTO pacientes (nome, cpf) VALUES (?, ?)", (nome, '314.159.265-35'))
+
+    disparar('pacientes-busca', 'data')
+    resposta = load_pacientes_data(None, {'termo': nome.split()[0], 'seq': 7}, 'todos', 'nome', 25,
+                                   None, None, None)
+    assert resposta['seq'] == 7
+    pacientes, paginacao, info, sem_anterior, sem_proxima = resposta['valores']
+    assert [p['nome'] for p in pacientes] == [nome]
+    assert paginacao['cursores'] == [None] and sem_anterior
+
+    # Um caractere não filtra: mesma listagem da busca vazia
+    curta = load_pacientes_data(None, {'termo': nome[0], 'seq': 8}, 'todos', 'nome', 25, None, None, None)
+    vazia = load_pacientes_data(None, BUSCA_INICIAL, 'todos', 'nome', 25, None, None, None)
+    assert curta['valores'][0] == vazia['valores'][0]
+    assert vazia['seq'] == 0
+
+    resposta = load_medicos_data(None, {'termo': 'zzzz-inexistente', 'seq': 3}, None)
+    assert resposta == {'seq': 3, 'valores': [[]]}
+
+    print("✅ Sequência das respostas: OK")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
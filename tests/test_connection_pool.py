@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Teste do pool de conexões do DatabaseManager
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+
+from utils.db_manager import ConnectionPool, DatabaseManager
+
+
+def test_pool_reutiliza_conexoes():
+    """Conexões devolvidas ao pool são reutilizadas no próximo empréstimo"""
+
+    print("Testando reutilização de conexões...")
+
+    criadas = []
+
+    def factory():
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        criadas.append(conn)
+        return conn
+
+    pool = ConnectionPool(factory, max_size=2, max_uses=3)
+
+    with pool.connection() as conn1:
+        # Chamadas aninhadas na mesma thread compartilham a conexão
+        with pool.connection() as conn_aninhada:
+            assert conn_aninhada is conn1
+
+    with pool.connection() as conn2:
+        assert conn2 is conn1
+
+    with pool.connection():
+        pass
+
+    # Após 3 usos a conexão é reciclada
+    with pool.connection() as conn3:
+        assert conn3 is not conn1
+
+    assert len(criadas) == 2
+    print("✅ Reutilização e reciclagem: OK")
+
+
+def test_pool_descarta_conexao_quebrada():
+    """Conexões que falham no health-check são substituídas"""
+
+    print("Testando health-check das conexões...")
+
+    pool = ConnectionPool(
+        lambda: sqlite3.connect(':memory:', check_same_thread=False),
+        max_size=1
+    )
+
+    with pool.connection() as conn:
+        pass
+    conn.close()
+
+    with pool.connection() as nova:
+        assert nova is not conn
+        assert nova.execute('SELECT 1').fetchone() == (1,)
+
+    print("✅ Health-check: OK")
+
+
+def test_pool_entre_threads():
+    """Várias threads gravando pelo DatabaseManager sem erros"""
+
+    print("Testando uso concorrente do pool...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'pool.db'))
+        erros = []
+
+        def worker(n):
+            try:
+                for i in range(20):
+                    manager.execute_insert(
+                        "INSERT INTO comunicacao (tipo, mensagem) VALUES (?, ?)",
+                        ('mensagem', f'thread {n} - {i}')
+                    )
+                    manager.execute_query("SELECT COUNT(*) as total FROM comunicacao")
+            except Exception as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        total = manager.execute_query("SELECT COUNT(*) as total FROM comunicacao")
+        manager.close()
+
+        assert not erros, erros
+        assert total.iloc[0]['total'] == 160
+        assert len(manager.pool._idle) == 0
+
+    print("✅ Uso concorrente: OK")
+
+
+def test_perfil_concorrente():
+    """O perfil 'concorrente' ativa WAL e os PRAGMAs de cada conexão"""
+
+    print("Testando perfil de armazenamento...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'wal.db'), storage_profile='concorrente')
+
+        with manager.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+        manager.run_maintenance()
+        manager.close()
+
+    print("✅ Perfil concorrente: OK")
+
+
+def test_manutencao_registra_erros():
+    """Falhas da manutenção periódica vão para o log, sem interromper a tarefa"""
+
+    print("Testando erros da manutenção periódica...")
+
+    registros = []
+    falhas = threading.Semaphore(0)
+
+    class Coletor(logging.Handler):
+        def emit(self, record):
+            registros.append(record)
+            falhas.release()
+
+    def manutencao_com_erro():
+        raise sqlite3.OperationalError("database is locked")
+
+    logger = logging.getLogger('utils.db_manager')
+    coletor = Coletor()
+    logger.addHandler(coletor)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'manutencao.db'))
+        manager.run_maintenance = manutencao_com_erro
+        try:
+            manager.start_maintenance(interval=0.01)
+            # Duas falhas seguidas: a tarefa continua depois da primeira
+            assert falhas.acquire(timeout=5) and falhas.acquire(timeout=5)
+        finally:
+            manager.close()
+            logger.removeHandler(coletor)
+
+    assert registros[0].levelno == logging.ERROR
+    assert "database is locked" in registros[0].getMessage()
+    print("✅ Erros da manutenção: OK")
+
+
+if __name__ == "__main__":
+    test_pool_reutiliza_conexoes()
+    test_pool_descarta_conexao_quebrada()
+    test_pool_entre_threads()
+    test_perfil_concorrente()
+    test_manutencao_registra_erros()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Teste dos filtros de consultas aplicados no SQL (get_consultas)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from pages.home import PROXIMAS_CONSULTAS_LIMITE, update_proximas_consultas
+from utils.db_manager import DatabaseManager
+from utils.migrations import explain_query
+
+
+def test_filtros_no_sql():
+    """get_consultas devolve o mesmo que filtrar o período inteiro no pandas"""
+
+    print("Testando filtros de consultas...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'filtros.db'))
+        with manager.connection() as conn:
+            conn.executemany(
+                "INSERT INTO consultas (paciente_id, medico_id, data_consulta, status) VALUES (?, ?, ?, ?)",
+                [(1 + i % 3, 1 + i % 3, f"2030-03-{1 + i % 20:02d} {8 + i % 10:02d}:{i % 2 * 30:02d}:00",
+                  ['agendado', 'confirmado', 'concluido', 'cancelado'][i % 4]) for i in range(400)]
+            )
+            conn.commit()
+
+        periodo = ('2030-03-05', '2030-03-12')
+        todas = manager.get_consultas(periodo)
+        assert todas['data_consulta'].str[:10].between(*periodo).all()
+
+        esperadas = todas[(todas['medico_id'] == 2) & todas['status'].isin(['agendado', 'confirmado'])]
+        filtradas = manager.get_consultas(periodo, medico_id=2, status=['agendado', 'confirmado'])
+        assert list(filtradas['id']) == list(esperadas['id']) and len(filtradas) > 0
+
+        assert list(manager.get_consultas(periodo, status='cancelado')['id']) == \
+            list(todas.loc[todas['status'] == 'cancelado', 'id'])
+
+        # Páginas consecutivas cobrem o resultado completo, sem repetir
+        paginas = [manager.get_consultas(periodo, medico_id=1, limit=7, offset=n) for n in range(0, 70, 7)]
+        paginado = pd.concat(paginas)
+        assert list(paginado['id']) == list(manager.get_consultas(periodo, medico_id=1)['id'])
+        assert all(len(pagina) <= 7 for pagina in paginas)
+
+        assert manager.contar_consultas(periodo, medico_id=2, status=['agendado', 'confirmado']) == len(filtradas)
+
+        # Sem período: todas as consultas do médico
+        assert len(manager.get_consultas(medico_id=3)) == len(
+            manager.execute_query("SELECT id FROM consultas WHERE medico_id = 3")
+        )
+
+        with manager.connection() as conn:
+            plano = explain_query(conn, '''
+                SELECT id FROM consultas c
+                WHERE c.data_consulta >= ? AND c.data_consulta < ? AND c.medico_id = ?
+                ORDER BY c.data_consulta, c.id
+            ''', ('2030-03-05', '2030-03-13', 2))
+        assert any('idx_consultas_medico_data' in detalhe for detalhe in plano), plano
+
+        manager.close()
+
+    print("✅ Filtros de consultas: OK")
+
+
+def test_proximas_consultas(banco_temporario):
+    """A tabela do dashboard mostra até o limite e indica quantas consultas ficaram de fora"""
+
+    print("Testando próximas consultas do dashboard...")
+
+    amanha = (datetime.now() + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+
+    def agendar(quantidade):
+        banco_temporario.execute_update("DELETE FROM consultas", ())
+        with banco_temporario.connection() as conn:
+            conn.executemany(
+                "INSERT INTO consultas (paciente_id, medico_id, data_consulta, status) VALUES (1, 1, ?, 'agendado')",
+                [((amanha + timedelta(minutes=10 * i)).strftime('%Y-%m-%d %H:%M:%S'),) for i in range(quantidade)]
+            )
+            conn.commit()
+        banco_temporario.cache.clear()
+        return update_proximas_consultas(1)
+
+    tabela = agendar(PROXIMAS_CONSULTAS_LIMITE)
+    assert len(tabela.children[1].children) == PROXIMAS_CONSULTAS_LIMITE
+    assert 'consulta(s) nos próximos dias' not in str(tabela)
+
+    tabela, mais = agendar(PROXIMAS_CONSULTAS_LIMITE + 5).children
+    assert len(tabela.children[1].children) == PROXIMAS_CONSULTAS_LIMITE
+    assert mais.children.children == "+5 consulta(s) nos próximos dias"
+    assert mais.children.href == '/agendamento'
+
+    print("✅ Próximas consultas do dashboard: OK")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
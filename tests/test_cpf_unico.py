@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Teste da unicidade de CPF e CRM garantida pelo banco
+"""
+
+import io
+import logging
+import os
+import sqlite3
+import tempfile
+from contextlib import redirect_stdout
+
+from utils.db_manager import DatabaseManager
+from utils.migrations import apply_migrations, cpfs_repetidos, main as migrations_main
+from utils.relational_checks import integrity_checker
+from utils.repositories import MedicoRepo, PacienteRepo
+
+
+def _erro_de_gravacao(func, *args, **kwargs):
+    """Executa uma gravação que deve ser recusada e retorna a mensagem traduzida"""
+    try:
+        func(*args, **kwargs)
+    except sqlite3.IntegrityError as e:
+        return integrity_checker.integrity_error_message(e)
+    raise AssertionError("gravação deveria ter sido recusada")
+
+
+def test_cpf_unico_na_gravacao():
+    """O mesmo CPF em outro formato é recusado no INSERT e no UPDATE"""
+
+    print("Testando índice único de CPF...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'cpf.db'))
+        pacientes = PacienteRepo(manager)
+        medicos = MedicoRepo(manager)
+
+        primeiro = pacientes.inserir(nome='Helena Prado', cpf='111.444.777-35')
+        assert pacientes.por_id(primeiro).cpf_digits == '11144477735'
+        assert pacientes.cpf_em_uso('11144477735')
+        assert not pacientes.cpf_em_uso('11144477735', exceto_id=primeiro)
+
+        mensagem = _erro_de_gravacao(pacientes.inserir, nome='Helena P.', cpf='11144477735')
+        assert mensagem == "CPF já cadastrado no sistema."
+
+        segundo = pacientes.inserir(nome='Igor Prado', cpf='529.982.247-25')
+        mensagem = _erro_de_gravacao(pacientes.atualizar, segundo, cpf='111 444 777 35')
+        assert mensagem == "CPF já cadastrado no sistema."
+        assert pacientes.por_id(segundo).cpf == '529.982.247-25'
+
+        # Mudar o próprio CPF de formato não conflita com ele mesmo
+        pacientes.atualizar(primeiro, cpf='11144477735')
+        assert pacientes.por_id(primeiro).cpf_digits == '11144477735'
+
+        crm = medicos.por_id(1).crm
+        mensagem = _erro_de_gravacao(medicos.inserir, nome='Dr. Repetido', crm=crm)
+        assert mensagem == "CRM já cadastrado no sistema."
+
+        manager.close()
+
+    print("✅ Índice único de CPF: OK")
+
+
+def test_backfill_com_repetidos():
+    """A migração preenche cpf_digits, deixa de fora e avisa as duplicatas mais novas"""
+
+    print("Testando preenchimento de cpf_digits...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'backfill.db'))
+
+        with manager.connection() as conn:
+            # Volta o banco ao esquema anterior à migração 9
+            conn.execute("DROP TRIGGER pacientes_cpf_digits_insert")
+            conn.execute("DROP TRIGGER pacientes_cpf_digits_update")
+            conn.execute("DROP INDEX idx_pacientes_cpf_digits")
+            conn.execute("UPDATE pacientes SET cpf_digits = NULL")
+            conn.execute("DELETE FROM schema_migrations WHERE version = 9")
+            conn.execute("INSERT INTO pacientes (id, nome, cpf) VALUES (9001, 'Antigo', '111.444.777-35')")
+            conn.execute("INSERT INTO pacientes (id, nome, cpf) VALUES (9002, 'Repetido', '11144477735')")
+            conn.commit()
+
+            avisos = []
+            coletor = logging.Handler()
+            coletor.emit = avisos.append
+            logger = logging.getLogger('utils.migrations')
+            logger.addHandler(coletor)
+            try:
+                assert 9 in apply_migrations(conn)
+            finally:
+                logger.removeHandler(coletor)
+
+            digitos = dict(conn.execute("SELECT id, cpf_digits FROM pacientes WHERE id >= 9001"))
+            assert digitos == {9001: '11144477735', 9002: None}
+            assert conn.execute(
+                "SELECT cpf_digits FROM pacientes WHERE cpf = '123.456.789-01'"
+            ).fetchone()[0] == '12345678901'
+
+            # A duplicata é avisada na migração e continua listada até ser corrigida
+            assert cpfs_repetidos(conn) == [('11144477735', [9001, 9002])]
+            assert [a.levelno for a in avisos] == [logging.WARNING]
+            assert '11144477735' in avisos[0].getMessage() and '9002' in avisos[0].getMessage()
+
+        saida = io.StringIO()
+        with redirect_stdout(saida):
+            migrations_main(['status', '--db', manager.db_path])
+        assert "11144477735: pacientes 9001, 9002" in saida.getvalue()
+
+        with manager.connection() as conn:
+            conn.execute("UPDATE pacientes SET cpf = '529.982.247-25' WHERE id = 9002")
+            conn.commit()
+            assert cpfs_repetidos(conn) == []
+
+        manager.close()
+
+    print("✅ Preenchimento de cpf_digits: OK")
+
+
+if __name__ == "__main__":
+    test_cpf_unico_na_gravacao()
+    test_backfill_com_repetidos()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Teste do despacho de callbacks por componente disparador
+"""
+
+import sys
+
+import dash
+import pytest
+
+from components.callbacks import Disparo, despachar, disparo
+from pages.medicos import confirm_delete_medico, edit_medico
+from pages.pacientes import edit_paciente
+
+
+def test_despachar(disparar):
+    """IDs padrão e simples chegam ao handler certo, sem eval da prop_id"""
+
+    print("Testando despacho de callbacks...")
+
+    disparar({'type': 'btn-edit-paciente', 'index': 42}, valor=3)
+    assert disparo() == Disparo('btn-edit-paciente', 42, 3)
+
+    handlers = {
+        'btn-edit-paciente': lambda index: ('editar', index),
+        'btn-cancelar': lambda index: ('cancelar', index),
+    }
+    assert despachar(handlers) == ('editar', 42)
+
+    disparar('btn-cancelar', valor=1)
+    assert despachar(handlers) == ('cancelar', None)
+
+    # Botões recém-renderizados (n_clicks None) não disparam o handler
+    disparar({'type': 'btn-edit-paciente', 'index': 7})
+    assert despachar(handlers) is dash.no_update
+    assert despachar(handlers, exigir_valor=False) == ('editar', 7)
+
+    # Um index que não é inteiro também é aceito sem avaliar código
+    disparar({'type': 'btn-edit-paciente', 'index': "__import__('os')"}, valor=1)
+    assert despachar(handlers) == ('editar', "__import__('os')")
+
+    disparar('outro-botao', valor=1)
+    assert despachar(handlers, padrao=('nada', None)) == ('nada', None)
+
+    print("✅ Despacho de callbacks: OK")
+
+
+def test_edicao_le_do_banco(banco_temporario, disparar):
+    """O modal de edição é preenchido com o registro lido pelo id"""
+
+    print("Testando edição a partir do banco...")
+
+    paciente_id = banco_temporario.execute_insert(
+        "INSERT INTO pacientes (nome, cpf) VALUES (?, ?)", ('Paciente Edição', '314.159.265-35')
+    )
+    disparar({'type': 'btn-edit-paciente', 'index': paciente_id}, valor=1)
+    resultado = edit_paciente([1])
+    assert resultado[0] is True
+    assert resultado[2] == paciente_id
+    assert resultado[3] == 'Paciente Edição'
+
+    medico_id = banco_temporario.execute_insert(
+        "INSERT INTO medicos (nome, crm, especialidade) VALUES (?, ?, ?)", ('Dr. Edição', 'CRM/SP 99001', 'Clínica Geral')
+    )
+    disparar({'type': 'btn-edit-medico', 'index': medico_id}, valor=1)
+    resultado = edit_medico([1])
+    assert resultado[0] is True and resultado[3] == 'Dr. Edição'
+
+    disparar({'type': 'btn-delete-medico', 'index': medico_id}, valor=1)
+    aberto, mensagem, _ = confirm_delete_medico([1], None, False)
+    assert aberto is True and 'Dr. Edição' in str(mensagem)
+
+    disparar({'type': 'btn-edit-medico', 'index': -1}, valor=1)
+    assert edit_medico([1]) is dash.no_update
+
+    print("✅ Edição a partir do banco: OK")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Teste do cálculo do fluxo de caixa diário
+"""
+
+import random
+
+import pandas as pd
+
+from pages.financeiro import calcular_fluxo_caixa
+
+
+def fluxo_dia_a_dia(movimentacoes, start_date, end_date):
+    """Cálculo de referência: um filtro por dia e tipo (implementação anterior)"""
+    linhas = []
+    saldo = 0
+    for data in pd.date_range(start=start_date, end=end_date, freq='D'):
+        data_str = data.strftime('%Y-%m-%d')
+        do_dia = movimentacoes[movimentacoes['data'] == data_str]
+        receita = do_dia.loc[do_dia['tipo'] == 'receita', 'valor'].sum()
+        despesa = do_dia.loc[do_dia['tipo'] == 'despesa', 'valor'].sum()
+        saldo += receita - despesa
+        linhas.append((receita, despesa, saldo))
+    return linhas
+
+
+def movimentacoes_aleatorias(inicio, dias, quantidade, seed=7):
+    """Totais diários sintéticos, no formato de get_financeiro_diario"""
+    random.seed(seed)
+    base = pd.Timestamp(inicio)
+    return pd.DataFrame([
+        {
+            'data': (base + pd.Timedelta(days=random.randrange(dias))).strftime('%Y-%m-%d'),
+            'tipo': random.choice(['receita', 'despesa']),
+            'categoria': random.choice(['consulta', 'aluguel', 'material']),
+            'valor': round(random.uniform(10, 500), 2)
+        }
+        for _ in range(quantidade)
+    ])
+
+
+def test_fluxo_igual_ao_dia_a_dia():
+    """O cálculo vetorizado coincide com o cálculo dia a dia"""
+
+    print("Testando fluxo de caixa...")
+
+    movimentacoes = movimentacoes_aleatorias('2024-01-01', 90, 400)
+    fluxo = calcular_fluxo_caixa(movimentacoes, '2024-01-01', '2024-03-31')
+
+    assert len(fluxo) == 91
+    esperado = fluxo_dia_a_dia(movimentacoes, '2024-01-01', '2024-03-31')
+    for (receita, despesa, saldo), linha in zip(esperado, fluxo.itertuples(index=False)):
+        assert abs(receita - linha.receita) < 1e-6
+        assert abs(despesa - linha.despesa) < 1e-6
+        assert abs(saldo - linha.saldo) < 1e-6
+
+    # Só receitas, e datas do seletor com hora
+    so_receitas = movimentacoes[movimentacoes['tipo'] == 'receita']
+    fluxo = calcular_fluxo_caixa(so_receitas, '2024-01-01T00:00:00', '2024-01-10T00:00:00')
+    assert (fluxo['despesa'] == 0).all()
+    assert fluxo.index[0] == pd.Timestamp('2024-01-01')
+    assert abs(fluxo['saldo'].iloc[-1] - so_receitas.loc[
+        so_receitas['data'] <= '2024-01-10', 'valor'].sum()) < 1e-6
+
+    print("✅ Fluxo de caixa: OK")
+
+
+if __name__ == "__main__":
+    test_fluxo_igual_ao_dia_a_dia()
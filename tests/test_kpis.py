@@ -3,8 +3,12 @@
 Teste específico para verificar se o problema dos KPIs foi resolvido
 """
 
+import os
+import random
 import sys
+import tempfile
 import traceback
+from datetime import datetime, timedelta
 
 def test_kpis():
     """Testa a função get_kpis_dashboard"""
@@ -24,11 +28,11 @@ def test_kpis():
         print(f"KPIs retornados: {kpis}")
         
         # Verificar tipos dos valores
-        for key, value in kpis.items():
+        for key, value in kpis._asdict().items():
             print(f"   {key}: {value} (tipo: {type(value)})")
         
         # Verificar se não há valores None
-        none_values = [k for k, v in kpis.items() if v is None]
+        none_values = [k for k, v in kpis._asdict().items() if v is None]
         if none_values:
             print(f"❌ Valores None encontrados: {none_values}")
             return False
@@ -66,6 +70,105 @@ def test_home_callback():
         traceback.print_exc()
         return False
 
+def kpis_legado(manager):
+    """Caminho anterior: quatro queries, uma conexão emprestada para cada"""
+    from utils.db_manager import filtro_periodo
+
+    periodo, params = filtro_periodo('data_consulta', datetime.now().date().replace(day=1))
+    consultas_mes = manager.execute_query(
+        f"SELECT COUNT(*) as total FROM consultas WHERE {periodo}", params)
+    comparecimento = manager.execute_query(f'''
+        SELECT COUNT(*) as total,
+               COALESCE(SUM(CASE WHEN status = 'concluido' THEN 1 ELSE 0 END), 0) as concluidas
+        FROM consultas WHERE {periodo}
+    ''', params)
+    receita_mes = manager.execute_query(f'''
+        SELECT COALESCE(SUM(valor), 0) as receita FROM consultas
+        WHERE {periodo} AND status = 'concluido'
+    ''', params)
+    pacientes_ativos = manager.execute_query('SELECT COUNT(*) as total FROM pacientes WHERE ativo = 1')
+
+    total = int(comparecimento.iloc[0]['total'])
+    concluidas = int(comparecimento.iloc[0]['concluidas'])
+    return {
+        'consultas_mes': int(consultas_mes.iloc[0]['total']),
+        'taxa_comparecimento': (concluidas / total) * 100 if total else 0.0,
+        'receita_mes': float(receita_mes.iloc[0]['receita']),
+        'pacientes_ativos': int(pacientes_ativos.iloc[0]['total'])
+    }
+
+
+def inserir_consultas(manager, rows, seed=42):
+    """Insere consultas aleatórias entre dois meses atrás e o fim do mês seguinte"""
+    inicio_mes = datetime.now().replace(day=1, hour=8, minute=0, second=0, microsecond=0)
+    status = ['agendado', 'confirmado', 'concluido', 'cancelado']
+    rng = random.Random(seed)
+
+    with manager.connection() as conn:
+        conn.executemany(
+            'INSERT INTO consultas (paciente_id, medico_id, data_consulta, status, valor) VALUES (?, ?, ?, ?, ?)',
+            (
+                (1, 1,
+                 (inicio_mes - timedelta(days=60) + timedelta(minutes=rng.randrange(90 * 24 * 60))).strftime('%Y-%m-%d %H:%M:%S'),
+                 rng.choice(status), rng.choice([150.0, 200.0, None]))
+                for _ in range(rows)
+            )
+        )
+        conn.commit()
+
+
+def test_kpis_equivalentes(rows=2000):
+    """A query agregada devolve os mesmos KPIs que as quatro queries do caminho anterior"""
+
+    print("\n Testando KPIs agregados contra o caminho anterior...")
+
+    from utils.db_manager import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'kpis.db'))
+        inserir_consultas(manager, rows)
+
+        legado = kpis_legado(manager)
+        atual = manager.get_kpis_dashboard()
+        manager.close()
+
+    assert atual.consultas_mes == legado['consultas_mes']
+    assert atual.pacientes_ativos == legado['pacientes_ativos']
+    assert abs(atual.receita_mes - legado['receita_mes']) < 0.01
+    assert abs(atual.taxa_comparecimento - legado['taxa_comparecimento']) < 1e-9
+    print("✅ KPIs agregados: OK")
+
+
+def test_receita_por_mes():
+    """revenue_by_month devolve meses de calendário consecutivos, com zero nos vazios"""
+
+    print("\n Testando receita por mês...")
+
+    from datetime import date
+    from utils.db_manager import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'receita.db'))
+
+        for data_consulta, status, valor in [
+            ('2023-03-01 09:00:00', 'concluido', 100),
+            ('2023-03-31 17:00:00', 'concluido', 50),
+            ('2023-03-15 10:00:00', 'cancelado', 999),
+            ('2023-05-02 10:00:00', 'concluido', 80),
+        ]:
+            manager.execute_insert(
+                'INSERT INTO consultas (paciente_id, medico_id, data_consulta, status, valor) VALUES (1, 1, ?, ?, ?)',
+                (data_consulta, status, valor)
+            )
+
+        receita = manager.revenue_by_month(4, ate=date(2023, 5, 20))
+        manager.close()
+
+    assert [m.isoformat() for m in receita['mes']] == ['2023-02-01', '2023-03-01', '2023-04-01', '2023-05-01']
+    assert receita['receita'].tolist() == [0.0, 150.0, 0.0, 80.0]
+    print("✅ Receita por mês: OK")
+
+
 def main():
     """Função principal de teste"""
     
@@ -78,6 +181,9 @@ def main():
     # Teste 2: Callback da página home
     test2_ok = test_home_callback()
     
+    # Teste 3: Query agregada equivalente ao caminho anterior
+    test_kpis_equivalentes()
+    
     print("\n" + "=" * 50)
     print("RESUMO DOS TESTES:")
     print(f"   Função get_kpis_dashboard: {'✅ OK' if test1_ok else '❌ FALHOU'}")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Teste do sistema de migrações do banco de dados
+"""
+
+import os
+import tempfile
+
+from utils.db_manager import DatabaseManager
+from utils.migrations import MIGRATIONS, apply_migrations, current_version, index_usage_report
+
+
+def test_migracoes_aplicadas():
+    """Um banco novo sai do init_database na última versão do esquema"""
+
+    print("Testando aplicação das migrações...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'migracoes.db'))
+
+        with manager.connection() as conn:
+            assert current_version(conn) == MIGRATIONS[-1][0]
+
+            # Reaplicar não deve fazer nada
+            assert apply_migrations(conn) == []
+
+            indices = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )}
+            for indice in ['idx_consultas_data_status_medico', 'idx_consultas_paciente',
+                           'idx_prontuarios_consulta', 'idx_financeiro_tipo_vencimento_status',
+                           'idx_comunicacao_tipo_status_envio']:
+                assert indice in indices, indice
+            # KPIs lidos de consultas_diario: o índice de cobertura foi removido
+            assert 'idx_consultas_data_status_valor' not in indices
+
+            colunas = [row[1] for row in conn.execute("PRAGMA table_info(prontuarios)")]
+            assert 'medico_id' in colunas
+
+        manager.close()
+
+    print("✅ Migrações: OK")
+
+
+def test_relatorio_de_indices():
+    """Todas as queries críticas usam algum índice"""
+
+    print("Testando relatório de uso de índices...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'explain.db'))
+
+        with manager.connection() as conn:
+            for nome, detalhes in index_usage_report(conn):
+                print(f"   {nome}: {detalhes}")
+                # Tabelas WITHOUT ROWID usam a própria chave primária
+                assert any('INDEX' in d or 'PRIMARY KEY' in d for d in detalhes), nome
+
+        manager.close()
+
+    print("✅ Relatório de índices: OK")
+
+
+def test_totais_diarios():
+    """As triggers mantêm consultas_diario e financeiro_diario iguais à agregação das tabelas"""
+
+    print("Testando totais diários...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'totais.db'))
+
+        for i in range(12):
+            manager.execute_insert(
+                "INSERT INTO consultas (paciente_id, medico_id, data_consulta, status, valor) VALUES (?, ?, ?, ?, ?)",
+                (1, [1, 2, None][i % 3], f"2024-02-0{1 + i % 4} 1{i % 8}:00:00",
+                 ['agendado', 'concluido', None][i % 3], [100, 150.5, None][i % 3])
+            )
+            manager.execute_insert(
+                "INSERT INTO financeiro (tipo, descricao, valor, data_vencimento, status, categoria) VALUES (?, ?, ?, ?, ?, ?)",
+                (['receita', 'despesa'][i % 2], 'Teste', 10 + i, f"2024-02-0{1 + i % 5}",
+                 'pendente', ['consultas', None, 'aluguel'][i % 3])
+            )
+
+        manager.execute_update("UPDATE consultas SET status = 'cancelado', data_consulta = '2024-02-09 08:00:00' WHERE id % 2 = 0", ())
+        manager.execute_update("UPDATE financeiro SET status = 'pago', valor = valor * 2 WHERE tipo = 'receita'", ())
+        manager.execute_update("DELETE FROM consultas WHERE id % 5 = 0", ())
+        manager.execute_update("DELETE FROM financeiro WHERE id % 4 = 0", ())
+
+        with manager.connection() as conn:
+            assert conn.execute('''
+                SELECT dia, medico_id, status, quantidade, quantidade_com_valor, ROUND(valor, 2)
+                FROM consultas_diario ORDER BY 1, 2, 3
+            ''').fetchall() == conn.execute('''
+                SELECT DATE(data_consulta), COALESCE(medico_id, 0), COALESCE(status, ''),
+                       COUNT(*), COUNT(valor), ROUND(COALESCE(SUM(valor), 0), 2)
+                FROM consultas GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+            ''').fetchall()
+
+            assert conn.execute('''
+                SELECT dia, tipo, categoria, status, quantidade, quantidade_com_valor, ROUND(valor, 2)
+                FROM financeiro_diario ORDER BY 1, 2, 3, 4
+            ''').fetchall() == conn.execute('''
+                SELECT DATE(data_vencimento), tipo, COALESCE(categoria, ''), COALESCE(status, ''),
+                       COUNT(*), COUNT(valor), ROUND(SUM(valor), 2)
+                FROM financeiro GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+            ''').fetchall()
+
+        manager.close()
+
+    print("✅ Totais diários: OK")
+
+
+def test_resumo_medicos_e_horarios():
+    """O resumo por médico tem a média do AVG; os horários contam canceladas se pedido"""
+
+    print("Testando resumo por médico e horários de pico...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'resumo.db'))
+        manager.execute_update("DELETE FROM consultas", ())
+
+        for data_consulta, status, valor in [
+            ('2024-03-04 09:00:00', 'concluido', 100),
+            ('2024-03-04 09:30:00', 'concluido', 200),
+            ('2024-03-05 10:00:00', 'agendado', None),
+            ('2024-03-06 10:00:00', 'cancelado', None),
+            ('2024-03-07 11:00:00', None, None),
+        ]:
+            manager.execute_insert(
+                "INSERT INTO consultas (paciente_id, medico_id, data_consulta, status, valor) VALUES (1, 1, ?, ?, ?)",
+                (data_consulta, status, valor)
+            )
+
+        resumo = manager.get_resumo_medicos('2024-03-01', '2024-03-31').set_index('medico')
+        with manager.connection() as conn:
+            nome, media = conn.execute(
+                "SELECT m.nome, AVG(c.valor) FROM consultas c JOIN medicos m ON m.id = c.medico_id GROUP BY m.id"
+            ).fetchone()
+        assert resumo.loc[nome, 'total_consultas'] == 5
+        # Consultas sem valor não entram na média, como no AVG
+        assert resumo.loc[nome, 'valor_medio'] == media == 150
+
+        sem_canceladas = manager.get_agendamentos_dia_hora('2024-03-01', '2024-03-31')
+        todas = manager.get_agendamentos_dia_hora('2024-03-01', '2024-03-31', incluir_cancelados=True)
+        # Consultas sem status não são canceladas
+        assert sem_canceladas['total'].sum() == 4
+        assert todas['total'].sum() == 5
+        manager.close()
+
+    print("✅ Resumo por médico e horários: OK")
+
+
+if __name__ == "__main__":
+    test_migracoes_aplicadas()
+    test_relatorio_de_indices()
+    test_totais_diarios()
+    test_resumo_medicos_e_horarios()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Teste da listagem paginada de pacientes
+"""
+
+import os
+import tempfile
+
+from utils.db_manager import ORDENACOES_PACIENTES, DatabaseManager
+
+
+def test_paginacao_por_chave():
+    """Percorrer todas as páginas devolve cada paciente uma única vez, na ordem pedida"""
+
+    print("Testando paginação por chave...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'paginacao.db'))
+
+        with manager.connection() as conn:
+            # Nomes repetidos exigem o id como critério de desempate
+            conn.executemany(
+                "INSERT INTO pacientes (nome, cpf, ativo) VALUES (?, ?, ?)",
+                [(f"Paciente {i % 40:02d}", f"{10**10 + i}", i % 4 != 0) for i in range(250)]
+            )
+            conn.commit()
+
+        for ordem in ORDENACOES_PACIENTES:
+            vistos = []
+            apos = None
+            paginas = 0
+            while True:
+                pagina = manager.get_pacientes_pagina(ativo=True, ordem=ordem, apos=apos, limite=30)
+                assert len(pagina.registros) <= 30
+                vistos.extend(pagina.registros[['nome', 'id']].itertuples(index=False, name=None))
+                paginas += 1
+                apos = pagina.proxima_chave
+                if apos is None:
+                    break
+
+            colunas, direcao = ORDENACOES_PACIENTES[ordem]
+            esperado = manager.execute_query(f'''
+                SELECT nome, id FROM pacientes WHERE ativo = 1
+                ORDER BY {', '.join(f"{c} {direcao}" for c in colunas)}
+            ''')
+            assert vistos == list(esperado.itertuples(index=False, name=None)), ordem
+            assert pagina.total == len(esperado)
+            assert paginas == -(-len(esperado) // 30)
+
+        busca = manager.get_pacientes_pagina(busca='Paciente 07')
+        assert busca.total == len(busca.registros) > 0
+        assert busca.proxima_chave is None
+
+        manager.close()
+
+    print("✅ Paginação por chave: OK")
+
+
+if __name__ == "__main__":
+    test_paginacao_por_chave()
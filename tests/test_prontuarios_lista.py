@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Teste da lista de pacientes da página de prontuários
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+from pages.prontuarios import PACIENTES_POR_PAGINA, salvar_prontuario, update_lista_pacientes
+from utils.db_manager import DatabaseManager
+
+
+def test_total_consultas_agrupado():
+    """A contagem agrupada coincide com a contagem paciente a paciente"""
+
+    print("Testando contagem agrupada de consultas...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'prontuarios.db'))
+
+        with manager.connection() as conn:
+            conn.executemany(
+                "INSERT INTO pacientes (nome, cpf) VALUES (?, ?)",
+                [(f"Paciente {i:03d}", f"{10**10 + i}") for i in range(120)]
+            )
+            conn.executemany(
+                "INSERT INTO consultas (paciente_id, medico_id, data_consulta) VALUES (?, ?, '2024-01-01 09:00:00')",
+                [(1 + i % 90, 1 + i % 3) for i in range(400)]
+            )
+            conn.commit()
+
+            ids = [row[0] for row in conn.execute("SELECT id FROM pacientes")]
+            esperado = {
+                paciente_id: conn.execute(
+                    "SELECT COUNT(*) FROM consultas WHERE paciente_id = ?", (paciente_id,)
+                ).fetchone()[0]
+                for paciente_id in ids
+            }
+
+            # Uma única query (além das contagens já em cache)
+            queries = []
+            conn.set_trace_callback(queries.append)
+            assert manager.get_total_consultas(ids) == esperado
+            conn.set_trace_callback(None)
+            assert len(queries) == 1
+
+        assert manager.get_total_consultas([]) == {}
+
+        # Filtro por médico: apenas pacientes com consultas dele
+        pagina = manager.get_pacientes_pagina(ativo=True, medico_id=2, limite=500)
+        with manager.connection() as conn:
+            com_medico = {row[0] for row in conn.execute(
+                "SELECT DISTINCT paciente_id FROM consultas WHERE medico_id = 2"
+            )}
+        assert set(pagina.registros['id']) == com_medico
+        assert pagina.total == len(com_medico)
+
+        manager.close()
+
+    print("✅ Contagem agrupada de consultas: OK")
+
+
+def test_lista_paginada(banco_temporario, disparar):
+    """A lista abre só com a primeira página e 'Carregar mais' acrescenta a seguinte"""
+
+    print("Testando lista paginada de prontuários...")
+
+    with banco_temporario.connection() as conn:
+        conn.execute("DELETE FROM pacientes")
+        conn.executemany(
+            "INSERT INTO pacientes (nome, cpf) VALUES (?, ?)",
+            [(f"Paciente {i:03d}", f"{10**10 + i}") for i in range(PACIENTES_POR_PAGINA + 5)]
+        )
+        conn.commit()
+
+        queries = []
+        conn.set_trace_callback(queries.append)
+        disparar('dropdown-filtro-medico', 'value')
+        lista, estado, botao = update_lista_pacientes(None, None, None, None, None, None)
+        conn.set_trace_callback(None)
+
+    assert len(lista.children) == PACIENTES_POR_PAGINA
+    # Página e contagens: a quantidade de queries não depende do número de pacientes
+    assert len(queries) <= 3, queries
+
+    assert estado['proxima'] is not None and botao == {}
+    disparar('btn-carregar-mais-pacientes')
+    patch, estado, _ = update_lista_pacientes(None, None, None, 1, None, estado)
+    operacao, = patch.to_plotly_json()['operations']
+    assert operacao['operation'] == 'Extend' and len(operacao['params']['value']) == 5
+    assert estado['proxima'] is None
+
+    print("✅ Lista paginada de prontuários: OK")
+
+
+def test_historico_paginado():
+    """O histórico vem em páginas de resumos, da consulta mais recente para a mais antiga"""
+
+    print("Testando histórico paginado...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'historico.db'))
+
+        with manager.connection() as conn:
+            medico_id = conn.execute("SELECT id FROM medicos LIMIT 1").fetchone()[0]
+            # Horários repetidos exigem o id como critério de desempate
+            conn.executemany(
+                "INSERT INTO consultas (paciente_id, medico_id, data_consulta, status, observacoes) VALUES (?, ?, ?, ?, ?)",
+                [(999, medico_id, f"2023-{1 + i % 12:02d}-10 09:00:00", 'concluido', f"Obs {i}") for i in range(300)]
+            )
+            consulta_id = conn.execute("SELECT MAX(id) FROM consultas WHERE paciente_id = 999").fetchone()[0]
+            conn.execute(
+                "INSERT INTO prontuarios (paciente_id, consulta_id, anamnese, diagnostico) VALUES (?, ?, ?, ?)",
+                (999, consulta_id, 'Dor de cabeça', 'Enxaqueca ' * 50)
+            )
+            conn.commit()
+
+            esperado = [row[0] for row in conn.execute(
+                "SELECT id FROM consultas WHERE paciente_id = 999 ORDER BY data_consulta DESC, id DESC"
+            )]
+
+        vistos = []
+        antes = None
+        while True:
+            pagina = manager.get_historico_paciente(999, antes=antes, limite=25)
+            assert len(pagina.registros) <= 25
+            vistos.extend(pagina.registros['id'])
+            antes = pagina.proxima_chave
+            if antes is None:
+                break
+        assert vistos == esperado
+
+        primeira = manager.get_historico_paciente(999, limite=25).registros.set_index('id')
+        assert 'anamnese' not in primeira.columns
+        assert primeira.loc[consulta_id, 'tem_prontuario'] == 1
+        assert len(primeira.loc[consulta_id, 'diagnostico_resumo']) == 120
+
+        prontuario = manager.get_prontuario_consulta(consulta_id)
+        assert prontuario['anamnese'] == 'Dor de cabeça'
+        assert prontuario['observacoes'] == 'Obs 299'
+        assert manager.get_prontuario_consulta(esperado[-1])['anamnese'] is None
+        assert manager.get_prontuario_consulta(-1) is None
+
+        manager.close()
+
+    print("✅ Histórico paginado: OK")
+
+
+def test_salvar_prontuario(banco_temporario):
+    """O prontuário só é salvo para uma consulta do paciente selecionado"""
+
+    print("Testando gravação do prontuário...")
+
+    with banco_temporario.connection() as conn:
+        conn.executemany(
+            "INSERT INTO pacientes (id, nome, cpf) VALUES (?, ?, ?)",
+            [(901, 'Paciente A', '10000000901'), (902, 'Paciente B', '10000000902')]
+        )
+        conn.execute(
+            "INSERT INTO consultas (id, paciente_id, medico_id, data_consulta, status) "
+            "VALUES (9001, 901, 1, '2030-01-07 09:00:00', 'concluido')"
+        )
+        conn.commit()
+
+    alerta = salvar_prontuario(1, 9001, 'Anamnese', '', 'Diagnóstico', '', 902)
+    assert 'não encontrada' in str(alerta)
+    alerta = salvar_prontuario(1, -1, 'Anamnese', '', 'Diagnóstico', '', 901)
+    assert 'não encontrada' in str(alerta)
+
+    alerta = salvar_prontuario(1, 9001, 'Anamnese', '', 'Diagnóstico', '', 901)
+    assert 'sucesso' in str(alerta)
+    with banco_temporario.connection() as conn:
+        assert conn.execute(
+            "SELECT paciente_id, consulta_id, diagnostico FROM prontuarios WHERE consulta_id = 9001"
+        ).fetchall() == [(901, 9001, 'Diagnóstico')]
+
+    print("✅ Gravação do prontuário: OK")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
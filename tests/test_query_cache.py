@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Teste do cache de resultados de queries
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from utils.db_manager import DatabaseManager
+from utils.query_cache import QueryCache, tables_in
+from utils.repositories import MedicoRepo, PacienteRepo
+
+
+def test_tabelas_da_query():
+    """As tabelas lidas e escritas são extraídas da query"""
+
+    print("Testando extração de tabelas...")
+
+    assert tables_in('''
+        SELECT c.*, p.nome FROM consultas c
+        JOIN pacientes p ON c.paciente_id = p.id
+    ''') == {'consultas', 'pacientes'}
+    assert tables_in("INSERT INTO financeiro (tipo) VALUES (?)") == {'financeiro'}
+    assert tables_in("UPDATE medicos SET ativo = 0 WHERE id = ?") == {'medicos'}
+    assert tables_in("DELETE FROM prontuarios WHERE id = ?") == {'prontuarios'}
+
+    print("✅ Extração de tabelas: OK")
+
+
+def test_ttl_e_lru():
+    """Entradas expiram após o TTL e as menos usadas saem primeiro"""
+
+    print("Testando TTL e LRU...")
+
+    cache = QueryCache(ttl=0.05, max_entries=2)
+    calculos = []
+
+    def calcular(valor):
+        calculos.append(valor)
+        return valor
+
+    assert cache.get_or_compute('a', lambda: calcular(1)) == 1
+    assert cache.get_or_compute('a', lambda: calcular(2)) == 1
+    assert calculos == [1]
+    assert 'a' in cache and 'z' not in cache
+
+    time.sleep(0.06)
+    assert 'a' not in cache
+    assert cache.get_or_compute('a', lambda: calcular(3)) == 3
+
+    cache.get_or_compute('b', lambda: calcular(4), ttl=10)
+    cache.get_or_compute('a', lambda: calcular(5), ttl=10)
+    cache.get_or_compute('c', lambda: calcular(6), ttl=10)
+    assert cache.get('b') == (False, None)
+    assert cache.get('a')[0] and cache.get('c')[0]
+
+    print("✅ TTL e LRU: OK")
+
+
+def test_single_flight():
+    """Threads simultâneas compartilham um único cálculo"""
+
+    print("Testando cálculo único entre threads...")
+
+    cache = QueryCache(ttl=10)
+    calculos = []
+    liberar = threading.Event()
+
+    def lento():
+        calculos.append(1)
+        liberar.wait(1)
+        return 'kpis'
+
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda: resultados.append(cache.get_or_compute('kpis', lento)))
+        for _ in range(10)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    liberar.set()
+    for t in threads:
+        t.join()
+
+    assert calculos == [1]
+    assert resultados == ['kpis'] * 10
+
+    print("✅ Cálculo único: OK")
+
+
+def test_invalidacao_por_chave():
+    """Só as chaves informadas saem, e um cálculo em andamento delas não é guardado"""
+
+    print("Testando invalidação por chave...")
+
+    cache = QueryCache(ttl=10)
+    cache.get_or_compute('seg', lambda: 'seg', ('agenda',))
+    cache.get_or_compute('ter', lambda: 'ter', ('agenda',))
+
+    cache.invalidate_keys(['seg', 'qua'])
+    assert 'seg' not in cache and 'ter' in cache
+
+    # A escrita termina enquanto a leitura anterior a ela ainda calcula
+    lendo = threading.Event()
+    liberar = threading.Event()
+
+    def lento():
+        lendo.set()
+        liberar.wait(1)
+        return 'antigo'
+
+    resultados = []
+    leitura = threading.Thread(target=lambda: resultados.append(cache.get_or_compute('seg', lento, ('agenda',))))
+    leitura.start()
+    lendo.wait(1)
+    cache.invalidate_keys(['seg'])
+    liberar.set()
+    leitura.join()
+
+    assert resultados == ['antigo']
+    assert 'seg' not in cache
+    assert cache.get_or_compute('seg', lambda: 'novo', ('agenda',)) == 'novo'
+    assert cache.get_or_compute('seg', lambda: 'outro', ('agenda',)) == 'novo'
+
+    print("✅ Invalidação por chave: OK")
+
+
+def test_invalidacao_na_escrita():
+    """Escritas pelo DatabaseManager invalidam as queries das tabelas afetadas"""
+
+    print("Testando invalidação por escrita...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'cache.db'))
+        query = "SELECT COUNT(*) as total FROM comunicacao"
+
+        antes = manager.cached_query(query).iloc[0]['total']
+        manager.cached_query("SELECT COUNT(*) as total FROM medicos")
+        kpis = manager.get_kpis_dashboard()
+        assert len(manager.cache) == 3
+
+        manager.execute_insert(
+            "INSERT INTO comunicacao (tipo, mensagem) VALUES (?, ?)", ('mensagem', 'teste')
+        )
+
+        # Apenas a entrada de comunicacao é removida
+        assert len(manager.cache) == 2
+        assert manager.cached_query(query).iloc[0]['total'] == antes + 1
+        assert manager.get_kpis_dashboard() is kpis
+
+        manager.execute_update("UPDATE pacientes SET ativo = 0 WHERE id = ?", (1,))
+        assert manager.get_kpis_dashboard().pacientes_ativos == kpis.pacientes_ativos - 1
+
+        # O DataFrame devolvido é uma cópia
+        df = manager.cached_query(query)
+        df['total'] = -1
+        assert manager.cached_query(query).iloc[0]['total'] == antes + 1
+
+        manager.close()
+
+    print("✅ Invalidação por escrita: OK")
+
+
+def test_leitura_por_id():
+    """Leituras por chave primária vêm do cache até a próxima escrita na tabela"""
+
+    print("Testando leitura por id...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'por_id.db'))
+        pacientes = PacienteRepo(manager)
+        medicos = MedicoRepo(manager)
+        paciente_id = manager.execute_insert(
+            "INSERT INTO pacientes (nome, cpf) VALUES (?, ?)", ('Ana Lima', '12345678909')
+        )
+
+        paciente = pacientes.por_id(paciente_id)
+        assert paciente.nome == 'Ana Lima' and paciente.id == paciente_id
+
+        hits = manager.cache.hits
+        assert pacientes.por_id(str(paciente_id)) == paciente
+        assert manager.cache.hits == hits + 1
+
+        # O registro em cache é imutável
+        try:
+            paciente.nome = 'Alterado'
+            assert False, "NamedTuple não deveria aceitar atribuição"
+        except AttributeError:
+            pass
+        assert pacientes.por_id(paciente_id).nome == 'Ana Lima'
+
+        # Escrita em medicos não afeta a entrada; em pacientes, invalida
+        manager.execute_update("UPDATE medicos SET ativo = 1", ())
+        hits = manager.cache.hits
+        pacientes.por_id(paciente_id)
+        assert manager.cache.hits == hits + 1
+
+        manager.execute_update("UPDATE pacientes SET nome = ? WHERE id = ?", ('Ana Souza', paciente_id))
+        assert pacientes.por_id(paciente_id).nome == 'Ana Souza'
+
+        manager.execute_update("DELETE FROM pacientes WHERE id = ?", (paciente_id,))
+        assert pacientes.por_id(paciente_id) is None
+        assert medicos.por_id(-1) is None
+
+        manager.close()
+
+    print("✅ Leitura por id: OK")
+
+
+if __name__ == "__main__":
+    test_tabelas_da_query()
+    test_ttl_e_lru()
+    test_single_flight()
+    test_invalidacao_por_chave()
+    test_invalidacao_na_escrita()
+    test_leitura_por_id()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Teste dos repositórios dos caminhos transacionais
+"""
+
+import os
+import tempfile
+
+from utils.db_manager import DatabaseManager
+from utils.repositories import Consulta, ConsultaRepo, MedicoRepo, Paciente, PacienteRepo
+
+
+def test_crud_paciente():
+    """Inserção, leitura, atualização e exclusão devolvem NamedTuples e mantêm o cache coerente"""
+
+    print("Testando CRUD do repositório de pacientes...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'repos.db'))
+        pacientes = PacienteRepo(manager)
+        medicos = MedicoRepo(manager)
+
+        paciente_id = pacientes.inserir(nome='Zuleica Lima', cpf='12345678909', ativo=1)
+        paciente = pacientes.por_id(paciente_id)
+        assert isinstance(paciente, Paciente)
+        assert (paciente.id, paciente.nome, paciente.ativo) == (paciente_id, 'Zuleica Lima', 1)
+        assert not hasattr(paciente, '__dict__')
+
+        # Segunda leitura vem do cache, inclusive com o id como texto
+        hits = manager.cache.hits
+        assert pacientes.por_id(str(paciente_id)) is paciente
+        assert manager.cache.hits == hits + 1
+
+        # Escrita em outra tabela não afeta a entrada; na própria tabela, invalida
+        manager.execute_update("UPDATE medicos SET ativo = 1", ())
+        assert pacientes.por_id(paciente_id) is paciente
+
+        assert pacientes.atualizar(paciente_id, nome='Zuleica Souza') == 1
+        assert pacientes.por_id(paciente_id).nome == 'Zuleica Souza'
+
+        assert pacientes.cpf_em_uso('12345678909')
+        assert not pacientes.cpf_em_uso('12345678909', exceto_id=paciente_id)
+        assert pacientes.contar('nome LIKE ?', ('Zuleica%',)) == 1
+
+        consultas = ConsultaRepo(manager)
+        consulta_id = consultas.inserir(paciente_id=paciente_id, medico_id=1, data_consulta='2030-01-07 09:00:00')
+        consulta = consultas.por_id(consulta_id)
+        assert isinstance(consulta, Consulta)
+        assert (consulta.paciente_id, consulta.status) == (paciente_id, 'agendado')
+        consultas.excluir(consulta_id)
+
+        pacientes.excluir(paciente_id)
+        assert pacientes.por_id(paciente_id) is None
+        assert medicos.por_id(-1) is None
+        assert not medicos.crm_em_uso('CRM/XX 000000')
+
+        manager.close()
+
+    print("✅ CRUD do repositório de pacientes: OK")
+
+
+if __name__ == "__main__":
+    test_crud_paciente()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Teste da verificação de vínculos antes da exclusão de pacientes e médicos
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+from utils.db_manager import DatabaseManager
+from utils.relational_checks import can_delete_doctor, can_delete_patient, deletable_doctors, deletable_patients
+from utils.repositories import MedicoRepo, PacienteRepo
+
+
+def test_vinculos_em_uma_query():
+    """Todos os vínculos de vários ids saem de uma única query"""
+
+    print("Testando vínculos em lote...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'vinculos.db'))
+        pacientes = PacienteRepo(manager)
+        medicos = MedicoRepo(manager)
+
+        with manager.connection() as conn:
+            conn.executemany(
+                "INSERT INTO pacientes (id, nome, cpf) VALUES (?, ?, ?)",
+                [(9000 + i, f"Paciente {i:03d}", f"{10**10 + i}") for i in range(500)]
+            )
+            conn.execute("INSERT INTO medicos (id, nome, crm) VALUES (9000, 'Dr. Livre', 'CRM/SP 9000')")
+            conn.execute("INSERT INTO medicos (id, nome, crm) VALUES (9001, 'Dr. Ocupado', 'CRM/SP 9001')")
+            # 9000: consulta e prontuário; 9001: só comunicação; os demais, livres
+            conn.execute("INSERT INTO consultas (id, paciente_id, medico_id) VALUES (9000, 9000, 9001)")
+            conn.execute("INSERT INTO prontuarios (paciente_id, consulta_id, medico_id) VALUES (9000, 9000, 9001)")
+            conn.execute("INSERT INTO comunicacao (paciente_id, tipo, mensagem) VALUES (9001, 'lembrete', 'Consulta amanhã')")
+            conn.commit()
+
+            ids = list(range(9000, 9500))
+            queries = []
+            conn.set_trace_callback(queries.append)
+            vinculos = pacientes.vinculos(ids)
+            conn.set_trace_callback(None)
+            assert len(queries) == 1, queries
+
+        assert vinculos[9000] == {'consultas': True, 'prontuarios': True, 'comunicacoes': False}
+        assert vinculos[9001] == {'consultas': False, 'prontuarios': False, 'comunicacoes': True}
+        livres = [i for i, flags in vinculos.items() if not any(flags.values())]
+        assert livres == ids[2:]
+
+        assert medicos.vinculos(['9000', 9001]) == {
+            9000: {'consultas': False, 'prontuarios': False},
+            9001: {'consultas': True, 'prontuarios': True},
+        }
+        assert pacientes.vinculos([]) == {}
+
+        # Um único registro (exclusão pela tela): quantidades, também em uma query
+        with manager.connection() as conn:
+            conn.execute("INSERT INTO consultas (paciente_id, medico_id) VALUES (9000, 9000)")
+            conn.commit()
+        assert pacientes.contar_vinculos(9000) == {'consultas': 2, 'prontuarios': 1, 'comunicacoes': 0}
+        assert medicos.contar_vinculos('9001') == {'consultas': 1, 'prontuarios': 1}
+
+        manager.close()
+
+    print("✅ Vínculos em lote: OK")
+
+
+def test_verificador_de_exclusao(banco_temporario):
+    """O verificador informa quais registros têm vínculos e quantos"""
+
+    print("Testando verificador de exclusão...")
+
+    with banco_temporario.connection() as conn:
+        conn.executemany(
+            "INSERT INTO pacientes (id, nome, cpf) VALUES (?, ?, ?)",
+            [(8000 + i, f"Paciente {i}", f"{10**10 + 8000 + i}") for i in range(4)]
+        )
+        conn.executemany(
+            "INSERT INTO medicos (id, nome, crm) VALUES (?, ?, ?)",
+            [(8000, 'Dr. Ocupado', 'CRM/SP 8000'), (8001, 'Dr. Livre', 'CRM/SP 8001')]
+        )
+        # 8000: duas consultas e um prontuário; 8001: uma comunicação; 8002 e 8003, livres
+        conn.executemany(
+            "INSERT INTO consultas (id, paciente_id, medico_id) VALUES (?, 8000, 8000)", [(8000,), (8001,)]
+        )
+        conn.execute("INSERT INTO prontuarios (paciente_id, consulta_id, medico_id) VALUES (8000, 8000, 8000)")
+        conn.execute("INSERT INTO comunicacao (paciente_id, tipo, mensagem) VALUES (8001, 'lembrete', 'Consulta amanhã')")
+        conn.commit()
+
+    assert deletable_patients([8000, 8001, 8002, 8003]) == [8002, 8003]
+    assert deletable_doctors([8000, 8001]) == [8001]
+
+    # A exclusão de um registro informa quantos registros o referenciam
+    resultado = can_delete_patient(8000)
+    assert not resultado['can_delete']
+    assert resultado['dependencies'] == ["2 consulta(s)", "1 prontuário(s)"]
+    assert resultado['message'] == (
+        "Não é possível excluir o paciente, pois está vinculado a: 2 consulta(s), 1 prontuário(s)."
+    )
+    assert can_delete_patient(8001)['dependencies'] == ["1 comunicação(ões)"]
+    assert can_delete_patient(8002) == {
+        'can_delete': True, 'dependencies': [], 'message': "Paciente pode ser excluído com segurança."
+    }
+    assert can_delete_doctor(8000)['dependencies'] == ["2 consulta(s)", "1 prontuário(s)"]
+    assert can_delete_doctor(8001)['can_delete']
+
+    print("✅ Verificador de exclusão: OK")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
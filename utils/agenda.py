@@ -0,0 +1,526 @@
+"""
+Disponibilidade de horários dos médicos
+
+Os horários livres de um médico em um dia saem do horário de atendimento
+cadastrado (medicos.horario_atendimento), da duração da consulta
+(medicos.duracao_consulta) e das consultas já marcadas. A ocupação de cada
+médico em cada dia é um índice de intervalos em memória, guardado no cache
+de resultados do DatabaseManager e invalidado por qualquer escrita em
+consultas, inclusive pelas reservas feitas aqui.
+
+A reserva confere o conflito de novo dentro de uma transação BEGIN IMMEDIATE,
+de modo que duas reservas simultâneas do mesmo horário não passam ambas.
+"""
+
+import calendar
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Optional
+
+from config import SCHEDULE_CONFIG
+from utils.db_manager import DERIVED_CACHES, ROLLUP_TABLES, db_manager, filtro_periodo, normalizar_data
+
+logger = logging.getLogger(__name__)
+
+DURACAO_PADRAO = SCHEDULE_CONFIG.get('default_duration_minutes', 30)
+HORARIO_PADRAO = SCHEDULE_CONFIG.get('default_working_hours', 'Segunda a Sexta: 08:00 às 18:00')
+STATUS_LIVRES = tuple(SCHEDULE_CONFIG.get('free_statuses', ['cancelado']))
+MAX_OCORRENCIAS = SCHEDULE_CONFIG.get('max_series_occurrences', 52)
+
+# Intervalo entre as consultas de uma série
+FREQUENCIAS = {
+    'diaria': timedelta(days=1),
+    'semanal': timedelta(weeks=1),
+    'quinzenal': timedelta(weeks=2),
+    'mensal': 'mensal',  # mesmo dia do mês
+}
+
+# Escritas que invalidam a ocupação em cache: médicos e qualquer escrita em
+# consultas (DERIVED_CACHES); as reservas invalidam só os dias reservados
+TABELAS_AGENDA = DERIVED_CACHES['consultas'] + ('medicos',)
+
+DIAS_SEMANA = {'seg': 0, 'ter': 1, 'qua': 2, 'qui': 3, 'sex': 4, 'sab': 5, 'dom': 6}
+
+_DIA = re.compile(r'\b(seg|ter|qua|qui|sex|sab|dom)[a-z]*(?:[- ]feira)?', re.IGNORECASE)
+_ATE = re.compile(r'^\s*(?:a|ate|-|–)\s*$')
+_FAIXA = re.compile(
+    r'(\d{1,2})(?:[:h](\d{2}))?h?\s*(?:as|a|ate|-|–)\s*(\d{1,2})(?:[:h](\d{2}))?h?'
+)
+
+
+class ConflitoDeHorario(Exception):
+    """O horário pedido não está livre na agenda do médico"""
+
+
+class Pedido(NamedTuple):
+    """Consulta a reservar"""
+    paciente_id: int
+    medico_id: int
+    inicio: datetime
+
+
+class Ocorrencia(NamedTuple):
+    """Resultado da reserva de um Pedido"""
+    paciente_id: int
+    medico_id: int
+    inicio: datetime
+    consulta_id: Optional[int] = None  # None quando não agendada
+    conflito: Optional[str] = None  # motivo da recusa
+
+
+class Expediente(NamedTuple):
+    """Horário de atendimento de um médico"""
+    duracao: int  # minutos por consulta
+    faixas: tuple  # por dia da semana (0 = segunda): ((inicio, fim), ...) em minutos
+
+    def atende(self, dia_semana, inicio, fim):
+        """Indica se o intervalo cabe inteiro em uma faixa de atendimento"""
+        return any(a <= inicio and fim <= b for a, b in self.faixas[dia_semana])
+
+
+def _sem_acentos(texto):
+    return ''.join(
+        c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c)
+    ).lower()
+
+
+def interpretar_horario(texto):
+    """
+    Converte o horário de atendimento digitado em faixas por dia da semana
+
+    Aceita trechos como "Segunda a Sexta: 08:00 às 12:00 e 14:00 às 18:00",
+    separados por linha ou ponto e vírgula. Trechos sem dias valem de
+    segunda a sexta.
+
+    Returns:
+        tuple: 7 tuplas de (inicio, fim) em minutos, ou None se nada foi reconhecido
+    """
+    faixas = [[] for _ in DIAS_SEMANA]
+    reconhecido = False
+
+    for trecho in re.split(r'[\n;|]', _sem_acentos(texto or '')):
+        horas = list(_FAIXA.finditer(trecho))
+        if not horas:
+            continue
+
+        # Dias antes do primeiro horário: "seg a sex", "seg, qua e sex", "sabado"
+        parte_dias = trecho[:horas[0].start()]
+        nomes = list(_DIA.finditer(parte_dias))
+        dias = set()
+        for i, nome in enumerate(nomes):
+            dia = DIAS_SEMANA[nome.group(1)]
+            dias.add(dia)
+            anterior = nomes[i - 1] if i else None
+            if anterior and _ATE.match(parte_dias[anterior.end():nome.start()]):
+                inicio = DIAS_SEMANA[anterior.group(1)]
+                dias.update((inicio + k) % 7 for k in range((dia - inicio) % 7 + 1))
+        if not dias:
+            dias = set(range(5))
+
+        for hora in horas:
+            h1, m1, h2, m2 = hora.groups()
+            inicio, fim = int(h1) * 60 + int(m1 or 0), int(h2) * 60 + int(m2 or 0)
+            if inicio < fim <= 24 * 60:
+                reconhecido = True
+                for dia in dias:
+                    faixas[dia].append((inicio, fim))
+
+    if not reconhecido:
+        return None
+    return tuple(tuple(sorted(f)) for f in faixas)
+
+
+def expandir_recorrencia(inicio, frequencia, ocorrencias):
+    """
+    Datas de uma consulta recorrente
+
+    Args:
+        inicio (datetime): Primeira consulta
+        frequencia (str): Chave de FREQUENCIAS
+        ocorrencias (int): Quantidade de consultas (limitada por MAX_OCORRENCIAS)
+
+    Returns:
+        list: Datas e horas de cada consulta
+    """
+    passo = FREQUENCIAS[frequencia]
+    datas = []
+    for n in range(min(int(ocorrencias), MAX_OCORRENCIAS)):
+        if passo == 'mensal':
+            # Mesmo dia do mês; em meses mais curtos, o último dia
+            ano, mes = divmod(inicio.month - 1 + n, 12)
+            ano += inicio.year
+            dia = min(inicio.day, calendar.monthrange(ano, mes + 1)[1])
+            datas.append(inicio.replace(year=ano, month=mes + 1, day=dia))
+        else:
+            datas.append(inicio + passo * n)
+    return datas
+
+
+class DiaAgenda:
+    """Intervalos ocupados de um médico em um dia, disjuntos e ordenados
+
+    Imutável depois de criado: ``com`` retorna uma nova ocupação, então a
+    instância em cache pode ser lida por várias threads.
+    """
+
+    __slots__ = ('inicios', 'fins')
+
+    def __init__(self, inicios=(), fins=()):
+        self.inicios = list(inicios)
+        self.fins = list(fins)
+
+    @classmethod
+    def de_intervalos(cls, intervalos):
+        """Cria a ocupação a partir de intervalos quaisquer (sobrepostos são unidos)"""
+        inicios, fins = [], []
+        for inicio, fim in sorted(intervalos):
+            if fins and inicio < fins[-1]:
+                fins[-1] = max(fins[-1], fim)
+            else:
+                inicios.append(inicio)
+                fins.append(fim)
+        return cls(inicios, fins)
+
+    def conflita(self, inicio, fim):
+        """Indica se [inicio, fim) se sobrepõe a algum intervalo ocupado"""
+        # Primeiro intervalo que termina depois do início pedido
+        i = bisect_right(self.fins, inicio)
+        return i < len(self.inicios) and self.inicios[i] < fim
+
+    def com(self, inicio, fim):
+        """Nova ocupação com [inicio, fim) incluído (que não pode conflitar)"""
+        i = bisect_left(self.inicios, inicio)
+        return DiaAgenda(
+            self.inicios[:i] + [inicio] + self.inicios[i:],
+            self.fins[:i] + [fim] + self.fins[i:]
+        )
+
+    def __len__(self):
+        return len(self.inicios)
+
+
+def _minutos(valor):
+    """Minutos desde a meia-noite de um 'YYYY-MM-DD HH:MM[:SS]'"""
+    if len(valor) < 16:
+        return 0  # só a data: considerada no início do dia
+    return int(valor[11:13]) * 60 + int(valor[14:16])
+
+
+def _hhmm(minutos):
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+class AgendaMedicos:
+    """Horários livres e reservas de consultas por médico"""
+
+    def __init__(self, manager=None):
+        self.manager = manager or db_manager
+
+    def expediente(self, medico_id):
+        """Retorna o Expediente do médico (padrão da clínica se não cadastrado)"""
+        medico_id = int(medico_id)
+
+        def ler():
+            with self.manager.connection() as conn:
+                linha = conn.execute(
+                    "SELECT duracao_consulta, horario_atendimento FROM medicos WHERE id = ?",
+                    (medico_id,)
+                ).fetchone()
+            duracao, horario = linha if linha else (None, None)
+            faixas = interpretar_horario(horario) or interpretar_horario(HORARIO_PADRAO)
+            return Expediente(int(duracao or DURACAO_PADRAO), faixas)
+
+        return self.manager.cache.get_or_compute(('agenda_expediente', medico_id), ler, ('medicos',))
+
+    def _ler_ocupacoes(self, conn, chaves):
+        """
+        Lê a ocupação de vários (medico_id, dia) em uma única query
+
+        Returns:
+            dict: {(medico_id, dia): DiaAgenda}
+        """
+        chaves = set(chaves)
+        medicos = sorted({medico_id for medico_id, _ in chaves})
+        dias = [dia for _, dia in chaves]
+        duracoes = {medico_id: self.expediente(medico_id).duracao for medico_id in medicos}
+
+        periodo, params = filtro_periodo('data_consulta', min(dias), max(dias))
+        linhas = conn.execute(f'''
+            SELECT medico_id, data_consulta FROM consultas
+            WHERE medico_id IN ({', '.join('?' for _ in medicos)}) AND {periodo}
+              AND COALESCE(status, '') NOT IN ({', '.join('?' for _ in STATUS_LIVRES)})
+        ''', [*medicos, *params, *STATUS_LIVRES]).fetchall()
+
+        intervalos = {chave: [] for chave in chaves}
+        for medico_id, inicio in linhas:
+            chave = (medico_id, normalizar_data(inicio[:10]))
+            if chave in intervalos:
+                minutos = _minutos(inicio)
+                intervalos[chave].append((minutos, minutos + duracoes[medico_id]))
+
+        return {chave: DiaAgenda.de_intervalos(lista) for chave, lista in intervalos.items()}
+
+    @staticmethod
+    def _chave_ocupacao(medico_id, dia):
+        return ('agenda_dia', medico_id, dia.isoformat())
+
+    def ocupacao(self, medico_id, dia):
+        """Retorna a DiaAgenda do médico no dia (do cache quando possível)"""
+        chave = (int(medico_id), normalizar_data(dia))
+
+        def ler():
+            with self.manager.connection() as conn:
+                return self._ler_ocupacoes(conn, [chave])[chave]
+
+        return self.manager.cache.get_or_compute(self._chave_ocupacao(*chave), ler, TABELAS_AGENDA)
+
+    def horarios_livres(self, medico_id, dia, a_partir_de=None):
+        """
+        Lista os horários livres do médico no dia
+
+        Args:
+            medico_id (int): ID do médico
+            dia (date | str): Dia da agenda
+            a_partir_de (datetime): Ignora horários que começam antes deste instante
+
+        Returns:
+            list: Horários de início no formato 'HH:MM'
+        """
+        dia = normalizar_data(dia)
+        expediente = self.expediente(medico_id)
+        ocupacao = self.ocupacao(medico_id, dia)
+
+        minimo = 0
+        if a_partir_de is not None:
+            if a_partir_de.date() > dia:
+                return []
+            if a_partir_de.date() == dia:
+                minimo = a_partir_de.hour * 60 + a_partir_de.minute
+
+        duracao = expediente.duracao
+        livres = []
+        for inicio_faixa, fim_faixa in expediente.faixas[dia.weekday()]:
+            for inicio in range(inicio_faixa, fim_faixa - duracao + 1, duracao):
+                if inicio >= minimo and not ocupacao.conflita(inicio, inicio + duracao):
+                    livres.append(_hhmm(inicio))
+        return livres
+
+    def serie(self, paciente_ids, medico_id, inicio, frequencia='semanal', ocorrencias=4):
+        """
+        Monta os pedidos de uma série de consultas
+
+        Os pacientes ocupam horários consecutivos a partir de ``inicio``
+        (um por duração de consulta), e cada um se repete conforme a
+        frequência.
+
+        Returns:
+            list: Pedidos, na ordem em que devem ser reservados
+        """
+        duracao = self.expediente(medico_id).duracao
+        return [
+            Pedido(int(paciente_id), int(medico_id), data)
+            for i, paciente_id in enumerate(paciente_ids)
+            for data in expandir_recorrencia(inicio + timedelta(minutes=i * duracao), frequencia, ocorrencias)
+        ]
+
+    def reservar_lote(self, pedidos, valor=0, observacoes='', tudo_ou_nada=False):
+        """
+        Agenda várias consultas em uma única transação
+
+        A ocupação de todos os médicos e dias envolvidos é lida em uma query,
+        cada pedido é conferido contra ela (incluindo os pedidos anteriores do
+        próprio lote) e os aceitos são gravados com um único executemany, tudo
+        na mesma transação BEGIN IMMEDIATE. A conexão não pode ter uma
+        transação aberta por quem chama (sqlite3.OperationalError).
+
+        Args:
+            pedidos (iterable): Pedido(paciente_id, medico_id, inicio)
+            valor (float): Valor de cada consulta
+            observacoes (str): Observações de cada consulta
+            tudo_ou_nada (bool): Não grava nada se algum pedido conflitar
+
+        Returns:
+            list: Uma Ocorrencia por pedido, com consulta_id ou o motivo do conflito
+        """
+        pedidos = [Pedido(int(p), int(m), inicio) for p, m, inicio in pedidos]
+        if not pedidos:
+            return []
+
+        with self.manager.connection() as conn:
+            # Trava de escrita antes da leitura: outra reserva aguarda este commit.
+            # Fora do try: com uma transação já aberta na conexão, o BEGIN falha
+            # sem desfazer o trabalho de quem a abriu
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                ocupacoes = self._ler_ocupacoes(
+                    conn, {(pedido.medico_id, pedido.inicio.date()) for pedido in pedidos}
+                )
+                conflitos = []
+                aceitos = []
+                for pedido in pedidos:
+                    chave = (pedido.medico_id, pedido.inicio.date())
+                    expediente = self.expediente(pedido.medico_id)
+                    minutos = pedido.inicio.hour * 60 + pedido.inicio.minute
+                    fim = minutos + expediente.duracao
+
+                    if not expediente.atende(pedido.inicio.weekday(), minutos, fim):
+                        conflitos.append("Horário fora do atendimento do médico.")
+                    elif ocupacoes[chave].conflita(minutos, fim):
+                        conflitos.append("Horário já ocupado na agenda do médico.")
+                    else:
+                        conflitos.append(None)
+                        aceitos.append(pedido)
+                        ocupacoes[chave] = ocupacoes[chave].com(minutos, fim)
+
+                if not aceitos or (tudo_ou_nada and len(aceitos) < len(pedidos)):
+                    conn.rollback()
+                    return [Ocorrencia(*pedido, None, conflito or "Série não agendada: há conflitos.")
+                            for pedido, conflito in zip(pedidos, conflitos)]
+
+                conn.executemany('''
+                    INSERT INTO consultas (paciente_id, medico_id, data_consulta, valor, observacoes, status)
+                    VALUES (?, ?, ?, ?, ?, 'agendado')
+                ''', [
+                    (pedido.paciente_id, pedido.medico_id, pedido.inicio.strftime('%Y-%m-%d %H:%M:%S'),
+                     valor or 0, observacoes or "")
+                    for pedido in aceitos
+                ])
+                # AUTOINCREMENT com a trava de escrita: os ids do lote são consecutivos
+                ultimo = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        # Listagens e totais de consultas são relidos; da ocupação em cache,
+        # só a dos médicos e dias reservados
+        self.manager.cache.invalidate(('consultas',) + ROLLUP_TABLES['consultas'])
+        self.manager.cache.invalidate_keys(
+            {self._chave_ocupacao(pedido.medico_id, pedido.inicio.date()) for pedido in aceitos}
+        )
+
+        ids = iter(range(ultimo - len(aceitos) + 1, ultimo + 1))
+        return [Ocorrencia(*pedido, None if conflito else next(ids), conflito)
+                for pedido, conflito in zip(pedidos, conflitos)]
+
+    def reservar(self, paciente_id, medico_id, inicio, valor=0, observacoes=''):
+        """
+        Agenda uma consulta se o horário estiver livre
+
+        Args:
+            paciente_id (int): ID do paciente
+            medico_id (int): ID do médico
+            inicio (datetime): Data e hora da consulta
+            valor (float): Valor da consulta
+            observacoes (str): Observações
+
+        Returns:
+            int: ID da consulta criada
+
+        Raises:
+            ConflitoDeHorario: Horário fora do expediente ou já ocupado
+        """
+        ocorrencia, = self.reservar_lote([(paciente_id, medico_id, inicio)], valor, observacoes)
+        if ocorrencia.conflito:
+            raise ConflitoDeHorario(ocorrencia.conflito)
+        return ocorrencia.consulta_id
+
+
+VISOES_CALENDARIO = ('dia', 'semana', 'mes')
+
+
+def janela_calendario(referencia, visao='semana'):
+    """
+    Período exibido pelo calendário que contém a data de referência
+
+    Args:
+        referencia (date | str): Qualquer dia do período
+        visao (str): 'dia', 'semana' (segunda a domingo) ou 'mes'
+
+    Returns:
+        tuple: (primeiro dia, último dia), inclusivos
+    """
+    referencia = normalizar_data(referencia)
+    if visao == 'dia':
+        return referencia, referencia
+    if visao == 'mes':
+        ultimo = calendar.monthrange(referencia.year, referencia.month)[1]
+        return referencia.replace(day=1), referencia.replace(day=ultimo)
+    inicio = referencia - timedelta(days=referencia.weekday())
+    return inicio, inicio + timedelta(days=6)
+
+
+def deslocar_janela(referencia, visao='semana', passos=1):
+    """Data de referência do período ``passos`` à frente (ou atrás, se negativo)"""
+    referencia = normalizar_data(referencia)
+    if visao == 'dia':
+        return referencia + timedelta(days=passos)
+    if visao == 'mes':
+        ano, mes = divmod(referencia.month - 1 + passos, 12)
+        return date(referencia.year + ano, mes + 1, 1)
+    return referencia + timedelta(weeks=passos)
+
+
+def consultas_da_janela(referencia, visao='semana', medico_id=None, status=None, manager=None):
+    """Consultas do período do calendário, em uma query com os filtros no SQL"""
+    return (manager or db_manager).get_consultas(janela_calendario(referencia, visao), medico_id, status)
+
+
+# Um único carregador em segundo plano: cliques rápidos enfileiram em vez de
+# abrir uma thread (e uma conexão do pool) por clique
+_prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch-agenda')
+_prefetch_pendentes = set()
+_prefetch_lock = threading.Lock()
+
+
+def _carregar_janela(manager, chave, periodo, medico_id, status):
+    try:
+        # Já exibida ou carregada enquanto aguardava na fila
+        if not manager.consultas_em_cache(periodo, medico_id, status):
+            manager.get_consultas(periodo, medico_id, status)
+    except Exception as e:
+        logger.error(f"Erro ao pré-carregar agenda: {e}")
+    finally:
+        with _prefetch_lock:
+            _prefetch_pendentes.discard(chave)
+
+
+def prefetch_janelas(referencia, visao='semana', medico_id=None, status=None, manager=None):
+    """
+    Carrega no cache, em segundo plano, os períodos anterior e seguinte
+
+    Ao avançar ou voltar no calendário, a consulta já está no cache de
+    resultados (até expirar ou até a próxima escrita em consultas).
+    Períodos já em cache ou já na fila não são pedidos de novo.
+
+    Returns:
+        list: Futures dos carregamentos agendados (vazia se nada foi pedido)
+    """
+    manager = manager or db_manager
+    if status is not None and not isinstance(status, str):
+        status = tuple(status)
+
+    futuros = []
+    for passos in (1, -1):
+        periodo = janela_calendario(deslocar_janela(referencia, visao, passos), visao)
+        if manager.consultas_em_cache(periodo, medico_id, status):
+            continue
+
+        chave = (manager, periodo, medico_id, status)
+        with _prefetch_lock:
+            if chave in _prefetch_pendentes:
+                continue
+            _prefetch_pendentes.add(chave)
+        futuros.append(
+            _prefetch_executor.submit(_carregar_janela, manager, chave, periodo, medico_id, status)
+        )
+    return futuros
+
+
+# Instância global para uso direto
+agenda_medicos = AgendaMedicos()
@@ -1,20 +1,330 @@
+import logging
+import re
 import sqlite3
+import threading
 import pandas as pd
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 import os
+from typing import NamedTuple, Optional
+
+from config import DATABASE_CONFIG, STORAGE_PROFILES
+from utils.migrations import apply_migrations, fts_disponivel
+from utils.query_cache import QueryCache, tables_in
+
+logger = logging.getLogger(__name__)
+
+# Tabelas derivadas mantidas por triggers a partir de cada tabela
+ROLLUP_TABLES = {
+    'consultas': ('consultas_diario',),
+    'financeiro': ('financeiro_diario',),
+    'pacientes': ('pacientes_fts',),
+}
+
+# Entradas de cache calculadas a partir de uma tabela sem ser queries sobre
+# ela (ex.: a ocupação da agenda); invalidadas a cada escrita na tabela
+DERIVED_CACHES = {
+    'consultas': ('agenda_ocupacao',),
+}
+
+
+def normalizar_data(valor):
+    """
+    Normaliza uma data para o formato ISO 'AAAA-MM-DD'
+    
+    Aceita date, datetime ou strings ISO com ou sem horário
+    ('2024-01-15', '2024-01-15 09:00:00', '2024-01-15T09:00:00').
+    """
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor)[:10], '%Y-%m-%d').date()
+
+
+def filtro_periodo(coluna, data_inicio=None, data_fim=None):
+    """
+    Monta um filtro de período sargável sobre uma coluna de data/hora
+    
+    Gera o intervalo semiaberto ``coluna >= inicio AND coluna < fim + 1 dia``
+    em vez de ``DATE(coluna) BETWEEN ? AND ?``, permitindo que o SQLite use
+    os índices da coluna. Funciona tanto para colunas DATE ('2024-01-15')
+    quanto DATETIME ('2024-01-15 09:00:00'), pois ambas ordenam como texto ISO.
+    
+    Args:
+        coluna (str): Coluna filtrada (ex: 'c.data_consulta')
+        data_inicio: Primeiro dia do período (inclusivo) ou None
+        data_fim: Último dia do período (inclusivo) ou None
+        
+    Returns:
+        tuple: (trecho SQL, lista de parâmetros)
+    """
+    condicoes = []
+    params = []
+    
+    if data_inicio is not None:
+        condicoes.append(f"{coluna} >= ?")
+        params.append(normalizar_data(data_inicio).isoformat())
+    
+    if data_fim is not None:
+        condicoes.append(f"{coluna} < ?")
+        params.append((normalizar_data(data_fim) + timedelta(days=1)).isoformat())
+    
+    return " AND ".join(condicoes) or "1=1", params
+
+
+class DashboardKPIs(NamedTuple):
+    """KPIs exibidos nos cards da visão geral"""
+    consultas_mes: int = 0
+    taxa_comparecimento: float = 0.0
+    receita_mes: float = 0.0
+    pacientes_ativos: int = 0
+
+
+# Texto só com dígitos e a pontuação de CPF e telefone
+_DOCUMENTO = re.compile(r'[\d.\-/()+\s]*\d[\d.\-/()+\s]*')
+
+
+def consulta_fts(busca):
+    """
+    Converte o texto digitado em uma consulta FTS5 por prefixo
+    
+    Cada palavra vira um prefixo entre aspas ('ana sil' -> '"ana"* "sil"*'),
+    o que também neutraliza a sintaxe do FTS5 (AND, OR, NEAR, aspas).
+    
+    Trechos de CPF ou telefone ('123.456') buscam os números em sequência,
+    nas colunas cpf e telefone: o prefixo só com dígitos ou a frase com os
+    grupos na ordem digitada. Palavras soltas casariam em qualquer ordem
+    ('123.456' encontraria o CPF 456.789.123-03).
+    """
+    if _DOCUMENTO.fullmatch(busca or ''):
+        grupos = re.findall(r'\d+', busca)
+        alternativas = dict.fromkeys([f'"{"".join(grupos)}"*', f'"{" ".join(grupos)}"*'])
+        return f"{{cpf telefone}} : ({' OR '.join(alternativas)})"
+    
+    termos = re.findall(r'\w+', busca or '')
+    return ' '.join(f'"{termo}"*' for termo in termos) or '""'
+
+
+# Acima deste número de resultados a busca não é ordenada por relevância
+LIMITE_RELEVANCIA = 1000
+
+
+class PaginaPacientes(NamedTuple):
+    """Uma página da listagem de pacientes"""
+    registros: pd.DataFrame
+    total: int
+    proxima_chave: Optional[list] = None  # None na última página
+    total_exato: bool = True  # False quando a busca parou de contar em LIMITE_RELEVANCIA
+
+
+class PaginaHistorico(NamedTuple):
+    """Uma página do histórico de consultas de um paciente"""
+    registros: pd.DataFrame
+    proxima_chave: Optional[list] = None  # None quando não há consultas anteriores
+
+
+# Ordenações da listagem de pacientes: colunas da chave (únicas) e direção
+ORDENACOES_PACIENTES = {
+    'nome': (('nome', 'id'), 'ASC'),
+    'nome_desc': (('nome', 'id'), 'DESC'),
+    'recentes': (('id',), 'DESC'),
+    'antigos': (('id',), 'ASC'),
+}
+
+
+class ConnectionPool:
+    """Pool limitado de conexões SQLite reutilizadas entre callbacks do Dash
+
+    Cada thread recebe uma conexão exclusiva enquanto estiver dentro de
+    ``connection()``; chamadas aninhadas na mesma thread reutilizam a mesma
+    conexão. Ao devolver, a conexão volta para a fila de ociosas e é
+    descartada depois de ``max_uses`` utilizações.
+    """
+
+    def __init__(self, factory, max_size=10, max_uses=1000, timeout=30):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.timeout = timeout
+
+        self._idle = []  # pilha (LIFO) de [conexao, usos]
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._local = threading.local()
+
+    @contextmanager
+    def connection(self):
+        """Empresta uma conexão do pool para a thread atual"""
+        entry = getattr(self._local, 'entry', None)
+        if entry is not None:
+            # Chamada aninhada: reutiliza a conexão já emprestada à thread
+            yield entry[0]
+            return
+
+        entry = self._checkout()
+        self._local.entry = entry
+        try:
+            yield entry[0]
+        finally:
+            self._local.entry = None
+            self._checkin(entry)
+
+    def _checkout(self):
+        """Retira uma conexão saudável do pool (ou cria uma nova)"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f"Pool de conexões esgotado ({self.max_size} conexões em uso)"
+            )
+
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+
+                if entry is None:
+                    return [self.factory(), 0]
+
+                if self._is_healthy(entry[0]):
+                    return entry
+
+                self._discard(entry)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, entry):
+        """Devolve a conexão ao pool, reciclando-a quando necessário"""
+        conn = entry[0]
+        entry[1] += 1
+
+        try:
+            # Nunca devolver ao pool uma transação pendente
+            if conn.in_transaction:
+                conn.rollback()
+
+            if entry[1] >= self.max_uses:
+                self._discard(entry)
+            else:
+                with self._lock:
+                    self._idle.append(entry)
+        except sqlite3.Error:
+            self._discard(entry)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _is_healthy(conn):
+        """Verifica se a conexão ainda responde"""
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _discard(entry):
+        """Fecha uma conexão que não será mais reutilizada"""
+        try:
+            entry[0].close()
+        except sqlite3.Error:
+            pass
+
+    def close_all(self):
+        """Fecha todas as conexões ociosas do pool"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for entry in idle:
+            self._discard(entry)
+
 
 class DatabaseManager:
-    def __init__(self, db_path='data/clinic_system.db'):
-        self.db_path = db_path
+    def __init__(self, db_path=None, storage_profile=None):
+        self.db_path = db_path or DATABASE_CONFIG['path']
+        self.pragmas = STORAGE_PROFILES[storage_profile or DATABASE_CONFIG.get('storage_profile', 'padrao')]
+        self._maintenance_thread = None
+        self._maintenance_stop = threading.Event()
+        self.pool = ConnectionPool(
+            self.get_connection,
+            max_size=DATABASE_CONFIG.get('pool_size', 10),
+            max_uses=DATABASE_CONFIG.get('pool_max_uses', 1000),
+            timeout=DATABASE_CONFIG.get('pool_timeout', 30)
+        )
+        self.cache = QueryCache(
+            ttl=DATABASE_CONFIG.get('cache_ttl_seconds', 30),
+            max_entries=DATABASE_CONFIG.get('cache_max_entries', 256)
+        )
         self.init_database()
     
     def get_connection(self):
-        """Cria conexão com o banco de dados"""
-        return sqlite3.connect(self.db_path)
+        """Cria uma nova conexão com o banco de dados"""
+        # As conexões circulam entre as threads do servidor através do pool,
+        # que garante que apenas uma thread usa cada conexão por vez
+        timeout = self.pragmas.get('busy_timeout', 5000) / 1000
+        conn = sqlite3.connect(self.db_path, timeout=timeout, check_same_thread=False)
+        self._apply_pragmas(conn)
+        return conn
+    
+    def _apply_pragmas(self, conn):
+        """Aplica os PRAGMAs do perfil de armazenamento à conexão"""
+        # busy_timeout primeiro, para que a troca de journal_mode aguarde locks
+        for pragma in sorted(self.pragmas, key=lambda nome: nome != 'busy_timeout'):
+            conn.execute(f"PRAGMA {pragma} = {self.pragmas[pragma]}").fetchall()
+    
+    def connection(self):
+        """Empresta uma conexão do pool (usar com ``with``)"""
+        return self.pool.connection()
+    
+    def close(self):
+        """Fecha as conexões mantidas pelo pool"""
+        self.stop_maintenance()
+        self.pool.close_all()
+    
+    def run_maintenance(self):
+        """Executa checkpoint passivo do WAL e PRAGMA optimize"""
+        with self.connection() as conn:
+            # PASSIVE nunca aguarda leitores nem escritores
+            if self.pragmas.get('journal_mode', '').upper() == 'WAL':
+                conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+            conn.execute("PRAGMA optimize").fetchall()
+    
+    def start_maintenance(self, interval=None):
+        """Inicia a tarefa periódica de manutenção em segundo plano"""
+        if self._maintenance_thread and self._maintenance_thread.is_alive():
+            return
+        
+        interval = interval or DATABASE_CONFIG.get('maintenance_interval_seconds', 300)
+        self._maintenance_stop.clear()
+        
+        def run_periodically():
+            while not self._maintenance_stop.wait(interval):
+                try:
+                    self.run_maintenance()
+                except sqlite3.Error as e:
+                    logger.error(f"Erro na manutenção do banco: {e}")
+        
+        self._maintenance_thread = threading.Thread(target=run_periodically, daemon=True)
+        self._maintenance_thread.start()
+    
+    def stop_maintenance(self):
+        """Interrompe a tarefa periódica de manutenção"""
+        self._maintenance_stop.set()
     
     def init_database(self):
         """Inicializa o banco de dados com as tabelas necessárias"""
-        conn = self.get_connection()
+        with self.connection() as conn:
+            self._create_tables(conn)
+            
+            # Índices e alterações de esquema versionadas
+            apply_migrations(conn)
+            self.fts = fts_disponivel(conn)
+        
+        # Inserir dados de exemplo se o banco estiver vazio
+        self.insert_sample_data()
+    
+    def _create_tables(self, conn):
+        """Cria as tabelas do sistema caso ainda não existam"""
         cursor = conn.cursor()
         
         # Tabela de pacientes
@@ -121,20 +431,18 @@ class DatabaseManager:
         ''')
         
         conn.commit()
-        conn.close()
-        
-        # Inserir dados de exemplo se o banco estiver vazio
-        self.insert_sample_data()
     
     def insert_sample_data(self):
         """Insere dados de exemplo para demonstração"""
-        conn = self.get_connection()
+        with self.connection() as conn:
+            self._insert_sample_data(conn)
+    
+    def _insert_sample_data(self, conn):
         cursor = conn.cursor()
         
         # Verificar se já existem dados
         cursor.execute("SELECT COUNT(*) FROM pacientes")
         if cursor.fetchone()[0] > 0:
-            conn.close()
             return
         
         # Inserir médicos de exemplo
@@ -174,41 +482,66 @@ class DatabaseManager:
         ''', consultas_sample)
         
         conn.commit()
-        conn.close()
     
     def execute_query(self, query, params=None):
         """Executa uma query e retorna os resultados"""
-        conn = self.get_connection()
-        try:
+        with self.connection() as conn:
             if params:
                 df = pd.read_sql_query(query, conn, params=params)
             else:
                 df = pd.read_sql_query(query, conn)
             return df
-        finally:
-            conn.close()
+    
+    def cached_query(self, query, params=None, ttl=None):
+        """
+        Executa uma query de leitura usando o cache de resultados
+        
+        O resultado é compartilhado entre callbacks e abas até expirar o TTL
+        ou até uma escrita em uma das tabelas da query.
+        """
+        df = self.cache.get_or_compute(
+            self._chave_cache(query, params), lambda: self.execute_query(query, params),
+            tables_in(query), ttl
+        )
+        # Cópia para que o chamador possa alterar o DataFrame livremente
+        return df.copy()
+    
+    @staticmethod
+    def _chave_cache(query, params=None):
+        return (query, tuple(params) if params else ())
     
     def execute_insert(self, query, params):
         """Executa uma inserção no banco"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute(query, params)
-            conn.commit()
-            return cursor.lastrowid
-        finally:
-            conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params)
+                conn.commit()
+                return cursor.lastrowid
+            finally:
+                cursor.close()
+                self.cache.invalidate(self._tabelas_afetadas(query))
     
     def execute_update(self, query, params):
         """Executa uma atualização no banco"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute(query, params)
-            conn.commit()
-            return cursor.rowcount
-        finally:
-            conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params)
+                conn.commit()
+                return cursor.rowcount
+            finally:
+                cursor.close()
+                self.cache.invalidate(self._tabelas_afetadas(query))
+    
+    @staticmethod
+    def _tabelas_afetadas(query):
+        """Tabelas escritas pela query, incluindo as derivadas por triggers e os caches derivados"""
+        tabelas = tables_in(query)
+        for tabela in list(tabelas):
+            tabelas.update(ROLLUP_TABLES.get(tabela, ()))
+            tabelas.update(DERIVED_CACHES.get(tabela, ()))
+        return tabelas
     
     # Métodos específicos para cada entidade
     def get_pacientes(self):
@@ -219,90 +552,414 @@ class DatabaseManager:
         """Retorna todos os médicos ativos"""
         return self.execute_query("SELECT * FROM medicos WHERE ativo = 1 ORDER BY nome")
     
-    def get_consultas_periodo(self, data_inicio, data_fim):
-        """Retorna consultas em um período específico"""
-        query = '''
-            SELECT c.*, p.nome as paciente_nome, m.nome as medico_nome, m.especialidade
+    def get_pacientes_pagina(self, busca=None, ativo=None, ordem='nome', apos=None, limite=50,
+                             medico_id=None):
+        """
+        Retorna uma página de pacientes usando paginação por chave (keyset)
+        
+        Em vez de OFFSET, a página seguinte começa logo após a chave de
+        ordenação do último registro, de modo que o custo de cada página não
+        cresce com a quantidade de pacientes já percorridos.
+        
+        Com ``busca``, os pacientes vêm do índice textual pacientes_fts
+        (prefixos, sem acentos) ordenados por relevância; nesse caso a chave
+        da próxima página é o deslocamento nos resultados.
+        
+        Args:
+            busca (str): Trecho do nome, CPF, telefone ou email
+            ativo (bool): Filtra por status (None para todos)
+            ordem (str): Chave de ORDENACOES_PACIENTES (ignorada na busca)
+            apos (list): proxima_chave da página anterior (None na primeira)
+            limite (int): Registros por página
+            medico_id (int): Apenas pacientes com consultas desse médico
+            
+        Returns:
+            PaginaPacientes: registros, total filtrado e chave da próxima página
+        """
+        condicoes = []
+        params = []
+        origem = 'pacientes p'
+        
+        if ativo is not None:
+            condicoes.append('p.ativo = ?')
+            params.append(1 if ativo else 0)
+        
+        if medico_id is not None:
+            condicoes.append(
+                'EXISTS (SELECT 1 FROM consultas c WHERE c.paciente_id = p.id AND c.medico_id = ?)'
+            )
+            params.append(medico_id)
+        
+        if busca and self.fts:
+            origem = 'pacientes_fts f JOIN pacientes p ON p.id = f.rowid'
+            condicoes.append('pacientes_fts MATCH ?')
+            params.append(consulta_fts(busca))
+        elif busca:
+            condicoes.append('(p.nome LIKE ? OR p.cpf LIKE ? OR p.telefone LIKE ?)')
+            termo = f'%{busca}%'
+            params.extend([termo, termo, termo])
+        
+        filtro = ' AND '.join(condicoes) or '1=1'
+
+        if busca and self.fts:
+            # Buscas amplas (ex: 'maria') casam com boa parte do cadastro:
+            # a contagem para no limite em vez de percorrer todos os resultados
+            total = self.cached_query(f'''
+                SELECT COUNT(*) as total FROM (
+                    SELECT 1 FROM {origem} WHERE {filtro} LIMIT ?
+                )
+            ''', params + [LIMITE_RELEVANCIA + 1])
+        else:
+            total = self.cached_query(f"SELECT COUNT(*) as total FROM {origem} WHERE {filtro}", params)
+
+        total = int(total.iloc[0]['total'])
+        total_exato = total <= LIMITE_RELEVANCIA or not (busca and self.fts)
+
+        if busca and self.fts:
+            # Relevância não forma chave estável: pagina pelo deslocamento.
+            # Calcular o rank exige pontuar todos os resultados; acima do
+            # limite, os cadastros mais recentes vêm primeiro.
+            deslocamento = apos[0] if apos else 0
+            ordenacao = 'f.rank, p.id' if total_exato else 'f.rowid DESC'
+            paginacao = 'LIMIT ? OFFSET ?'
+            params_pagina = params + [limite + 1, deslocamento]
+        else:
+            colunas, direcao = ORDENACOES_PACIENTES[ordem]
+            if apos:
+                operador = '>' if direcao == 'ASC' else '<'
+                marcadores = ', '.join('?' for _ in colunas)
+                filtro += f" AND ({', '.join('p.' + c for c in colunas)}) {operador} ({marcadores})"
+                params = params + list(apos)
+            ordenacao = ', '.join(f"p.{coluna} {direcao}" for coluna in colunas)
+            paginacao = 'LIMIT ?'
+            params_pagina = params + [limite + 1]
+        
+        registros = self.execute_query(f'''
+            SELECT 
+                p.id, p.nome, p.cpf, p.data_nascimento, p.genero, p.telefone, 
+                p.email, p.endereco, p.estado_civil, p.observacoes, p.ativo,
+                p.data_cadastro
+            FROM {origem}
+            WHERE {filtro}
+            ORDER BY {ordenacao}
+            {paginacao}
+        ''', params_pagina)
+        
+        # O registro excedente indica que existe uma próxima página
+        proxima_chave = None
+        if len(registros) > limite:
+            registros = registros.iloc[:limite]
+            if busca and self.fts:
+                proxima_chave = [deslocamento + limite]
+            else:
+                ultimo = registros[list(colunas)].to_dict('records')[-1]
+                proxima_chave = [ultimo[coluna] for coluna in colunas]
+        
+        return PaginaPacientes(registros, total, proxima_chave, total_exato)
+    
+    def get_total_consultas(self, paciente_ids):
+        """
+        Conta as consultas de vários pacientes com uma única query agrupada
+        
+        Returns:
+            dict: paciente_id -> total de consultas (0 para quem não tem)
+        """
+        paciente_ids = [int(paciente_id) for paciente_id in paciente_ids]
+        if not paciente_ids:
+            return {}
+        
+        marcadores = ', '.join('?' for _ in paciente_ids)
+        totais = self.cached_query(f'''
+            SELECT paciente_id, COUNT(*) as total
+            FROM consultas
+            WHERE paciente_id IN ({marcadores})
+            GROUP BY paciente_id
+        ''', paciente_ids)
+        
+        contagem = dict.fromkeys(paciente_ids, 0)
+        contagem.update((int(paciente_id), int(total)) for paciente_id, total in totais.itertuples(index=False))
+        return contagem
+    
+    def get_historico_paciente(self, paciente_id, antes=None, limite=10):
+        """
+        Retorna uma página do histórico de consultas, da mais recente para a mais antiga
+        
+        Traz apenas o resumo de cada consulta (data, status, médico e um
+        trecho do diagnóstico); os textos completos do prontuário são lidos
+        por get_prontuario_consulta quando o item é expandido.
+        
+        Args:
+            paciente_id (int): ID do paciente
+            antes (list): proxima_chave da página anterior (None na primeira)
+            limite (int): Consultas por página
+            
+        Returns:
+            PaginaHistorico: registros e chave da página seguinte
+        """
+        filtro = 'c.paciente_id = ?'
+        params = [paciente_id]
+        
+        if antes:
+            filtro += ' AND (c.data_consulta, c.id) < (?, ?)'
+            params.extend(antes)
+        
+        registros = self.execute_query(f'''
+            SELECT c.id, c.data_consulta, c.status,
+                   m.nome as medico_nome, m.especialidade,
+                   EXISTS (SELECT 1 FROM prontuarios pr WHERE pr.consulta_id = c.id) as tem_prontuario,
+                   (SELECT SUBSTR(pr.diagnostico, 1, 120) FROM prontuarios pr
+                    WHERE pr.consulta_id = c.id ORDER BY pr.id DESC LIMIT 1) as diagnostico_resumo
+            FROM consultas c
+            JOIN medicos m ON c.medico_id = m.id
+            WHERE {filtro}
+            ORDER BY c.data_consulta DESC, c.id DESC
+            LIMIT ?
+        ''', params + [limite + 1])
+        
+        proxima_chave = None
+        if len(registros) > limite:
+            registros = registros.iloc[:limite]
+            ultimo = registros.iloc[-1]
+            proxima_chave = [ultimo['data_consulta'], int(ultimo['id'])]
+        
+        return PaginaHistorico(registros, proxima_chave)
+    
+    def get_prontuario_consulta(self, consulta_id):
+        """Retorna as observações e os textos do prontuário de uma consulta (None se não existir)"""
+        prontuario = self.execute_query('''
+            SELECT c.observacoes, pr.anamnese, pr.exame_fisico, pr.diagnostico, pr.prescricao
+            FROM consultas c
+            LEFT JOIN prontuarios pr ON pr.consulta_id = c.id
+            WHERE c.id = ?
+            ORDER BY pr.id DESC
+            LIMIT 1
+        ''', (consulta_id,))
+        return None if prontuario.empty else prontuario.iloc[0].to_dict()
+    
+    def get_consultas(self, periodo=None, medico_id=None, status=None, limit=None, offset=0):
+        """
+        Retorna consultas com os filtros aplicados no SQL
+        
+        Os filtros usam os índices de consultas: (medico_id, data_consulta)
+        quando há médico e (data_consulta, status, medico_id) nos demais casos.
+        
+        Args:
+            periodo (tuple): (data_inicio, data_fim), inclusivos; qualquer um pode ser None
+            medico_id (int): Apenas consultas deste médico
+            status (str | list): Apenas consultas com este(s) status
+            limit (int): Máximo de consultas retornadas (None = todas)
+            offset (int): Consultas a pular, na ordem de data
+        """
+        return self.cached_query(*self._query_consultas(periodo, medico_id, status, limit, offset))
+    
+    def contar_consultas(self, periodo=None, medico_id=None, status=None):
+        """Quantidade de consultas que get_consultas retornaria, sem limite"""
+        query, params = self._query_consultas(periodo, medico_id, status, None, 0)
+        total = self.cached_query(f"SELECT COUNT(*) as total FROM ({query})", params)
+        return int(total.iloc[0]['total'])
+    
+    def consultas_em_cache(self, periodo=None, medico_id=None, status=None, limit=None, offset=0):
+        """Indica se get_consultas com os mesmos argumentos seria servida pelo cache"""
+        return self._chave_cache(*self._query_consultas(periodo, medico_id, status, limit, offset)) in self.cache
+    
+    @staticmethod
+    def _query_consultas(periodo, medico_id, status, limit, offset):
+        data_inicio, data_fim = periodo or (None, None)
+        filtro, params = filtro_periodo('c.data_consulta', data_inicio, data_fim)
+        condicoes = [filtro]
+        
+        if medico_id:
+            condicoes.append('c.medico_id = ?')
+            params.append(int(medico_id))
+        if status:
+            status = [status] if isinstance(status, str) else list(status)
+            condicoes.append(f"c.status IN ({', '.join('?' for _ in status)})")
+            params.extend(status)
+        
+        paginacao = ''
+        if limit is not None:
+            paginacao = 'LIMIT ? OFFSET ?'
+            params.extend([int(limit), int(offset)])
+        
+        query = f'''
+            SELECT c.*, p.nome as paciente_nome, p.telefone as paciente_telefone,
+                   m.nome as medico_nome, m.especialidade
             FROM consultas c
             JOIN pacientes p ON c.paciente_id = p.id
             JOIN medicos m ON c.medico_id = m.id
-            WHERE DATE(c.data_consulta) BETWEEN ? AND ?
-            ORDER BY c.data_consulta
+            WHERE {' AND '.join(condicoes)}
+            ORDER BY c.data_consulta, c.id
+            {paginacao}
+        '''
+        return query, params
+    
+    def get_consultas_periodo(self, data_inicio, data_fim, medico_id=None, status=None):
+        """Retorna consultas em um período específico (ver get_consultas)"""
+        return self.get_consultas((data_inicio, data_fim), medico_id, status)
+    
+    def get_resumo_consultas(self, data_inicio, data_fim):
+        """
+        Retorna a contagem de consultas por dia, especialidade e status
+        
+        Resumo compacto usado pelos gráficos do dashboard, que derivam dele
+        suas próprias agregações em vez de carregar as consultas do período.
+        Lido da tabela de totais diários consultas_diario.
+        """
+        periodo, params = filtro_periodo('cd.dia', data_inicio, data_fim)
+        query = f'''
+            SELECT
+                cd.dia as data,
+                m.especialidade,
+                NULLIF(cd.status, '') as status,
+                SUM(cd.quantidade) as total
+            FROM consultas_diario cd
+            JOIN medicos m ON cd.medico_id = m.id
+            WHERE {periodo}
+            GROUP BY cd.dia, m.especialidade, cd.status
+            ORDER BY data
+        '''
+        return self.cached_query(query, params)
+    
+    def get_resumo_medicos(self, data_inicio, data_fim):
+        """Retorna consultas e receita de cada médico no período (totais diários)"""
+        periodo, params = filtro_periodo('cd.dia', data_inicio, data_fim)
+        query = f'''
+            SELECT 
+                m.nome as medico,
+                m.especialidade,
+                COALESCE(SUM(cd.quantidade), 0) as total_consultas,
+                COALESCE(SUM(cd.valor), 0) as receita_total,
+                COALESCE(SUM(cd.valor) / NULLIF(SUM(cd.quantidade_com_valor), 0), 0) as valor_medio
+            FROM medicos m
+            LEFT JOIN consultas_diario cd ON m.id = cd.medico_id 
+                AND {periodo}
+            GROUP BY m.id, m.nome, m.especialidade
+            ORDER BY total_consultas DESC
+        '''
+        return self.cached_query(query, params)
+    
+    def get_financeiro_diario(self, data_inicio, data_fim):
+        """
+        Retorna os totais financeiros por dia, tipo, categoria e status
+        
+        Colunas: data, tipo, categoria, status, quantidade e valor.
+        """
+        periodo, params = filtro_periodo('dia', data_inicio, data_fim)
+        query = f'''
+            SELECT
+                dia as data,
+                tipo,
+                NULLIF(categoria, '') as categoria,
+                NULLIF(status, '') as status,
+                quantidade,
+                valor
+            FROM financeiro_diario
+            WHERE {periodo}
+            ORDER BY dia
+        '''
+        return self.cached_query(query, params)
+    
+    def get_agendamentos_dia_hora(self, data_inicio, data_fim, incluir_cancelados=False):
+        """
+        Retorna a contagem de consultas por dia da semana e hora
+        
+        Colunas: dia_semana (0 = domingo, como strftime('%w')), hora e total.
+        
+        Args:
+            incluir_cancelados (bool): Conta também as consultas canceladas
+        """
+        periodo, params = filtro_periodo('data_consulta', data_inicio, data_fim)
+        if not incluir_cancelados:
+            periodo += " AND COALESCE(status, '') != 'cancelado'"
+        query = f'''
+            SELECT
+                CAST(strftime('%w', data_consulta) AS INTEGER) as dia_semana,
+                CAST(strftime('%H', data_consulta) AS INTEGER) as hora,
+                COUNT(*) as total
+            FROM consultas
+            WHERE {periodo}
+            GROUP BY dia_semana, hora
         '''
-        return self.execute_query(query, (data_inicio, data_fim))
+        return self.cached_query(query, params)
+    
+    def revenue_by_month(self, n_months=6, ate=None):
+        """
+        Retorna a receita de consultas concluídas mês a mês em uma única query
+        
+        Args:
+            n_months (int): Quantidade de meses, terminando no mês de ``ate``
+            ate: Data dentro do último mês (padrão: hoje)
+            
+        Returns:
+            DataFrame: colunas mes (primeiro dia do mês) e receita, em ordem
+            cronológica e com zero nos meses sem consultas
+        """
+        ultimo = normalizar_data(ate or datetime.now())
+        indice = ultimo.year * 12 + ultimo.month - 1
+        meses = [
+            date(i // 12, i % 12 + 1, 1)
+            for i in range(indice - n_months + 1, indice + 1)
+        ]
+        fim = date((indice + 1) // 12, (indice + 1) % 12 + 1, 1) - timedelta(days=1)
+        
+        periodo, params = filtro_periodo('dia', meses[0], fim)
+        receitas = self.cached_query(f'''
+            SELECT substr(dia, 1, 7) as mes, SUM(valor) as receita
+            FROM consultas_diario
+            WHERE status = 'concluido' AND {periodo}
+            GROUP BY substr(dia, 1, 7)
+        ''', params)
+        
+        por_mes = dict(zip(receitas['mes'], receitas['receita']))
+        return pd.DataFrame({
+            'mes': meses,
+            'receita': [float(por_mes.get(mes.strftime('%Y-%m')) or 0) for mes in meses]
+        })
     
     def get_kpis_dashboard(self):
-        """Retorna KPIs para o dashboard"""
+        """
+        Retorna os KPIs do dashboard em uma única query agregada
+        
+        Contagem, comparecimento e receita do mês saem dos totais diários
+        de consultas_diario; pacientes ativos vem de uma subquery.
+        
+        Returns:
+            DashboardKPIs: KPIs do mês corrente (zerados em caso de erro)
+        """
         try:
-            hoje = datetime.now().date()
-            inicio_mes = hoje.replace(day=1)
-
-            # Total de consultas do mês
-            consultas_mes = self.execute_query('''
-                SELECT COUNT(*) as total FROM consultas
-                WHERE DATE(data_consulta) >= ?
-            ''', (inicio_mes,))
-
-            # Taxa de comparecimento
-            comparecimento = self.execute_query('''
-                SELECT
-                    COUNT(*) as total,
-                    COALESCE(SUM(CASE WHEN status = 'concluido' THEN 1 ELSE 0 END), 0) as concluidas
-                FROM consultas
-                WHERE DATE(data_consulta) >= ?
-            ''', (inicio_mes,))
-
-            # Receita do mês
-            receita_mes = self.execute_query('''
-                SELECT COALESCE(SUM(valor), 0) as receita FROM consultas
-                WHERE DATE(data_consulta) >= ? AND status = 'concluido'
-            ''', (inicio_mes,))
-
-            # Pacientes ativos
-            pacientes_ativos = self.execute_query('SELECT COUNT(*) as total FROM pacientes WHERE ativo = 1')
-
-            # Tratar valores None para evitar erros de divisão
-            total_consultas = comparecimento.iloc[0]['total']
-            consultas_concluidas = comparecimento.iloc[0]['concluidas']
-
-            # Garantir que os valores sejam numéricos
-            if total_consultas is None:
-                total_consultas = 0
-            if consultas_concluidas is None:
-                consultas_concluidas = 0
-
-            # Converter para int para garantir tipo correto
-            total_consultas = int(total_consultas)
-            consultas_concluidas = int(consultas_concluidas)
-
-            # Calcular taxa de comparecimento com segurança
-            if total_consultas > 0:
-                taxa_comparecimento = (consultas_concluidas / total_consultas) * 100
-            else:
-                taxa_comparecimento = 0.0
-
-            # Garantir que todos os valores sejam numéricos
-            consultas_mes_val = consultas_mes.iloc[0]['total']
-            receita_mes_val = receita_mes.iloc[0]['receita']
-            pacientes_ativos_val = pacientes_ativos.iloc[0]['total']
-
-            return {
-                'consultas_mes': int(consultas_mes_val) if consultas_mes_val is not None else 0,
-                'taxa_comparecimento': float(taxa_comparecimento),
-                'receita_mes': float(receita_mes_val) if receita_mes_val is not None else 0.0,
-                'pacientes_ativos': int(pacientes_ativos_val) if pacientes_ativos_val is not None else 0
-            }
-
+            inicio_mes = datetime.now().date().replace(day=1)
+            return self.cache.get_or_compute(
+                ('kpis_dashboard', inicio_mes),
+                lambda: self._compute_kpis_dashboard(inicio_mes),
+                tables=('consultas', 'pacientes')
+            )
+        
         except Exception as e:
             print(f"Erro em get_kpis_dashboard: {str(e)}")
             print(f"Tipo do erro: {type(e)}")
             # Retornar valores padrão em caso de erro
-            return {
-                'consultas_mes': 0,
-                'taxa_comparecimento': 0.0,
-                'receita_mes': 0.0,
-                'pacientes_ativos': 0
-            }
+            return DashboardKPIs()
+    
+    def _compute_kpis_dashboard(self, inicio_mes):
+        periodo, params = filtro_periodo('dia', inicio_mes)
+        
+        with self.connection() as conn:
+            total, concluidas, receita, pacientes_ativos = conn.execute(f'''
+                SELECT
+                    COALESCE(SUM(quantidade), 0),
+                    COALESCE(SUM(CASE WHEN status = 'concluido' THEN quantidade END), 0),
+                    COALESCE(SUM(CASE WHEN status = 'concluido' THEN valor END), 0),
+                    (SELECT COUNT(*) FROM pacientes WHERE ativo = 1)
+                FROM consultas_diario
+                WHERE {periodo}
+            ''', params).fetchone()
+        
+        return DashboardKPIs(
+            consultas_mes=int(total),
+            taxa_comparecimento=(concluidas / total) * 100 if total else 0.0,
+            receita_mes=float(receita),
+            pacientes_ativos=int(pacientes_ativos)
+        )
 
 # Instância global do gerenciador de banco
 db_manager = DatabaseManager()
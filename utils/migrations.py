@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+Módulo de Migrações do Banco de Dados
+Alterações de esquema versionadas, aplicadas em ordem sobre as tabelas
+criadas por DatabaseManager.init_database
+
+Uso:
+    python -m utils.migrations status    # versão atual, migrações pendentes e CPFs repetidos
+    python -m utils.migrations migrate   # aplica as migrações pendentes
+    python -m utils.migrations explain   # índices usados pelas queries críticas
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+
+# Adicionar o diretório pai ao path para importações
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Registra uma função como migração de uma versão do esquema"""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+def _columns(conn, table):
+    """Retorna os nomes das colunas de uma tabela"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+@migration(1, "Índices das colunas usadas em filtros de período e chaves estrangeiras")
+def _create_hot_indexes(conn):
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_data_status_medico
+        ON consultas (data_consulta, status, medico_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_paciente
+        ON consultas (paciente_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_prontuarios_consulta
+        ON prontuarios (consulta_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_financeiro_tipo_vencimento_status
+        ON financeiro (tipo, data_vencimento, status)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_comunicacao_tipo_status_envio
+        ON comunicacao (tipo, status, data_envio)
+    ''')
+
+
+@migration(2, "Coluna medico_id em prontuarios (antes corrigida por tests/fix_database.py)")
+def _add_prontuarios_medico_id(conn):
+    if 'medico_id' not in _columns(conn, 'prontuarios'):
+        conn.execute('ALTER TABLE prontuarios ADD COLUMN medico_id INTEGER REFERENCES medicos (id)')
+
+
+@migration(3, "Índice de cobertura para os KPIs do dashboard (data, status e valor)")
+def _create_kpis_covering_index(conn):
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_data_status_valor
+        ON consultas (data_consulta, status, valor)
+    ''')
+
+
+def _create_rollup(conn, tabela, origem, coluna_data, chaves):
+    """
+    Cria uma tabela de totais diários mantida por triggers sobre ``origem``
+
+    Cada linha acumula quantidade e soma de ``valor`` por dia e pelas
+    ``chaves`` (dicionário coluna -> valor usado no lugar de NULL). As
+    triggers aplicam apenas a diferença de cada escrita, e os dados
+    existentes são carregados uma única vez.
+    """
+    colunas = ', '.join(['dia'] + list(chaves))
+    chave_sql = ', '.join(
+        f"{coluna} {'INTEGER' if isinstance(padrao, int) else 'TEXT'} NOT NULL"
+        for coluna, padrao in chaves.items()
+    )
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {tabela} (
+            dia TEXT NOT NULL,
+            {chave_sql},
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            valor REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY ({colunas})
+        ) WITHOUT ROWID
+    ''')
+
+    def valores(linha):
+        return ', '.join(
+            [f"DATE({linha}.{coluna_data})"]
+            + [f"COALESCE({linha}.{coluna}, {padrao!r})" for coluna, padrao in chaves.items()]
+        )
+
+    def filtro(linha):
+        return ' AND '.join(
+            [f"dia = DATE({linha}.{coluna_data})"]
+            + [f"{coluna} = COALESCE({linha}.{coluna}, {padrao!r})" for coluna, padrao in chaves.items()]
+        )
+
+    adicionar = f'''
+        INSERT INTO {tabela} ({colunas}, quantidade, valor)
+        SELECT {valores('NEW')}, 1, COALESCE(NEW.valor, 0)
+        WHERE DATE(NEW.{coluna_data}) IS NOT NULL
+        ON CONFLICT ({colunas}) DO UPDATE SET
+            quantidade = quantidade + 1,
+            valor = valor + excluded.valor;
+    '''
+    remover = f'''
+        UPDATE {tabela} SET
+            quantidade = quantidade - 1,
+            valor = valor - COALESCE(OLD.valor, 0)
+        WHERE {filtro('OLD')};
+        DELETE FROM {tabela} WHERE {filtro('OLD')} AND quantidade <= 0;
+    '''
+    monitoradas = ', '.join([coluna_data, 'valor'] + list(chaves))
+
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {tabela}_ai AFTER INSERT ON {origem} BEGIN {adicionar} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {tabela}_ad AFTER DELETE ON {origem} BEGIN {remover} END")
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {tabela}_au AFTER UPDATE OF {monitoradas} ON {origem} "
+        f"BEGIN {remover} {adicionar} END"
+    )
+
+    chaves_origem = ', '.join(f"COALESCE({coluna}, {padrao!r})" for coluna, padrao in chaves.items())
+    conn.execute(f'''
+        INSERT INTO {tabela} ({colunas}, quantidade, valor)
+        SELECT DATE({coluna_data}), {chaves_origem}, COUNT(*), COALESCE(SUM(valor), 0)
+        FROM {origem}
+        WHERE DATE({coluna_data}) IS NOT NULL
+        GROUP BY 1, {', '.join(str(i + 2) for i in range(len(chaves)))}
+    ''')
+
+
+@migration(4, "Totais diários de consultas e financeiro mantidos por triggers")
+def _create_daily_rollups(conn):
+    # Sem médico/status/categoria: 0 ou '' (NULL não participa de chave primária)
+    _create_rollup(conn, 'consultas_diario', 'consultas', 'data_consulta',
+                   {'medico_id': 0, 'status': ''})
+    _create_rollup(conn, 'financeiro_diario', 'financeiro', 'data_vencimento',
+                   {'tipo': '', 'categoria': '', 'status': ''})
+
+
+@migration(5, "Índice para a listagem paginada de pacientes por nome")
+def _create_pacientes_nome_index(conn):
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pacientes_nome_id
+        ON pacientes (nome, id)
+    ''')
+
+
+def _digitos(coluna):
+    """Expressão SQL com a coluna sem a pontuação usual de CPF e telefone"""
+    expr = f"COALESCE({coluna}, '')"
+    for caractere in ['.', '-', ' ', '(', ')', '/']:
+        expr = f"REPLACE({expr}, '{caractere}', '')"
+    return expr
+
+
+def fts_disponivel(conn):
+    """Indica se o índice de busca textual de pacientes existe no banco"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pacientes_fts'"
+    ).fetchone() is not None
+
+
+@migration(6, "Busca textual de pacientes (FTS5) sobre nome, CPF, telefone e email")
+def _create_pacientes_fts(conn):
+    # remove_diacritics 2: 'Jose' encontra 'José'; prefixos de 2 e 3 caracteres indexados
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS pacientes_fts USING fts5(
+                nome, cpf, telefone, email,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite compilado sem FTS5: a busca continua com LIKE e a migração
+        # fica pendente, para ser aplicada quando o FTS5 estiver disponível
+        logger.warning(f"FTS5 indisponível, busca de pacientes sem índice textual: {e}")
+        return False
+
+    # Relevância (bm25): nome pesa mais que documentos, e-mail pesa menos
+    conn.execute("INSERT INTO pacientes_fts (pacientes_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 5.0, 1.0)')")
+
+    # CPF e telefone indexados só com dígitos e também como digitados
+    def valores(linha):
+        return ', '.join([
+            f"{linha}.id",
+            f"{linha}.nome",
+            f"{_digitos(f'{linha}.cpf')} || ' ' || COALESCE({linha}.cpf, '')",
+            f"{_digitos(f'{linha}.telefone')} || ' ' || COALESCE({linha}.telefone, '')",
+            f"{linha}.email",
+        ])
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS pacientes_fts_ai AFTER INSERT ON pacientes BEGIN
+            INSERT INTO pacientes_fts (rowid, nome, cpf, telefone, email) VALUES ({valores('NEW')});
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS pacientes_fts_ad AFTER DELETE ON pacientes BEGIN
+            DELETE FROM pacientes_fts WHERE rowid = OLD.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS pacientes_fts_au AFTER UPDATE OF nome, cpf, telefone, email ON pacientes BEGIN
+            DELETE FROM pacientes_fts WHERE rowid = OLD.id;
+            INSERT INTO pacientes_fts (rowid, nome, cpf, telefone, email) VALUES ({valores('NEW')});
+        END
+    ''')
+
+    conn.execute(f'''
+        INSERT INTO pacientes_fts (rowid, nome, cpf, telefone, email)
+        SELECT {valores('pacientes')} FROM pacientes
+    ''')
+
+
+@migration(7, "Índice para o histórico de consultas do paciente")
+def _create_historico_index(conn):
+    # Página mais recente do histórico sem ordenar todas as consultas do paciente
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_paciente_data
+        ON consultas (paciente_id, data_consulta)
+    ''')
+
+
+@migration(8, "Índices das chaves estrangeiras consultadas antes de excluir pacientes e médicos")
+def _create_dependency_indexes(conn):
+    # Cada EXISTS da verificação de vínculos vira uma busca no índice
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_medico_data
+        ON consultas (medico_id, data_consulta)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_prontuarios_paciente
+        ON prontuarios (paciente_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_prontuarios_medico
+        ON prontuarios (medico_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_comunicacao_paciente
+        ON comunicacao (paciente_id)
+    ''')
+
+
+def cpfs_repetidos(conn):
+    """
+    Lista os CPFs (só dígitos) cadastrados em mais de um paciente
+
+    Antes da migração 9 o banco aceitava o mesmo CPF em formatos diferentes;
+    a migração deixa só o cadastro mais antigo no índice único, e os demais
+    aparecem aqui até serem corrigidos.
+
+    Returns:
+        list: [(cpf, [ids dos pacientes, do mais antigo ao mais novo])]
+    """
+    linhas = conn.execute(f'''
+        SELECT digitos, GROUP_CONCAT(id) FROM (
+            SELECT id, NULLIF({_digitos('cpf')}, '') as digitos FROM pacientes ORDER BY id
+        )
+        WHERE digitos IS NOT NULL
+        GROUP BY digitos
+        HAVING COUNT(*) > 1
+        ORDER BY MIN(id)
+    ''').fetchall()
+    return [(cpf, [int(i) for i in ids.split(',')]) for cpf, ids in linhas]
+
+
+@migration(9, "CPF normalizado (cpf_digits) com índice único")
+def _create_cpf_digits(conn):
+    # A coluna cpf guarda o CPF como foi digitado; a unicidade vale para os dígitos
+    if 'cpf_digits' not in _columns(conn, 'pacientes'):
+        conn.execute('ALTER TABLE pacientes ADD COLUMN cpf_digits TEXT')
+
+    conn.execute(f"UPDATE pacientes SET cpf_digits = NULLIF({_digitos('cpf')}, '')")
+    # CPFs repetidos já gravados: só o cadastro mais antigo entra no índice,
+    # os demais ficam com cpf_digits NULL até serem corrigidos (ver cpfs_repetidos)
+    for cpf, ids in cpfs_repetidos(conn):
+        logger.warning(
+            f"CPF {cpf} cadastrado nos pacientes {ids}: só o paciente {ids[0]} "
+            f"entra no índice único até os demais serem corrigidos"
+        )
+    conn.execute('''
+        UPDATE pacientes SET cpf_digits = NULL
+        WHERE cpf_digits IS NOT NULL
+          AND id NOT IN (SELECT MIN(id) FROM pacientes GROUP BY cpf_digits)
+    ''')
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_pacientes_cpf_digits
+        ON pacientes (cpf_digits) WHERE cpf_digits IS NOT NULL
+    ''')
+
+    # Um CPF repetido falha no próprio INSERT/UPDATE (UNIQUE constraint failed)
+    for evento in ['INSERT', 'UPDATE OF cpf']:
+        nome = 'pacientes_cpf_digits_' + evento.split()[0].lower()
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {nome} AFTER {evento} ON pacientes BEGIN
+                UPDATE pacientes SET cpf_digits = NULLIF({_digitos('NEW.cpf')}, '')
+                WHERE id = NEW.id;
+            END
+        ''')
+
+
+@migration(10, "Remove o índice de cobertura dos KPIs (lidos de consultas_diario)")
+def _drop_kpis_covering_index(conn):
+    # Desde os totais diários nenhuma query lê consultas por (data, status, valor);
+    # o índice só encarecia cada escrita em consultas
+    conn.execute('DROP INDEX IF EXISTS idx_consultas_data_status_valor')
+
+
+@migration(11, "Quantidade com valor preenchido nos totais diários (médias como AVG)")
+def _add_rollup_quantidade_com_valor(conn):
+    rollups = [
+        ('consultas_diario', 'consultas', 'data_consulta', {'medico_id': 0, 'status': ''}),
+        ('financeiro_diario', 'financeiro', 'data_vencimento', {'tipo': '', 'categoria': '', 'status': ''}),
+    ]
+    for tabela, origem, coluna_data, chaves in rollups:
+        colunas = ', '.join(['dia'] + list(chaves))
+        valores = ', '.join(
+            [f"DATE(NEW.{coluna_data})"]
+            + [f"COALESCE(NEW.{coluna}, {padrao!r})" for coluna, padrao in chaves.items()]
+        )
+        filtro = ' AND '.join(
+            [f"dia = DATE(OLD.{coluna_data})"]
+            + [f"{coluna} = COALESCE(OLD.{coluna}, {padrao!r})" for coluna, padrao in chaves.items()]
+        )
+        adicionar = f'''
+            INSERT INTO {tabela} ({colunas}, quantidade, quantidade_com_valor, valor)
+            SELECT {valores}, 1, NEW.valor IS NOT NULL, COALESCE(NEW.valor, 0)
+            WHERE DATE(NEW.{coluna_data}) IS NOT NULL
+            ON CONFLICT ({colunas}) DO UPDATE SET
+                quantidade = quantidade + 1,
+                quantidade_com_valor = quantidade_com_valor + excluded.quantidade_com_valor,
+                valor = valor + excluded.valor;
+        '''
+        remover = f'''
+            UPDATE {tabela} SET
+                quantidade = quantidade - 1,
+                quantidade_com_valor = quantidade_com_valor - (OLD.valor IS NOT NULL),
+                valor = valor - COALESCE(OLD.valor, 0)
+            WHERE {filtro};
+            DELETE FROM {tabela} WHERE {filtro} AND quantidade <= 0;
+        '''
+        monitoradas = ', '.join([coluna_data, 'valor'] + list(chaves))
+
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN quantidade_com_valor INTEGER NOT NULL DEFAULT 0")
+        # Triggers da migração 4 trocadas pelas que também mantêm a nova coluna
+        for sufixo in ['ai', 'ad', 'au']:
+            conn.execute(f"DROP TRIGGER IF EXISTS {tabela}_{sufixo}")
+        conn.execute(f"CREATE TRIGGER {tabela}_ai AFTER INSERT ON {origem} BEGIN {adicionar} END")
+        conn.execute(f"CREATE TRIGGER {tabela}_ad AFTER DELETE ON {origem} BEGIN {remover} END")
+        conn.execute(
+            f"CREATE TRIGGER {tabela}_au AFTER UPDATE OF {monitoradas} ON {origem} "
+            f"BEGIN {remover} {adicionar} END"
+        )
+
+        # Recarga dos totais na mesma transação, já com a quantidade com valor
+        chaves_origem = ', '.join(f"COALESCE({coluna}, {padrao!r})" for coluna, padrao in chaves.items())
+        conn.execute(f"DELETE FROM {tabela}")
+        conn.execute(f'''
+            INSERT INTO {tabela} ({colunas}, quantidade, quantidade_com_valor, valor)
+            SELECT DATE({coluna_data}), {chaves_origem}, COUNT(*), COUNT(valor), COALESCE(SUM(valor), 0)
+            FROM {origem}
+            WHERE DATE({coluna_data}) IS NOT NULL
+            GROUP BY 1, {', '.join(str(i + 2) for i in range(len(chaves)))}
+        ''')
+
+
+def _ensure_migrations_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            descricao TEXT,
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def current_version(conn):
+    """Retorna a última versão de migração aplicada ao banco"""
+    _ensure_migrations_table(conn)
+    row = conn.execute('SELECT MAX(version) FROM schema_migrations').fetchone()
+    return row[0] or 0
+
+
+def pending_migrations(conn):
+    """Lista as migrações ainda não aplicadas (inclusive as adiadas)"""
+    _ensure_migrations_table(conn)
+    applied = {row[0] for row in conn.execute('SELECT version FROM schema_migrations')}
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def apply_migrations(conn, verbose=False):
+    """
+    Aplica as migrações pendentes, cada uma em sua própria transação
+
+    Uma migração que retorna False foi adiada (ex.: extensão do SQLite
+    indisponível): nada é gravado e ela é tentada de novo na próxima execução.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+        verbose (bool): Exibe cada migração aplicada
+
+    Returns:
+        list: Versões aplicadas nesta execução
+    """
+    _ensure_migrations_table(conn)
+    conn.commit()
+
+    applied = []
+    for version, description, func in MIGRATIONS:
+        # BEGIN IMMEDIATE serializa processos que sobem ao mesmo tempo
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            already = conn.execute(
+                'SELECT 1 FROM schema_migrations WHERE version = ?', (version,)
+            ).fetchone()
+            if already:
+                conn.rollback()
+                continue
+
+            if func(conn) is False:
+                conn.rollback()
+                continue
+            conn.execute(
+                'INSERT INTO schema_migrations (version, descricao) VALUES (?, ?)',
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+        if verbose:
+            print(f"✅ Migração {version:03d} aplicada: {description}")
+
+    return applied
+
+
+# Queries críticas da aplicação, usadas no relatório de índices
+HOT_QUERIES = [
+    ('Consultas do período', '''
+        SELECT c.*, p.nome as paciente_nome, m.nome as medico_nome, m.especialidade
+        FROM consultas c
+        JOIN pacientes p ON c.paciente_id = p.id
+        JOIN medicos m ON c.medico_id = m.id
+        WHERE c.data_consulta >= ? AND c.data_consulta < ?
+        ORDER BY c.data_consulta
+    ''', ('2024-01-01', '2024-02-01')),
+    ('KPIs do mês', '''
+        SELECT
+            COALESCE(SUM(quantidade), 0),
+            COALESCE(SUM(CASE WHEN status = 'concluido' THEN quantidade END), 0),
+            COALESCE(SUM(CASE WHEN status = 'concluido' THEN valor END), 0),
+            (SELECT COUNT(*) FROM pacientes WHERE ativo = 1)
+        FROM consultas_diario
+        WHERE dia >= ?
+    ''', ('2024-01-01',)),
+    ('Totais financeiros do período', '''
+        SELECT tipo, SUM(valor) FROM financeiro_diario
+        WHERE dia >= ? AND dia < ?
+        GROUP BY tipo
+    ''', ('2024-01-01', '2024-02-01')),
+    ('Página de pacientes', '''
+        SELECT id, nome FROM pacientes
+        WHERE (nome, id) > (?, ?)
+        ORDER BY nome, id
+        LIMIT 51
+    ''', ('Maria', 1)),
+    ('Consultas do paciente', '''
+        SELECT COUNT(*) as total FROM consultas WHERE paciente_id = ?
+    ''', (1,)),
+    ('Histórico do paciente', '''
+        SELECT c.id, c.data_consulta FROM consultas c
+        WHERE c.paciente_id = ? AND (c.data_consulta, c.id) < (?, ?)
+        ORDER BY c.data_consulta DESC, c.id DESC
+        LIMIT 11
+    ''', (1, '2024-06-01 00:00:00', 0)),
+    ('Vínculos do médico', '''
+        SELECT j.value,
+               EXISTS (SELECT 1 FROM consultas WHERE medico_id = j.value),
+               EXISTS (SELECT 1 FROM prontuarios WHERE medico_id = j.value)
+        FROM json_each(?) AS j
+    ''', ('[1, 2, 3]',)),
+    ('CPF em uso', '''
+        SELECT EXISTS (SELECT 1 FROM pacientes WHERE cpf_digits = ? AND id != ?)
+    ''', ('12345678901', 0)),
+    ('Agenda do médico no dia', '''
+        SELECT data_consulta FROM consultas
+        WHERE medico_id = ? AND data_consulta >= ? AND data_consulta < ?
+          AND COALESCE(status, '') NOT IN (?)
+    ''', (1, '2024-01-15', '2024-01-16', 'cancelado')),
+    ('Consultas do médico no período', '''
+        SELECT c.*, p.nome as paciente_nome
+        FROM consultas c
+        JOIN pacientes p ON c.paciente_id = p.id
+        WHERE c.data_consulta >= ? AND c.data_consulta < ? AND c.medico_id = ? AND c.status IN (?)
+        ORDER BY c.data_consulta, c.id
+        LIMIT 20 OFFSET 0
+    ''', ('2024-01-01', '2024-02-01', 1, 'agendado')),
+    ('Prontuário da consulta', '''
+        SELECT * FROM prontuarios WHERE consulta_id = ?
+    ''', (1,)),
+    ('Receitas do período', '''
+        SELECT COALESCE(SUM(valor), 0) as total FROM financeiro
+        WHERE tipo = 'receita' AND data_vencimento >= ? AND data_vencimento < ?
+    ''', ('2024-01-01', '2024-02-01')),
+    ('Lembretes do dia', '''
+        SELECT COUNT(*) as total FROM comunicacao
+        WHERE tipo = 'lembrete' AND data_envio >= ? AND data_envio < ?
+    ''', ('2024-01-01', '2024-01-02')),
+]
+
+
+def explain_query(conn, query, params=()):
+    """Retorna as linhas do EXPLAIN QUERY PLAN de uma query"""
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def index_usage_report(conn, queries=None):
+    """
+    Relaciona cada query crítica aos índices que ela utiliza
+
+    Returns:
+        list: [(nome, [detalhes do plano])]
+    """
+    return [
+        (name, explain_query(conn, query, params))
+        for name, query, params in (queries or HOT_QUERIES)
+    ]
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando"""
+    from config import DATABASE_CONFIG
+
+    parser = argparse.ArgumentParser(description="Migrações do banco de dados do ClinicCare")
+    parser.add_argument('command', choices=['status', 'migrate', 'explain'])
+    parser.add_argument('--db', default=DATABASE_CONFIG['path'], help="Caminho do banco SQLite")
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        # O DatabaseManager cria as tabelas base e aplica as migrações pendentes
+        from utils.db_manager import DatabaseManager
+        manager = DatabaseManager(args.db)
+        with manager.connection() as conn:
+            print(f"✅ Banco na versão {current_version(conn)}")
+        manager.close()
+        return 0
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == 'status':
+            print(f"Versão atual do esquema: {current_version(conn)}")
+            pending = pending_migrations(conn)
+            if not pending:
+                print("✅ Nenhuma migração pendente")
+            for version, description, _ in pending:
+                print(f"   • {version:03d} - {description}")
+
+            repetidos = cpfs_repetidos(conn)
+            if repetidos:
+                print(f"⚠️ {len(repetidos)} CPF(s) em mais de um paciente (só o primeiro id é único no banco):")
+            for cpf, ids in repetidos:
+                print(f"   • {cpf}: pacientes {', '.join(map(str, ids))}")
+        else:
+            for name, details in index_usage_report(conn):
+                print(f"\n {name}")
+                for detail in details:
+                    # SCAN sem índice ou ordenação em B-tree temporária
+                    # (tabelas virtuais, como json_each, não são tabelas do banco)
+                    full_scan = (detail.startswith("SCAN") and "USING" not in detail
+                                 and "VIRTUAL TABLE" not in detail)
+                    marker = "⚠️" if full_scan or "TEMP B-TREE" in detail else "✅"
+                    print(f"   {marker} {detail}")
+    finally:
+        conn.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
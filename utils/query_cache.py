@@ -0,0 +1,154 @@
+"""
+Cache de resultados de queries compartilhado pelo processo
+
+Os callbacks do dashboard disparam a cada intervalo em todas as abas
+abertas; com o cache, cada combinação de query e parâmetros é calculada
+uma única vez por TTL e reaproveitada pelas demais abas.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Tabelas lidas (FROM/JOIN) ou escritas (INSERT INTO/UPDATE/DELETE FROM)
+_TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+([A-Za-z_][A-Za-z0-9_]*)', re.IGNORECASE)
+
+
+def tables_in(query):
+    """Retorna o conjunto de tabelas referenciadas por uma query SQL"""
+    return {name.lower() for name in _TABLE_PATTERN.findall(query)}
+
+
+class QueryCache:
+    """Cache LRU com expiração (TTL) e invalidação por tabela
+
+    Cada entrada guarda as tabelas de que depende; uma escrita em uma
+    dessas tabelas remove a entrada. Chamadas simultâneas para a mesma
+    chave aguardam um único cálculo (single-flight).
+    """
+
+    def __init__(self, ttl=30, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # chave -> (expira_em, valor, tabelas)
+        self._generations = {}  # tabela -> contador de invalidações
+        self._epoch = 0  # incrementado a cada invalidação total
+        self._inflight = {}  # chave -> lock do cálculo em andamento
+        self._discard = set()  # chaves em cálculo invalidadas: o resultado não é guardado
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna (True, valor) se a chave estiver válida no cache"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def __contains__(self, key):
+        """Indica se a chave está válida no cache (sem contar acerto nem mudar a ordem LRU)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def get_or_compute(self, key, compute, tables=(), ttl=None):
+        """
+        Retorna o valor em cache ou o calcula uma única vez
+
+        Args:
+            key: Chave hashable (ex: (query, params))
+            compute (callable): Função sem argumentos que produz o valor
+            tables (iterable): Tabelas cuja escrita invalida a entrada
+            ttl (float): Validade em segundos (padrão: self.ttl)
+        """
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        with self._lock:
+            flight = self._inflight.setdefault(key, threading.Lock())
+
+        with flight:
+            # Outra thread pode ter calculado enquanto aguardávamos
+            found, value = self.get(key)
+            if found:
+                self.hits += 1
+                return value
+
+            self.misses += 1
+            tables = frozenset(t.lower() for t in tables)
+            with self._lock:
+                snapshot = (self._epoch, {t: self._generations.get(t, 0) for t in tables})
+
+            try:
+                value = compute()
+                self._store(key, value, tables, snapshot, ttl)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                    self._discard.discard(key)
+
+            return value
+
+    def _store(self, key, value, tables, snapshot, ttl):
+        epoch, generations = snapshot
+        with self._lock:
+            # Uma escrita durante o cálculo torna o resultado obsoleto
+            if key in self._discard or epoch != self._epoch or any(
+                self._generations.get(t, 0) != g for t, g in generations.items()
+            ):
+                return
+
+            expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._entries[key] = (expires, value, tables)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables=None):
+        """Remove as entradas que dependem das tabelas (todas, se None)"""
+        with self._lock:
+            if tables is None:
+                self._epoch += 1
+                self._entries.clear()
+                return
+
+            tables = {t.lower() for t in tables}
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+            stale = [key for key, entry in self._entries.items() if entry[2] & tables]
+            for key in stale:
+                del self._entries[key]
+
+    def invalidate_keys(self, keys):
+        """
+        Remove entradas específicas, sem afetar as demais das mesmas tabelas
+
+        Um cálculo em andamento de uma dessas chaves pode ter lido os dados
+        anteriores à escrita: o valor é devolvido a quem pediu, mas não é guardado.
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                if key in self._inflight:
+                    self._discard.add(key)
+
+    def clear(self):
+        """Esvazia o cache"""
+        self.invalidate()
+
+    def __len__(self):
+        return len(self._entries)
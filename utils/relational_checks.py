@@ -11,7 +11,21 @@ import os
 # Adicionar o diretório pai ao path para importações
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.db_manager import db_manager
+from utils.repositories import medicos_repo, pacientes_repo
+
+# Vínculos de Repositorio.referencias, como aparecem nas mensagens
+DEPENDENCY_LABELS = {
+    'consultas': "consulta(s)",
+    'prontuarios': "prontuário(s)",
+    'comunicacoes': "comunicação(ões)",
+}
+
+# Restrições únicas do banco ("UNIQUE constraint failed: tabela.coluna")
+UNIQUE_MESSAGES = {
+    'pacientes.cpf_digits': "CPF já cadastrado no sistema.",
+    'pacientes.cpf': "CPF já cadastrado no sistema.",
+    'medicos.crm': "CRM já cadastrado no sistema.",
+}
 
 class RelationalIntegrityChecker:
     """Classe para verificação de integridade referencial"""
@@ -104,6 +118,67 @@ class RelationalIntegrityChecker:
         """
         return re.sub(r'[^0-9]', '', cpf) if cpf else ""
     
+    @staticmethod
+    def _dependency_result(vinculos, entity):
+        """
+        Monta o resultado da verificação de vínculos de um registro
+
+        Args:
+            vinculos (dict): {nome do vínculo: quantidade}, de Repositorio.contar_vinculos,
+                ou {nome do vínculo: bool}, de Repositorio.vinculos (sem a quantidade)
+            entity (str): 'paciente' ou 'médico', usado na mensagem
+
+        Returns:
+            dict: {'can_delete': bool, 'dependencies': list, 'message': str}
+        """
+        dependencies = [
+            DEPENDENCY_LABELS[nome] if isinstance(valor, bool) else f"{valor} {DEPENDENCY_LABELS[nome]}"
+            for nome, valor in vinculos.items() if valor
+        ]
+        can_delete = len(dependencies) == 0
+
+        if can_delete:
+            message = f"{entity.capitalize()} pode ser excluído com segurança."
+        else:
+            deps_text = ", ".join(dependencies)
+            message = f"Não é possível excluir o {entity}, pois está vinculado a: {deps_text}."
+
+        return {
+            'can_delete': can_delete,
+            'dependencies': dependencies,
+            'message': message
+        }
+
+    @staticmethod
+    def _dependency_error(error):
+        return {
+            'can_delete': False,
+            'dependencies': [],
+            'message': f"Erro ao verificar dependências: {str(error)}"
+        }
+
+    @staticmethod
+    def _check_dependency(repo, registro_id, entity):
+        """Verifica os vínculos de um registro, com a quantidade de cada um"""
+        try:
+            return RelationalIntegrityChecker._dependency_result(repo.contar_vinculos(registro_id), entity)
+        except Exception as e:
+            return RelationalIntegrityChecker._dependency_error(e)
+
+    @staticmethod
+    def _check_dependencies(repo, ids, entity):
+        """Verifica os vínculos de vários registros em uma única query (sem as quantidades)"""
+        try:
+            vinculos = repo.vinculos(ids)
+            return {
+                registro_id: RelationalIntegrityChecker._dependency_result(flags, entity)
+                for registro_id, flags in vinculos.items()
+            }
+
+        except Exception as e:
+            erro = RelationalIntegrityChecker._dependency_error(e)
+            return {int(registro_id): erro for registro_id in ids}
+
     @staticmethod
     def check_patient_dependencies(patient_id):
         """
@@ -119,56 +194,20 @@ class RelationalIntegrityChecker:
                 'message': str
             }
         """
-        try:
-            dependencies = []
-            
-            # Verificar consultas
-            consultas = db_manager.execute_query('''
-                SELECT COUNT(*) as total FROM consultas 
-                WHERE paciente_id = ?
-            ''', (patient_id,))
-            
-            if consultas.iloc[0]['total'] > 0:
-                dependencies.append(f"{consultas.iloc[0]['total']} consulta(s)")
-            
-            # Verificar prontuários
-            prontuarios = db_manager.execute_query('''
-                SELECT COUNT(*) as total FROM prontuarios 
-                WHERE paciente_id = ?
-            ''', (patient_id,))
-            
-            if prontuarios.iloc[0]['total'] > 0:
-                dependencies.append(f"{prontuarios.iloc[0]['total']} prontuário(s)")
-            
-            # Verificar comunicações
-            comunicacoes = db_manager.execute_query('''
-                SELECT COUNT(*) as total FROM comunicacao 
-                WHERE paciente_id = ?
-            ''', (patient_id,))
-            
-            if comunicacoes.iloc[0]['total'] > 0:
-                dependencies.append(f"{comunicacoes.iloc[0]['total']} comunicação(ões)")
-            
-            can_delete = len(dependencies) == 0
-            
-            if can_delete:
-                message = "Paciente pode ser excluído com segurança."
-            else:
-                deps_text = ", ".join(dependencies)
-                message = f"Não é possível excluir o paciente, pois está vinculado a: {deps_text}."
-            
-            return {
-                'can_delete': can_delete,
-                'dependencies': dependencies,
-                'message': message
-            }
+        return RelationalIntegrityChecker._check_dependency(pacientes_repo, patient_id, 'paciente')
+    
+    @staticmethod
+    def check_patients_dependencies(patient_ids):
+        """
+        Verifica os vínculos de vários pacientes de uma vez (limpezas em lote)
+        
+        Args:
+            patient_ids (iterable): IDs dos pacientes
             
-        except Exception as e:
-            return {
-                'can_delete': False,
-                'dependencies': [],
-                'message': f"Erro ao verificar dependências: {str(e)}"
-            }
+        Returns:
+            dict: {patient_id: resultado de check_patient_dependencies, sem as quantidades}
+        """
+        return RelationalIntegrityChecker._check_dependencies(pacientes_repo, patient_ids, 'paciente')
     
     @staticmethod
     def check_doctor_dependencies(doctor_id):
@@ -185,47 +224,20 @@ class RelationalIntegrityChecker:
                 'message': str
             }
         """
-        try:
-            dependencies = []
-            
-            # Verificar consultas
-            consultas = db_manager.execute_query('''
-                SELECT COUNT(*) as total FROM consultas 
-                WHERE medico_id = ?
-            ''', (doctor_id,))
-            
-            if consultas.iloc[0]['total'] > 0:
-                dependencies.append(f"{consultas.iloc[0]['total']} consulta(s)")
-            
-            # Verificar prontuários
-            prontuarios = db_manager.execute_query('''
-                SELECT COUNT(*) as total FROM prontuarios 
-                WHERE medico_id = ?
-            ''', (doctor_id,))
-            
-            if prontuarios.iloc[0]['total'] > 0:
-                dependencies.append(f"{prontuarios.iloc[0]['total']} prontuário(s)")
-            
-            can_delete = len(dependencies) == 0
-            
-            if can_delete:
-                message = "Médico pode ser excluído com segurança."
-            else:
-                deps_text = ", ".join(dependencies)
-                message = f"Não é possível excluir o médico, pois está vinculado a: {deps_text}."
-            
-            return {
-                'can_delete': can_delete,
-                'dependencies': dependencies,
-                'message': message
-            }
+        return RelationalIntegrityChecker._check_dependency(medicos_repo, doctor_id, 'médico')
+    
+    @staticmethod
+    def check_doctors_dependencies(doctor_ids):
+        """
+        Verifica os vínculos de vários médicos de uma vez (limpezas em lote)
+        
+        Args:
+            doctor_ids (iterable): IDs dos médicos
             
-        except Exception as e:
-            return {
-                'can_delete': False,
-                'dependencies': [],
-                'message': f"Erro ao verificar dependências: {str(e)}"
-            }
+        Returns:
+            dict: {doctor_id: resultado de check_doctor_dependencies, sem as quantidades}
+        """
+        return RelationalIntegrityChecker._check_dependencies(medicos_repo, doctor_ids, 'médico')
     
     @staticmethod
     def check_cpf_uniqueness(cpf, exclude_id=None):
@@ -241,19 +253,7 @@ class RelationalIntegrityChecker:
         """
         try:
             clean_cpf = RelationalIntegrityChecker.clean_cpf(cpf)
-            
-            if exclude_id:
-                result = db_manager.execute_query('''
-                    SELECT COUNT(*) as total FROM pacientes 
-                    WHERE cpf = ? AND id != ?
-                ''', (clean_cpf, exclude_id))
-            else:
-                result = db_manager.execute_query('''
-                    SELECT COUNT(*) as total FROM pacientes 
-                    WHERE cpf = ?
-                ''', (clean_cpf,))
-            
-            return result.iloc[0]['total'] == 0
+            return not pacientes_repo.cpf_em_uso(clean_cpf, exclude_id)
             
         except Exception:
             return False
@@ -271,30 +271,39 @@ class RelationalIntegrityChecker:
             bool: True se único, False se duplicado
         """
         try:
-            if exclude_id:
-                result = db_manager.execute_query('''
-                    SELECT COUNT(*) as total FROM medicos 
-                    WHERE crm = ? AND id != ?
-                ''', (crm.upper(), exclude_id))
-            else:
-                result = db_manager.execute_query('''
-                    SELECT COUNT(*) as total FROM medicos 
-                    WHERE crm = ?
-                ''', (crm.upper(),))
-            
-            return result.iloc[0]['total'] == 0
+            return not medicos_repo.crm_em_uso(crm.upper(), exclude_id)
             
         except Exception:
             return False
     
+    @staticmethod
+    def integrity_error_message(error):
+        """
+        Traduz a violação de uma restrição única em mensagem de validação
+        
+        Args:
+            error (sqlite3.IntegrityError): Erro da gravação
+            
+        Returns:
+            str: Mensagem para o usuário, ou None se a restrição não for conhecida
+        """
+        texto = str(error)
+        for coluna, message in UNIQUE_MESSAGES.items():
+            if texto.endswith(coluna):
+                return message
+        return None
+    
     @staticmethod
     def validate_patient_data(data, exclude_id=None):
         """
         Valida dados completos do paciente
         
+        A duplicidade de CPF não é consultada aqui: o índice único de
+        cpf_digits recusa a gravação (ver integrity_error_message).
+        
         Args:
             data (dict): Dados do paciente
-            exclude_id (int): ID para exclusão na verificação de duplicidade
+            exclude_id (int): Mantido por compatibilidade
             
         Returns:
             dict: {
@@ -321,8 +330,6 @@ class RelationalIntegrityChecker:
         if data.get('cpf'):
             if not RelationalIntegrityChecker.validate_cpf(data['cpf']):
                 errors.append("CPF inválido.")
-            elif not RelationalIntegrityChecker.check_cpf_uniqueness(data['cpf'], exclude_id):
-                errors.append("CPF já cadastrado no sistema.")
         
         # Validar email se fornecido
         if data.get('email'):
@@ -340,9 +347,12 @@ class RelationalIntegrityChecker:
         """
         Valida dados completos do médico
         
+        A duplicidade de CRM não é consultada aqui: a restrição UNIQUE de
+        crm recusa a gravação (ver integrity_error_message).
+        
         Args:
             data (dict): Dados do médico
-            exclude_id (int): ID para exclusão na verificação de duplicidade
+            exclude_id (int): Mantido por compatibilidade
             
         Returns:
             dict: {
@@ -368,8 +378,6 @@ class RelationalIntegrityChecker:
         if data.get('crm'):
             if not RelationalIntegrityChecker.validate_crm(data['crm']):
                 errors.append("CRM inválido. Use o formato: CRM/UF 123456")
-            elif not RelationalIntegrityChecker.check_crm_uniqueness(data['crm'], exclude_id):
-                errors.append("CRM já cadastrado no sistema.")
         
         # Validar email se fornecido
         if data.get('email'):
@@ -394,6 +402,16 @@ def can_delete_doctor(doctor_id):
     """Verifica se médico pode ser excluído"""
     return integrity_checker.check_doctor_dependencies(doctor_id)
 
+def deletable_patients(patient_ids):
+    """Retorna os IDs, dentre os informados, de pacientes sem vínculos"""
+    results = integrity_checker.check_patients_dependencies(patient_ids)
+    return [patient_id for patient_id, result in results.items() if result['can_delete']]
+
+def deletable_doctors(doctor_ids):
+    """Retorna os IDs, dentre os informados, de médicos sem vínculos"""
+    results = integrity_checker.check_doctors_dependencies(doctor_ids)
+    return [doctor_id for doctor_id, result in results.items() if result['can_delete']]
+
 def validate_patient(data, exclude_id=None):
     """Valida dados do paciente"""
     return integrity_checker.validate_patient_data(data, exclude_id)
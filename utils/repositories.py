@@ -0,0 +1,220 @@
+"""
+Repositórios para os caminhos transacionais (cadastro, edição e exclusão)
+
+Leituras por id, verificações de existência e escritas de um único
+registro não precisam de DataFrame: os repositórios usam o cursor do
+sqlite3 diretamente e devolvem NamedTuples imutáveis. Os DataFrames de
+``execute_query`` ficam reservados para listagens, relatórios e gráficos.
+"""
+
+import json
+from typing import NamedTuple, Optional
+
+from utils.db_manager import db_manager
+
+
+class Paciente(NamedTuple):
+    id: int
+    nome: str
+    cpf: str
+    data_nascimento: Optional[str] = None
+    genero: Optional[str] = None
+    telefone: Optional[str] = None
+    email: Optional[str] = None
+    endereco: Optional[str] = None
+    estado_civil: Optional[str] = None
+    convenio: Optional[str] = None
+    numero_convenio: Optional[str] = None
+    observacoes: Optional[str] = None
+    data_cadastro: Optional[str] = None
+    ativo: int = 1
+    cpf_digits: Optional[str] = None  # mantido por trigger a partir de cpf
+
+
+class Medico(NamedTuple):
+    id: int
+    nome: str
+    crm: str
+    especialidade: Optional[str] = None
+    telefone: Optional[str] = None
+    email: Optional[str] = None
+    valor_consulta: Optional[float] = None
+    duracao_consulta: Optional[int] = 30
+    horario_atendimento: Optional[str] = None
+    convenios_aceitos: Optional[str] = None
+    observacoes: Optional[str] = None
+    data_cadastro: Optional[str] = None
+    ativo: int = 1
+
+
+class Consulta(NamedTuple):
+    id: int
+    paciente_id: Optional[int] = None
+    medico_id: Optional[int] = None
+    data_consulta: Optional[str] = None
+    status: Optional[str] = 'agendado'
+    valor: Optional[float] = None
+    observacoes: Optional[str] = None
+    data_criacao: Optional[str] = None
+
+
+class Repositorio:
+    """Acesso a uma tabela por chave primária, sem pandas
+
+    As leituras por id passam pelo cache de resultados do DatabaseManager
+    e valem até a próxima escrita na tabela; as escritas usam
+    execute_insert/execute_update, que invalidam o cache.
+    """
+
+    tabela = None
+    registro = None  # NamedTuple com as colunas da tabela
+    referencias = {}  # nome do vínculo -> (tabela, coluna) que aponta para esta tabela
+
+    def __init__(self, manager=None):
+        self.manager = manager or db_manager
+
+    def _escalar(self, query, params=()):
+        with self.manager.connection() as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+    def por_id(self, registro_id):
+        """Retorna o registro com o id informado (None se não existir)"""
+        registro_id = int(registro_id)
+
+        def ler():
+            colunas = ', '.join(self.registro._fields)
+            with self.manager.connection() as conn:
+                linha = conn.execute(
+                    f"SELECT {colunas} FROM {self.tabela} WHERE id = ?", (registro_id,)
+                ).fetchone()
+            return None if linha is None else self.registro._make(linha)
+
+        # NamedTuples são imutáveis: o valor em cache pode ser compartilhado
+        return self.manager.cache.get_or_compute(
+            ('por_id', self.tabela, registro_id), ler, (self.tabela,)
+        )
+
+    def existe(self, condicao, params=()):
+        """Indica se algum registro satisfaz a condição SQL"""
+        return bool(self._escalar(
+            f"SELECT EXISTS (SELECT 1 FROM {self.tabela} WHERE {condicao})", params
+        ))
+
+    def contar(self, condicao='1=1', params=()):
+        """Conta os registros que satisfazem a condição SQL"""
+        return self._escalar(f"SELECT COUNT(*) FROM {self.tabela} WHERE {condicao}", params)
+
+    def vinculos(self, ids):
+        """
+        Indica, para cada id, quais tabelas o referenciam
+
+        Uma única query com um EXISTS por referência, que para no primeiro
+        registro encontrado; os ids vão como um array JSON, então a
+        quantidade de ids não altera o texto da query.
+
+        Args:
+            ids (iterable): IDs a verificar
+
+        Returns:
+            dict: {id: {nome do vínculo: bool}}
+        """
+        ids = [int(registro_id) for registro_id in ids]
+        if not ids or not self.referencias:
+            return {registro_id: {} for registro_id in ids}
+
+        nomes = list(self.referencias)
+        flags = ', '.join(
+            f"EXISTS (SELECT 1 FROM {tabela} WHERE {coluna} = j.value)"
+            for tabela, coluna in self.referencias.values()
+        )
+        with self.manager.connection() as conn:
+            linhas = conn.execute(
+                f"SELECT j.value, {flags} FROM json_each(?) AS j", (json.dumps(ids),)
+            ).fetchall()
+
+        return {linha[0]: dict(zip(nomes, map(bool, linha[1:]))) for linha in linhas}
+
+    def contar_vinculos(self, registro_id):
+        """
+        Conta, em uma única query, os registros que referenciam o id
+
+        Returns:
+            dict: {nome do vínculo: quantidade}
+        """
+        if not self.referencias:
+            return {}
+
+        contagens = ', '.join(
+            f"(SELECT COUNT(*) FROM {tabela} WHERE {coluna} = ?)"
+            for tabela, coluna in self.referencias.values()
+        )
+        with self.manager.connection() as conn:
+            linha = conn.execute(
+                f"SELECT {contagens}", (int(registro_id),) * len(self.referencias)
+            ).fetchone()
+
+        return dict(zip(self.referencias, linha))
+
+    def inserir(self, **valores):
+        """Insere um registro e retorna o id gerado"""
+        colunas = ', '.join(valores)
+        marcadores = ', '.join('?' for _ in valores)
+        return self.manager.execute_insert(
+            f"INSERT INTO {self.tabela} ({colunas}) VALUES ({marcadores})", tuple(valores.values())
+        )
+
+    def atualizar(self, registro_id, **valores):
+        """Atualiza as colunas informadas de um registro"""
+        atribuicoes = ', '.join(f"{coluna} = ?" for coluna in valores)
+        return self.manager.execute_update(
+            f"UPDATE {self.tabela} SET {atribuicoes} WHERE id = ?",
+            tuple(valores.values()) + (int(registro_id),)
+        )
+
+    def excluir(self, registro_id):
+        """Exclui um registro"""
+        return self.manager.execute_update(
+            f"DELETE FROM {self.tabela} WHERE id = ?", (int(registro_id),)
+        )
+
+
+class PacienteRepo(Repositorio):
+    tabela = 'pacientes'
+    registro = Paciente
+    referencias = {
+        'consultas': ('consultas', 'paciente_id'),
+        'prontuarios': ('prontuarios', 'paciente_id'),
+        'comunicacoes': ('comunicacao', 'paciente_id'),
+    }
+
+    def cpf_em_uso(self, cpf, exceto_id=None):
+        """Indica se o CPF (só dígitos) já pertence a outro paciente"""
+        if exceto_id:
+            return self.existe('cpf_digits = ? AND id != ?', (cpf, int(exceto_id)))
+        return self.existe('cpf_digits = ?', (cpf,))
+
+
+class MedicoRepo(Repositorio):
+    tabela = 'medicos'
+    registro = Medico
+    referencias = {
+        'consultas': ('consultas', 'medico_id'),
+        'prontuarios': ('prontuarios', 'medico_id'),
+    }
+
+    def crm_em_uso(self, crm, exceto_id=None):
+        """Indica se o CRM já pertence a outro médico"""
+        if exceto_id:
+            return self.existe('crm = ? AND id != ?', (crm, int(exceto_id)))
+        return self.existe('crm = ?', (crm,))
+
+
+class ConsultaRepo(Repositorio):
+    tabela = 'consultas'
+    registro = Consulta
+
+
+# Instâncias globais para uso direto
+pacientes_repo = PacienteRepo()
+medicos_repo = MedicoRepo()
+consultas_repo = ConsultaRepo()